@@ -0,0 +1,309 @@
+import io
+import math
+import os
+import re
+import wave
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+_SYNC_FRAMES = 16000  # 溢寫後每寫入這麼多 frame 更新一次 .frames 記錄 (16 kHz 下約 1 秒)
+
+
+def frames_path(path: Path) -> Path:
+    """溢寫檔旁的小檔案，記錄檔案中已寫入的 frame 數 (檔案本身是預先加長的 sparse file)。"""
+    return Path(path).with_suffix(".frames")
+
+
+class PCMArena:
+    """
+    Growable, preallocated int16 sample store for one recording session.
+    Audio reads are written straight into reserved slices, so a long dictation
+    never keeps a list of chunks around, and view() hands out the samples
+    without copying.
+
+    Offsets are absolute frame counts since the session started. discard()
+    lets a consumer that copied what it needs give the prefix back; the
+    space is reclaimed on the next reserve() so the arena stays bounded.
+    Views into a discarded range must no longer be used.
+
+    With spill_path set, growing past spill_frames moves the storage into a
+    memory-mapped raw PCM file, so resident memory stays flat for hour-long
+    sessions while view() keeps returning zero-copy (np.memmap) slices. The
+    committed frame count is kept in a .frames sidecar (see sync()), so a
+    file left behind by a crash can be cut at the last written frame.
+    """
+
+    def __init__(
+        self,
+        channels: int = 1,
+        capacity: int = 16000 * 30,
+        spill_frames: int = 0,
+        spill_path: Optional[Path] = None,
+    ):
+        self.channels = channels
+        self.spill_frames = spill_frames
+        self.spill_path = spill_path
+        self.spilled = False
+        self._buf = np.empty((max(capacity, 1), channels), dtype=np.int16)
+        self._len = 0       # _buf 中有效的 frame 數
+        self._base = 0      # _buf[0] 對應的絕對 offset
+        self._dropped = 0   # _buf 開頭可回收的 frame 數
+        self._synced = 0    # 上次寫進 .frames 的 _len
+        self.allocations = 1  # 擴充次數 + 初始配置，供效能量測使用
+
+    @property
+    def frames(self) -> int:
+        """目前為止寫入的總 frame 數 (絕對 offset)。"""
+        return self._base + self._len
+
+    @property
+    def base(self) -> int:
+        """仍可讀取的最小絕對 offset。"""
+        return self._base + self._dropped
+
+    @property
+    def capacity(self) -> int:
+        return self._buf.shape[0]
+
+    def reserve(self, n: int) -> np.ndarray:
+        """回傳可直接寫入的 n 個 frame 區塊，寫完後必須呼叫 commit(n)。"""
+        need = self._len + n
+        if need > self._buf.shape[0] and self._dropped:
+            self._compact()
+            need = self._len + n
+        if need > self._buf.shape[0]:
+            self._grow(need)
+        return self._buf[self._len:need]
+
+    def commit(self, n: int) -> None:
+        self._len = min(self._len + n, self._buf.shape[0])
+        if self.spilled and abs(self._len - self._synced) >= _SYNC_FRAMES:
+            self.sync()
+
+    def sync(self) -> None:
+        """把溢寫檔中有效的 frame 數寫進 .frames (當機後 load_recording 依此截斷)。"""
+        if not self.spilled:
+            return
+        try:
+            frames_path(self.spill_path).write_text(str(self._len))
+            self._synced = self._len
+        except OSError:
+            pass
+
+    def write(self, chunk: np.ndarray) -> None:
+        n = chunk.shape[0]
+        np.copyto(self.reserve(n), chunk.reshape(n, self.channels))
+        self.commit(n)
+
+    def view(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Zero-copy view of frames [start, end) in absolute offsets (shape: frames x channels)."""
+        end = self.frames if end is None else min(end, self.frames)
+        start = max(start, self.base)
+        return self._buf[start - self._base:max(end, start) - self._base]
+
+    def discard(self, upto: int) -> None:
+        """宣告 upto 之前的 frame 不再需要。"""
+        self._dropped = max(self._dropped, min(upto, self.frames) - self._base)
+
+    def _compact(self) -> None:
+        keep = self._len - self._dropped
+        self._buf[:keep] = self._buf[self._dropped:self._len]
+        self._base += self._dropped
+        self._len = keep
+        self._dropped = 0
+        self.sync()
+
+    def _grow(self, need: int) -> None:
+        # 幾何成長：一小時錄音也只會重新配置十幾次
+        new_cap = max(need, self._buf.shape[0] * 2)
+        if self.spill_path is not None and self.spill_frames and new_cap > self.spill_frames:
+            self._grow_on_disk(new_cap)
+            return
+        new_buf = np.empty((new_cap, self.channels), dtype=np.int16)
+        new_buf[:self._len] = self._buf[:self._len]
+        self._buf = new_buf
+        self.allocations += 1
+
+    def _grow_on_disk(self, new_cap: int) -> None:
+        size = new_cap * self.channels * 2
+        if not self.spilled:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "wb") as f:
+                f.truncate(size)  # sparse file，尚未寫入的部分不佔磁碟
+            new_buf = np.memmap(self.spill_path, dtype=np.int16, mode="r+", shape=(new_cap, self.channels))
+            new_buf[:self._len] = self._buf[:self._len]
+            self.spilled = True
+            self.sync()
+            print(f"[audio] Recording spilled to disk: {self.spill_path}")
+        else:
+            # 只把檔案加長再重新 map，既有資料不需搬移；舊的 view 仍指向原本的 mapping
+            self._buf.flush()
+            os.truncate(self.spill_path, size)
+            new_buf = np.memmap(self.spill_path, dtype=np.int16, mode="r+", shape=(new_cap, self.channels))
+        self._buf = new_buf
+        self.allocations += 1
+
+
+def rms_level(samples: np.ndarray, scratch: Optional[np.ndarray] = None) -> float:
+    """
+    int16 區塊的 RMS (0.0 ~ 1.0)。轉成 float32 寫進呼叫端重複使用的 scratch 再 dot，
+    每次呼叫不配置新陣列 (einsum 的混合型別累加內部會配置緩衝區)；scratch 太小時才臨時配置。
+    """
+    if samples.size == 0:
+        return 0.0
+    flat = samples.reshape(-1)
+    if scratch is None or scratch.size < flat.size:
+        scratch = np.empty(flat.size, dtype=np.float32)
+    buf = scratch[:flat.size]
+    np.copyto(buf, flat)
+    return math.sqrt(float(np.dot(buf, buf)) / flat.size) / 32768.0
+
+
+class AudioBuffer:
+    """
+    Raw int16 PCM handed from the recorder to STT engines.
+    Local engines read .float32 (mono, lazily converted and cached) directly;
+    only cloud engines pay for a container encode via to_wav_bytes().
+    speech_regions is None when no VAD ran; otherwise it lists (start, end)
+    sample offsets into pcm, and an empty list means nothing was said.
+    """
+
+    def __init__(
+        self,
+        pcm: np.ndarray,
+        samplerate: int = 16000,
+        channels: int = 1,
+        speech_regions: Optional[List[Tuple[int, int]]] = None,
+    ):
+        self.pcm = pcm.reshape(-1, channels)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.speech_regions = speech_regions
+        self.source_range: Optional[Tuple[int, int]] = None  # 在錄音 session 中的絕對 offset
+        self.spill_path: Optional[Path] = None  # pcm 由磁碟上的 memmap 檔提供時的路徑
+        self._float32: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.pcm.shape[0]
+
+    def __bool__(self) -> bool:
+        return self.pcm.shape[0] > 0
+
+    @property
+    def duration(self) -> float:
+        return self.pcm.shape[0] / float(self.samplerate)
+
+    @property
+    def has_speech(self) -> bool:
+        if self.speech_regions is None:
+            return bool(self)
+        return bool(self.speech_regions)
+
+    def speech_timestamps(self, merge_gap: float = 1.0) -> List[float]:
+        """
+        speech_regions 攤平成秒數 [s0, e0, s1, e1, ...] (faster-whisper clip_timestamps 格式)。
+        間隔短於 merge_gap 秒的區段會合併，避免把一句話切成好幾段分開解碼。
+        """
+        from audio.vad import merge_regions
+        out: List[float] = []
+        regions = merge_regions(self.speech_regions or [], int(merge_gap * self.samplerate))
+        for start, end in regions:
+            out += [round(start / self.samplerate, 3), round(end / self.samplerate, 3)]
+        return out
+
+    @property
+    def float32(self) -> np.ndarray:
+        """Mono float32 in [-1, 1]，Whisper 系列引擎可直接吃的格式。"""
+        if self._float32 is None:
+            if self.channels > 1:
+                mono = self.pcm.mean(axis=1, dtype=np.float32)
+            else:
+                mono = self.pcm[:, 0].astype(np.float32)
+            mono *= 1.0 / 32768.0
+            self._float32 = mono
+        return self._float32
+
+    def to_wav_bytes(self) -> bytes:
+        if not self:
+            return b""
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)  # int16 = 2 bytes
+            wf.setframerate(self.samplerate)
+            wf.writeframes(np.ascontiguousarray(self.pcm).tobytes())
+        return buf.getvalue()
+
+    def release_backing(self, keep: bool = False) -> None:
+        """
+        Session 結束後呼叫：刪除溢寫到磁碟的 PCM 檔 (keep=True 則保留，供當機
+        復原或重新辨識)。POSIX 上已 map 的 view 在刪檔後仍可安全讀取。
+        """
+        if self.spill_path is None or keep:
+            return
+        remove_recording(self.spill_path)
+        self.spill_path = None
+
+    @classmethod
+    def from_wav_bytes(cls, data: bytes) -> "AudioBuffer":
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            channels = wf.getnchannels()
+            samplerate = wf.getframerate()
+            sampwidth = wf.getsampwidth()
+            raw = wf.readframes(wf.getnframes())
+        if sampwidth == 2:
+            pcm = np.frombuffer(raw, dtype=np.int16)
+        else:
+            pcm = (np.clip(np.frombuffer(raw, dtype=np.float32), -1.0, 1.0) * 32767).astype(np.int16)
+        return cls(pcm, samplerate, channels)
+
+
+_RECORDING_NAME = re.compile(r"rec_(?P<ts>[\d_]+)_(?P<rate>\d+)hz_(?P<ch>\d+)ch\.pcm$")
+
+
+def recording_path(directory: Path, samplerate: int, channels: int, ts: str) -> Path:
+    """溢寫檔的命名規則：取樣率與聲道數寫在檔名裡，復原時不需要另外的 header。"""
+    return Path(directory) / f"rec_{ts}_{samplerate}hz_{channels}ch.pcm"
+
+
+def list_recordings(directory: Path) -> List[Path]:
+    """列出留在磁碟上的錄音 (保留的 session 或上次當機沒清掉的檔案)，新的在前。"""
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    files = [p for p in directory.glob("rec_*.pcm") if _RECORDING_NAME.match(p.name)]
+    return sorted(files, reverse=True)
+
+
+def remove_recording(path: Path) -> None:
+    """刪除溢寫檔與它的 .frames 記錄。"""
+    for p in (Path(path), frames_path(path)):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+def load_recording(path: Path) -> AudioBuffer:
+    """
+    以唯讀 np.memmap 開啟溢寫檔 (zero-copy)，只取 .frames 記錄的已寫入部分
+    (當機時最多少掉最後一次記錄之後約 1 秒)。
+    """
+    m = _RECORDING_NAME.match(Path(path).name)
+    if not m:
+        raise ValueError(f"not a recording file: {path}")
+    samplerate, channels = int(m.group("rate")), int(m.group("ch"))
+    if os.path.getsize(path) < 2 * channels:
+        return AudioBuffer(np.zeros((0, channels), dtype=np.int16), samplerate, channels)
+    pcm = np.memmap(path, dtype=np.int16, mode="r").reshape(-1, channels)
+    try:
+        end = min(int(frames_path(path).read_text().strip()), len(pcm))
+    except (OSError, ValueError):
+        # 舊版留下、沒有 .frames 的檔案：退回去掉尾端全零 (預留未寫入) 的部分
+        nonzero = np.flatnonzero(pcm.any(axis=1))
+        end = int(nonzero[-1]) + 1 if nonzero.size else 0
+    buf = AudioBuffer(pcm[:end], samplerate, channels)
+    buf.spill_path = Path(path)
+    return buf
@@ -0,0 +1,291 @@
+"""
+在獨立子行程中擷取麥克風。
+
+主行程的 _poll_audio 與 faster-whisper、Qt、LLM HTTP 執行緒共用 GIL，忙碌時
+讀取會延遲甚至 overflow。開啟 audio_capture_process 後，由一個小子行程持有
+sd.InputStream (連同混音與轉取樣率)，把 int16 frame 寫進 shared_memory 環形
+緩衝區；主行程的 RingInputStream.readinto() 直接從共享記憶體複製到 arena。
+每個區塊的寫入游標、音量與 overflow 旗標經由 Pipe 傳回，兼作喚醒通知。
+VAD 不在子行程跑：語音區段要對齊主行程 arena 的 offset (每段錄音重新計算
+背景噪音)，由 AudioRecorder 直接對讀進來的區塊計算，不多複製一次。
+
+子行程意外結束時 (Pipe 讀到 EOF)，RingInputStream 會釋放共享記憶體並丟出
+RuntimeError，與串流開不起來時相同。
+
+子行程在 launch() 時建立並常駐 (spawn 一次約需數百毫秒)，每次錄音只是
+送一個 open / close 指令。
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+_HEADER = 64            # bytes：[0] 寫入游標 (絕對 frame 數)
+_CHUNK_SEC = 0.05
+
+
+def _ring_views(shm, frames: int, channels: int):
+    header = np.ndarray((_HEADER // 8,), dtype=np.int64, buffer=shm.buf)
+    ring = np.ndarray((frames, channels), dtype=np.int16, buffer=shm.buf, offset=_HEADER)
+    return header, ring
+
+
+def _attach(name: str):
+    """
+    子行程只是借用父行程建立的共享記憶體，由父行程負責 unlink。spawn 出來的子行程
+    與父行程共用同一個 resource_tracker，重複登記不影響父行程 unlink 時的註銷。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _capture_main(cmd_conn, data_conn, factory) -> None:
+    """子行程進入點：等待 open 指令，擷取到 close 為止。單一執行緒，串流只在 read 回傳後才關閉。"""
+    from audio.recorder import AudioRecorder, _device_native_format, _open_device_stream
+    from audio.buffer import rms_level
+    from audio.resample import PolyphaseResampler, mix_channels
+
+    factory = factory or _open_device_stream
+    while True:
+        msg = cmd_conn.recv()
+        if msg[0] == "quit":
+            return
+        if msg[0] != "open":
+            continue
+        _, shm_name, samplerate, channels, frames, native_capture = msg
+        shm = None
+        stream = None
+        try:
+            shm = _attach(shm_name)
+            header, ring = _ring_views(shm, frames, channels)
+
+            fmt = getattr(factory, "native_format", lambda: None)()
+            if fmt is None and native_capture and factory is _open_device_stream:
+                fmt = _device_native_format()
+            rate, dev_channels = fmt or (samplerate, channels)
+            resampler = None
+            if (rate, dev_channels) != (samplerate, channels):
+                resampler = PolyphaseResampler(rate, samplerate, channels)
+            scratch = np.empty((int(rate * _CHUNK_SEC), dev_channels), dtype=np.int16)
+            rms_scratch = np.empty(2 * int(samplerate * _CHUNK_SEC) * channels, dtype=np.float32)
+            stream = factory(rate, dev_channels)
+            stream.start()
+            data_conn.send(("ready", rate, dev_channels))
+
+            cursor = 0
+            while not cmd_conn.poll():
+                # 與 AudioRecorder 相同的讀取路徑 (readinto / Pa_ReadStream / read)
+                overflowed = AudioRecorder._read_into(stream, scratch)
+                block = resampler.process(mix_channels(scratch, channels)) if resampler else scratch
+                n = len(block)
+                pos = cursor % frames
+                first = min(n, frames - pos)
+                ring[pos:pos + first] = block[:first]
+                ring[:n - first] = block[first:]
+                cursor += n
+                header[0] = cursor  # 資料寫完才推進游標
+                data_conn.send(("chunk", cursor, rms_level(block, rms_scratch), bool(overflowed)))
+        except Exception as e:
+            data_conn.send(("error", str(e)))
+        finally:
+            if stream is not None:
+                try:
+                    stream.stop()
+                    stream.close()
+                except Exception:
+                    pass
+            if shm is not None:
+                shm.close()
+            data_conn.send(("closed",))
+
+
+class CaptureProcess:
+    """
+    Owns the capture subprocess. Use it as AudioRecorder's stream_factory:
+    every call returns a RingInputStream backed by a fresh shared-memory ring.
+    factory must be picklable (default: the sounddevice microphone).
+    """
+
+    def __init__(self, ring_seconds: float = 10.0, factory=None, native_capture: bool = True):
+        self.ring_seconds = ring_seconds
+        self.factory = factory
+        self.native_capture = native_capture
+        self._proc: Optional[multiprocessing.Process] = None
+        self._cmd = None
+        self._data = None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def launch(self) -> None:
+        if self.alive:
+            return
+        # spawn：不 fork 帶著 Qt / Whisper 執行緒的主行程
+        ctx = multiprocessing.get_context("spawn")
+        child_cmd, self._cmd = ctx.Pipe(duplex=False)    # (接收端, 傳送端)
+        self._data, child_data = ctx.Pipe(duplex=False)
+        self._proc = ctx.Process(
+            target=_capture_main,
+            args=(child_cmd, child_data, self.factory),
+            name="voicetype-capture",
+            daemon=True,
+        )
+        started = time.perf_counter()
+        self._proc.start()
+        print(f"[audio] Capture process started (pid {self._proc.pid}, {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    def shutdown(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._cmd.send(("quit",))
+        except Exception:
+            pass
+        self._proc.join(timeout=2.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._proc = None
+
+    def __call__(self, samplerate: int, channels: int) -> "RingInputStream":
+        self.launch()
+        return RingInputStream(self, samplerate, channels)
+
+
+class RingInputStream:
+    """sd.InputStream 相容介面，資料來源是子行程寫入的共享環形緩衝區。"""
+
+    def __init__(self, owner: CaptureProcess, samplerate: int, channels: int):
+        self.owner = owner
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = int(samplerate * owner.ring_seconds)
+        self._shm = shared_memory.SharedMemory(create=True, size=_HEADER + self.frames * channels * 2)
+        self._header, self._ring = _ring_views(self._shm, self.frames, channels)
+        self._header[0] = 0
+        self._read = 0
+        self._overflowed = False
+        self.level = 0.0
+        self.device_format = None
+        self.active = False
+        self.closed = False
+
+    def start(self) -> None:
+        try:
+            self.owner._cmd.send(
+                ("open", self._shm.name, self.samplerate, self.channels, self.frames, self.owner.native_capture)
+            )
+        except OSError:
+            self._died()
+        msg = self._wait_for(("ready", "error"), timeout=10.0)
+        if msg is None or msg[0] != "ready":
+            self._release()
+            reason = msg[1] if msg else ("timeout" if self.owner.alive else "process exited")
+            raise RuntimeError(f"capture process failed to open the input stream: {reason}")
+        self.device_format = msg[1:]
+        self.active = True
+
+    def _handle(self, msg) -> None:
+        if msg[0] == "chunk":
+            self.level = msg[2]
+            self._overflowed |= msg[3]
+        elif msg[0] == "error":
+            print(f"[audio] Capture process error: {msg[1]}")
+            self.active = False
+
+    def _recv(self):
+        """從 Pipe 取一則訊息；子行程已結束 (EOF) 時回傳 None。"""
+        try:
+            return self.owner._data.recv()
+        except (EOFError, OSError):
+            return None
+
+    def _died(self) -> None:
+        """子行程已結束：不會再有人寫入或放開共享記憶體，直接釋放並回報錯誤。"""
+        self.active = False
+        if not self.closed:
+            self._release()
+        raise RuntimeError("capture process exited")  # 與 start() 開不起來時相同的例外
+
+    def _wait_for(self, kinds, timeout: float):
+        deadline = time.monotonic() + timeout
+        data = self.owner._data
+        while time.monotonic() < deadline:
+            if data.poll(min(0.1, max(deadline - time.monotonic(), 0))):
+                msg = self._recv()
+                if msg is None:
+                    return None
+                self._handle(msg)
+                if msg[0] in kinds:
+                    return msg
+            elif not self.owner.alive:
+                return None
+        return None
+
+    def readinto(self, out: np.ndarray) -> bool:
+        """阻塞到環形緩衝區累積 len(out) 個 frame；主行程落後超過緩衝區長度時丟掉最舊的並回報 overflow。"""
+        n = out.shape[0]
+        data = self.owner._data
+        while True:
+            if not self.active:
+                raise RuntimeError("stream is not active")
+            written = int(self._header[0])
+            if written - self._read >= n:
+                break
+            if data.poll(0.2):
+                msg = self._recv()
+                if msg is None:
+                    self._died()
+                self._handle(msg)
+            elif not self.owner.alive:
+                self._died()
+        while data.poll():
+            msg = self._recv()
+            if msg is None:
+                break  # 子行程剛結束：這次的資料已在環形緩衝區裡，下一次讀取再回報
+            self._handle(msg)
+
+        overflowed, self._overflowed = self._overflowed, False
+        if written - self._read > self.frames - n:
+            self._read = written - n
+            overflowed = True
+        pos = self._read % self.frames
+        first = min(n, self.frames - pos)
+        out[:first] = self._ring[pos:pos + first]
+        out[first:] = self._ring[:n - first]
+        self._read += n
+        return overflowed
+
+    def read(self, frames: int):
+        out = np.empty((frames, self.channels), dtype=np.int16)
+        overflowed = self.readinto(out)
+        return out, overflowed
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        try:
+            self.owner._cmd.send(("close",))
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        self.stop()
+        if not self.closed:
+            # 等子行程放開共享記憶體後再 unlink
+            self._wait_for(("closed",), timeout=1.0)
+            self._release()
+
+    def _release(self) -> None:
+        self.closed = True
+        self._header = self._ring = None
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except Exception:
+            pass
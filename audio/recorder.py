@@ -1,15 +1,154 @@
 import threading
+import time
 import numpy as np
-import sounddevice as sd
-import io
-import wave
-from typing import Callable, Optional
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from audio.buffer import AudioBuffer, PCMArena, recording_path, rms_level
+from audio.resample import PolyphaseResampler, mix_channels
+from audio.vad import EnergyVAD, merge_regions
+
+
+def _open_device_stream(samplerate: int, channels: int):
+    # sounddevice 延遲匯入：沒有 PortAudio 的環境 (Linux CI) 也能用假串流測試錄音器
+    import sounddevice as sd
+    return sd.InputStream(samplerate=samplerate, channels=channels, dtype="int16")
+
+
+# Pa_ReadStream 直寫路徑用到 sounddevice 的內部介面 (_lib / _ffi / stream._ptr)，
+# 只在驗證過的版本啟用；其他版本或介面不符時一律走公開的 stream.read()
+_PA_READ_VERSIONS = ((0, 4), (0, 5))
+_pa_reader = None   # None：尚未檢查；False：不可用
+
+
+def _portaudio_reader():
+    """回傳 reader(stream, out) -> overflowed，讓 PortAudio 直接寫進 out；不可用時回傳 False。"""
+    global _pa_reader
+    if _pa_reader is not None:
+        return _pa_reader
+    _pa_reader = False
+    try:
+        import sounddevice as sd
+        if tuple(int(x) for x in sd.__version__.split(".")[:2]) not in _PA_READ_VERSIONS:
+            return False
+        lib, ffi = sd._lib, sd._ffi
+        read, overflowed = lib.Pa_ReadStream, lib.paInputOverflowed
+    except Exception:
+        return False
+
+    def reader(stream, out: np.ndarray) -> bool:
+        err = read(stream._ptr, ffi.from_buffer(out), out.shape[0])
+        if err == overflowed:
+            return True
+        if err:
+            raise sd.PortAudioError(f"Pa_ReadStream failed with error {err}")
+        return False
+
+    _pa_reader = reader
+    return reader
+
+
+def _device_native_format() -> Optional[Tuple[int, int]]:
+    """預設輸入裝置的原生取樣率與聲道數 (最多取 2 聲道)；查不到時回傳 None。"""
+    try:
+        import sounddevice as sd
+        info = sd.query_devices(kind="input")
+        return int(info["default_samplerate"]), max(1, min(int(info["max_input_channels"]), 2))
+    except Exception:
+        return None
+
+
+class CaptureStats:
+    """
+    Per-session capture statistics: read overflows, inter-chunk jitter,
+    level-callback rate and how long stop() waited for the poll thread.
+    Interval variance is accumulated online (Welford), so nothing grows
+    with the length of the recording.
+    """
+
+    def __init__(self):
+        self.chunks = 0
+        self.overflows = 0
+        self.level_callbacks = 0
+        self.max_gap = 0.0          # 兩次 read 回傳之間最長的間隔 (秒)
+        self.stop_join_sec: Optional[float] = None
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def on_chunk(self, now: float, overflowed: bool) -> None:
+        self.chunks += 1
+        if overflowed:
+            self.overflows += 1
+        if self._last is not None:
+            gap = now - self._last
+            self.max_gap = max(self.max_gap, gap)
+            n = self.chunks - 1
+            delta = gap - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (gap - self._mean)
+        else:
+            self._first = now
+        self._last = now
+
+    @property
+    def jitter(self) -> float:
+        """區塊間隔的標準差 (秒)。"""
+        n = self.chunks - 1
+        return (self._m2 / n) ** 0.5 if n > 1 else 0.0
+
+    @property
+    def level_rate(self) -> float:
+        """每秒呼叫 level_callback 的次數。"""
+        span = (self._last or 0.0) - (self._first or 0.0)
+        return (self.level_callbacks - 1) / span if span > 0 and self.level_callbacks > 1 else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "overflows": self.overflows,
+            "mean_interval_ms": round(self._mean * 1000, 2),
+            "jitter_ms": round(self.jitter * 1000, 2),
+            "max_gap_ms": round(self.max_gap * 1000, 2),
+            "level_rate_hz": round(self.level_rate, 1),
+            "stop_join_ms": None if self.stop_join_sec is None else round(self.stop_join_sec * 1000, 2),
+        }
 
 
 class AudioRecorder:
     """
     Records audio from the default microphone.
     Provides real-time RMS level via callback for UI visualization.
+    Samples are read straight into a preallocated PCMArena; stop() returns
+    an AudioBuffer wrapping a zero-copy int16 view of the session.
+    With vad_enabled, speech regions are tracked as chunks arrive and the
+    returned buffer is trimmed to them (leading / trailing silence removed).
+
+    Warm mode keeps the input stream open between sessions and always holds
+    the last preroll_ms of audio, which start() prepends so the first
+    syllable is never clipped. The stream closes after idle_timeout seconds
+    without a recording.
+
+    With a segment_callback set, every time a pause closes a speech region
+    (VAD on) and at least segment_min_sec has accumulated, the audio up to
+    that pause is handed to the callback while recording continues; with
+    or without VAD, segment_max_sec without a pause forces a cut. stop()
+    then returns only the tail that was not handed out yet.
+    bounded=True copies each segment out and frees it from the arena, so
+    memory stays flat for continuous dictation of any length.
+
+    With spill_dir set, a session that grows past spill_mb of PCM continues
+    in a memory-mapped file under spill_dir (see PCMArena); the returned
+    buffer carries spill_path so the caller can release or keep it.
+
+    native_capture opens the device at its own rate / channel count (e.g.
+    48 kHz stereo) and converts each block to samplerate / channels with a
+    PolyphaseResampler, instead of letting CoreAudio resample implicitly.
+    capture_format overrides the device query; a stream_factory with a
+    native_format() method (audio.sources.InputSource) supplies it too.
+
+    stats holds the CaptureStats of the current / last session.
     """
 
     def __init__(
@@ -17,85 +156,382 @@ class AudioRecorder:
         samplerate: int = 16000,
         channels: int = 1,
         level_callback: Optional[Callable[[float], None]] = None,
+        initial_seconds: float = 30.0,
+        vad_enabled: bool = True,
+        trim_pad: float = 0.2,
+        warm: bool = False,
+        preroll_ms: int = 300,
+        idle_timeout: float = 300.0,
+        stream_factory: Optional[Callable[[int, int], object]] = None,
+        segment_callback: Optional[Callable[[AudioBuffer], None]] = None,
+        segment_min_sec: float = 3.0,
+        segment_max_sec: float = 30.0,
+        bounded: bool = False,
+        spill_mb: float = 0,
+        spill_dir: Optional[Path] = None,
+        native_capture: bool = True,
+        capture_format: Optional[Callable[[], Tuple[int, int]]] = None,
     ):
         self.samplerate = samplerate
         self.channels = channels
         self.level_callback = level_callback
+        self.initial_seconds = initial_seconds
+        self.vad_enabled = vad_enabled
+        self.trim_pad = trim_pad
+        self.warm = warm
+        self.idle_timeout = idle_timeout
+        self.stream_factory = stream_factory or _open_device_stream
+        self.native_capture = native_capture
+        self.capture_format = capture_format or getattr(stream_factory, "native_format", None)
+        self.stats = CaptureStats()
+        self._resampler: Optional[PolyphaseResampler] = None
+        self._dev_scratch: Optional[np.ndarray] = None
+        self.segment_callback = segment_callback
+        self.segment_min_sec = segment_min_sec
+        self.segment_max_sec = segment_max_sec
+        self.bounded = bounded
+        self.spill_mb = spill_mb
+        self.spill_dir = spill_dir
+        self._seg_cursor = 0        # 已交給 segment_callback 的 sample 數
+        self._seg_last_end = 0
+        self._vad: Optional[EnergyVAD] = None
         self._recording = False
-        self._frames: list[np.ndarray] = []
+        self._arena = PCMArena(channels, int(samplerate * initial_seconds))
         self._lock = threading.Lock()
-        self._stream: Optional[sd.InputStream] = None
+        self._stream = None
+        self._poll_thread: Optional[threading.Thread] = None
+
+        self._chunk = int(samplerate * 0.05)  # 每次讀取 0.05 秒 (16kHz * 0.05 = 800 frames)
+        self._scratch = np.empty((self._chunk, channels), dtype=np.int16)
+        self._rms_scratch = np.empty(2 * self._chunk * channels, dtype=np.float32)  # 轉取樣後的區塊可能略長
+        self.set_preroll(preroll_ms)
+        self._last_active = time.monotonic()
+
+        # 延遲量測：按下快捷鍵到第一個 sample 進入 arena 的時間 (秒)；
+        # warm 模式則是到按鍵後第一個區塊寫入 arena，pre-roll 涵蓋的秒數另外記在 last_preroll
+        self._pressed_at: Optional[float] = None
+        self._warm_start = False
+        self.last_start_latency: Optional[float] = None
+        self.last_preroll = 0.0
+
+    def set_stream_factory(self, stream_factory=None) -> None:
+        """更換輸入來源 (None = 預設麥克風)；目前開著的串流會先關閉。"""
+        self.close()
+        self.stream_factory = stream_factory or _open_device_stream
+        self.capture_format = getattr(stream_factory, "native_format", None)
+
+    def set_preroll(self, preroll_ms: int) -> None:
+        with self._lock:
+            self.preroll_ms = preroll_ms
+            self._preroll = np.zeros((int(self.samplerate * preroll_ms / 1000), self.channels), dtype=np.int16)
+            self._preroll_pos = 0
+            self._preroll_filled = 0
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    @property
+    def standby(self) -> bool:
+        """Warm 串流是否開著 (不論是否正在錄音)。"""
+        return self._stream is not None and self._poll_thread is not None and self._poll_thread.is_alive()
 
-    def start(self) -> None:
-        """Start recording audio."""
+    def open_standby(self) -> None:
+        """Warm 模式下預先開啟串流，開始累積 pre-roll。"""
+        if not self.warm or self.standby:
+            return
+        self._last_active = time.monotonic()
+        self._open_stream()
+
+    def start(self, pressed_at: Optional[float] = None) -> None:
+        """Start recording audio. pressed_at is the time.perf_counter() of the key press."""
         with self._lock:
             if self._recording:
                 return
-            self._frames = []
+            self._pressed_at = pressed_at if pressed_at is not None else time.perf_counter()
+            self.last_start_latency = None
+            self.last_preroll = 0.0
+            # 上一段的 view 可能仍在 STT 執行緒中使用，因此每段錄音使用新的 arena
+            self._arena = self._new_arena()
+            self.stats = CaptureStats()
+            self._vad = EnergyVAD(self.samplerate) if self.vad_enabled else None
+            self._seg_cursor = 0
+            self._seg_last_end = 0
+            warm_ready = self._warm_start = self.warm and self.standby
+            if warm_ready:
+                # 串流早已在跑：把 pre-roll 接在最前面，等於從按鍵前就開始錄音
+                self.last_preroll = self._drain_preroll() / self.samplerate
             self._recording = True
 
-        self._stream = sd.InputStream(
-            samplerate=self.samplerate,
-            channels=self.channels,
-            dtype="int16",
-        )
+        if not warm_ready:
+            self._open_stream()
+
+    def _new_arena(self) -> PCMArena:
+        capacity = int(self.samplerate * self.initial_seconds)
+        if not self.spill_dir or self.spill_mb <= 0:
+            return PCMArena(self.channels, capacity)
+        spill_frames = int(self.spill_mb * 1024 * 1024 / (2 * self.channels))
+        now = time.time()
+        # 毫秒也放進檔名：連續兩段錄音不會覆寫到仍在辨識中的上一個檔案
+        ts = time.strftime("%Y%m%d_%H%M%S", time.localtime(now)) + f"_{int(now * 1000) % 1000:03d}"
+        path = recording_path(self.spill_dir, self.samplerate, self.channels, ts)
+        return PCMArena(self.channels, min(capacity, spill_frames), spill_frames, path)
+
+    def _device_format(self) -> Tuple[int, int]:
+        fmt = None
+        if self.capture_format is not None:
+            fmt = self.capture_format()
+        elif self.native_capture and self.stream_factory is _open_device_stream:
+            fmt = _device_native_format()
+        return fmt or (self.samplerate, self.channels)
+
+    def _open_stream(self) -> None:
+        rate, channels = self._device_format()
+        if (rate, channels) != (self.samplerate, self.channels):
+            # 裝置格式與目標不同：讀進暫存區，混音 + 轉取樣率後才寫入 arena
+            self._resampler = PolyphaseResampler(rate, self.samplerate, self.channels)
+            self._dev_scratch = np.empty((int(rate * 0.05), channels), dtype=np.int16)
+            print(f"[audio] Capturing at {rate} Hz x {channels}ch, resampling to {self.samplerate} Hz")
+        else:
+            self._resampler = None
+            self._dev_scratch = None
+        self._stream = self.stream_factory(rate, channels)
         self._stream.start()
-        
+
         self._poll_thread = threading.Thread(target=self._poll_audio, daemon=True)
         self._poll_thread.start()
 
+    def _drain_preroll(self) -> int:
+        """把 pre-roll 寫進 arena，回傳寫入的 frame 數。"""
+        n = self._preroll_filled
+        if n:
+            size = len(self._preroll)
+            idx = (self._preroll_pos - n + np.arange(n)) % size
+            pre = self._preroll[idx]
+            self._arena.write(pre)
+            if self._vad:
+                self._vad.process(pre)
+        self._preroll_pos = 0
+        self._preroll_filled = 0
+        return n
+
+    def _push_preroll(self, chunk: np.ndarray) -> None:
+        size = len(self._preroll)
+        if size == 0:
+            return
+        chunk = chunk[-size:]
+        n = len(chunk)
+        idx = (self._preroll_pos + np.arange(n)) % size
+        self._preroll[idx] = chunk
+        self._preroll_pos = (self._preroll_pos + n) % size
+        self._preroll_filled = min(self._preroll_filled + n, size)
+
     def _poll_audio(self) -> None:
-        while self._recording and self._stream:
+        stream = self._stream
+        resampler, dev_scratch = self._resampler, self._dev_scratch
+        while stream is not None and stream is self._stream:
             try:
-                # 每次讀取 0.05 秒的區塊 (16kHz * 0.05 = 800 frames)
-                frames_to_read = int(self.samplerate * 0.05)
                 # Ensure we only try to read if stream is active and we are still recording
-                if not self._stream or not self._stream.active:
+                if not stream.active:
                     break
-                    
-                indata, overflowed = self._stream.read(frames_to_read)
-                
+
                 with self._lock:
-                    if not self._recording:
+                    recording = self._recording
+                    if not recording and not self.warm:
                         break
-                    self._frames.append(indata.copy())
-                
+                    if not recording and time.monotonic() - self._last_active > self.idle_timeout:
+                        # Warm 模式閒置過久：釋放麥克風
+                        self._stream = None
+                        break
+                    # 錄音中直接讀進 arena 的保留區塊；待命時讀進暫存區再推入 pre-roll
+                    arena = self._arena
+                    direct = recording and resampler is None
+                    if resampler is not None:
+                        out = dev_scratch
+                    else:
+                        out = arena.reserve(self._chunk) if recording else self._scratch
+
+                overflowed = self._read_into(stream, out)
+                read_at = time.perf_counter()
+                if resampler is not None:
+                    # 轉換在鎖外進行，不會擋住 start() / stop()
+                    out = resampler.process(mix_channels(out, self.channels))
+
+                with self._lock:
+                    if direct and self._recording and arena is self._arena:
+                        self._arena.commit(self._chunk)
+                        chunk = out
+                    elif self._recording:
+                        # 需要轉換的區塊，或讀取途中剛好按下快捷鍵：這一塊也屬於本段錄音
+                        self._arena.write(out)
+                        chunk = self._arena.view(self._arena.frames - len(out))
+                    else:
+                        self._push_preroll(out)
+                        continue
+                    stats = self.stats
+                    stats.on_chunk(read_at, bool(overflowed))
+                    if self.last_start_latency is None and self._pressed_at is not None:
+                        if self._warm_start:
+                            # warm：按鍵前的聲音由 pre-roll 補上，這裡量的是按鍵後的音訊多久才進到 arena
+                            self.last_start_latency = time.perf_counter() - self._pressed_at
+                        else:
+                            # 這個區塊的第一個 sample 大約在 read 回傳前一個區塊長度被擷取
+                            first_sample = time.perf_counter() - self._chunk / self.samplerate
+                            self.last_start_latency = max(first_sample - self._pressed_at, 0.0)
+                    segment = None
+                    if self._vad:
+                        self._vad.process(chunk)
+                    if self.segment_callback:
+                        segment = self._cut_segment()
+
+                if segment is not None:
+                    self.segment_callback(segment)
+
                 # 計算音量 RMS (0.0 ~ 1.0) 回傳給 UI
                 if self.level_callback:
-                    rms = float(np.sqrt(np.mean(indata.astype(np.float32) ** 2))) / 32768.0
-                    self.level_callback(min(rms * 10, 1.0))
+                    stats.level_callbacks += 1
+                    # 擷取子行程已算好音量時直接使用，省掉主行程的一次 RMS
+                    level = getattr(stream, "level", None)
+                    if level is None:
+                        level = rms_level(chunk, self._rms_scratch)
+                    self.level_callback(min(level * 10, 1.0))
 
             except Exception as e:
                 # 當串流被外界中止或關閉，將引發例外中斷讀取
                 break
 
-    def stop(self) -> bytes:
-        """Stop recording and return WAV bytes."""
+        if stream is not None and self._stream is None and not self._recording:
+            # 閒置逾時由輪詢執行緒自己關閉串流
+            self._close(stream)
+
+    @staticmethod
+    def _read_into(stream, out: np.ndarray) -> bool:
+        """
+        讓 PortAudio 直接把資料寫進 arena 的保留區塊 (與 sd.InputStream.read
+        走同一個 Pa_ReadStream，只是省掉每個區塊的暫存陣列)。回傳是否 overflow。
+        直寫路徑依賴 sounddevice 內部介面 (見 _portaudio_reader)；不可用或出現
+        非 PortAudio 的例外時改用公開的 stream.read() + np.copyto，之後不再嘗試。
+        """
+        global _pa_reader
+        readinto = getattr(stream, "readinto", None)
+        if readinto is not None:
+            return readinto(out)
+        reader = _portaudio_reader() if hasattr(stream, "_ptr") else False
+        if reader:
+            try:
+                return reader(stream, out)
+            except Exception as e:
+                import sounddevice as sd
+                if isinstance(e, sd.PortAudioError):
+                    raise
+                print(f"[audio] Direct PortAudio read unavailable ({e!r}), using stream.read()")
+                _pa_reader = False
+        indata, overflowed = stream.read(out.shape[0])
+        np.copyto(out, indata)
+        return overflowed
+
+    def stop(self) -> AudioBuffer:
+        """Stop recording and return the captured PCM (no WAV container)."""
+        stopping = time.perf_counter()
         with self._lock:
             self._recording = False
-            
-        if hasattr(self, '_poll_thread') and self._poll_thread.is_alive():
+            self._last_active = time.monotonic()
+            if self.warm and self._stream is not None:
+                # Warm 模式：串流保持開啟，繼續累積 pre-roll
+                self.stats.stop_join_sec = 0.0
+                return self._slice(self._seg_cursor, self._arena.frames)
+
+        if self._poll_thread is not None and self._poll_thread.is_alive():
             # Wait safely for the blocking read to finish (at most 0.1 ~ 0.2s) before closing the stream
             self._poll_thread.join(timeout=0.5)
 
-        if self._stream:
-            try:
-                self._stream.stop()
-                self._stream.close()
-            except Exception:
-                pass
-            self._stream = None
-
-        return self._to_wav_bytes()
-
-    def _to_wav_bytes(self) -> bytes:
-        if not self._frames:
-            return b""
-        audio = np.concatenate(self._frames, axis=0)
-        buf = io.BytesIO()
-        with wave.open(buf, "wb") as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(2)  # int16 = 2 bytes
-            wf.setframerate(self.samplerate)
-            wf.writeframes(audio.tobytes())
-        return buf.getvalue()
+        stream, self._stream = self._stream, None
+        self._close(stream)
+        self.stats.stop_join_sec = time.perf_counter() - stopping
+
+        with self._lock:
+            return self._slice(self._seg_cursor, self._arena.frames)
+
+    def close(self) -> None:
+        """關閉 warm 串流 (離開程式或切換設定時呼叫)。"""
+        with self._lock:
+            self._recording = False
+            stream, self._stream = self._stream, None
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            self._poll_thread.join(timeout=0.5)
+        self._close(stream)
+
+    @staticmethod
+    def _close(stream) -> None:
+        if stream is None:
+            return
+        try:
+            stream.stop()
+            stream.close()
+        except Exception:
+            pass
+
+    def _cut_segment(self) -> Optional[AudioBuffer]:
+        """
+        VAD 剛結束一個語音區段時，把停頓之前累積的音訊切成一段；一直沒有停頓
+        (或沒開 VAD) 時，累積到 segment_max_sec 就強制切。呼叫端需持有 _lock。
+        """
+        frames = self._arena.frames
+        regions = self._vad.regions if self._vad else []
+        cut = None
+        if regions and regions[-1][1] > self._seg_last_end:
+            self._seg_last_end = regions[-1][1]
+            # 切點落在停頓中 (區段結尾 + trim_pad)，不會切到字
+            cut = min(regions[-1][1] + int(self.samplerate * self.trim_pad), frames)
+            if cut - self._seg_cursor < self.segment_min_sec * self.samplerate:
+                cut = None
+        if cut is None and frames - self._seg_cursor >= self.segment_max_sec * self.samplerate:
+            cut = frames
+        if cut is None:
+            return None
+
+        segment = self._slice(self._seg_cursor, cut)
+        segment.spill_path = None  # 溢寫檔屬於整段錄音，由 stop() 回傳的 buffer 負責釋放
+        self._seg_cursor = cut
+        if self.bounded:
+            # 長時間錄音：段落複製出去後即可回收 arena 與 VAD 的舊資料
+            segment.pcm = segment.pcm.copy()
+            self._arena.discard(cut)
+            if self._vad:
+                self._vad.discard(cut)
+        return segment
+
+    def _slice(self, start: int, end: int) -> AudioBuffer:
+        """
+        取出 arena[start:end]，依 VAD 結果裁掉頭尾靜音；完全沒有語音時
+        回傳空的 AudioBuffer。呼叫端需持有 _lock。
+        """
+        pcm = self._arena.view(start, end)
+        spill_path = self._arena.spill_path if self._arena.spilled else None
+        if spill_path is not None:
+            self._arena.sync()  # 保留的錄音檔要能精確截到最後一個 frame
+        if self._vad is None:
+            buf = AudioBuffer(pcm, self.samplerate, self.channels)
+            buf.spill_path = spill_path
+            return buf
+        regions = [
+            (max(s, start) - start, min(e, end) - start)
+            for s, e in self._vad.speech_regions(end)
+            if e > start and s < end
+        ]
+
+        if not regions:
+            buf = AudioBuffer(pcm[:0], self.samplerate, self.channels, speech_regions=[])
+            buf.source_range = (start, end)
+            buf.spill_path = spill_path
+            return buf
+
+        total = len(pcm)
+        pad = int(self.samplerate * self.trim_pad)
+        padded = merge_regions([(max(s - pad, 0), min(e + pad, total)) for s, e in regions], 1)
+        first, last = padded[0][0], padded[-1][1]
+        shifted = [(s - first, e - first) for s, e in padded]
+        buf = AudioBuffer(pcm[first:last], self.samplerate, self.channels, speech_regions=shifted)
+        buf.source_range = (start, end)
+        buf.spill_path = spill_path
+        return buf
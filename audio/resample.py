@@ -0,0 +1,98 @@
+"""
+錄音端的聲道混音與取樣率轉換。
+
+裝置以原生格式 (例如 48 kHz 雙聲道) 開啟，區塊進來後先混成目標聲道數，
+再用有狀態的多相 (polyphase) FIR 轉成 16 kHz。濾波器歷史在區塊之間保留，
+所以 50ms 區塊接起來與一次處理整段的結果相同，邊界不會有爆音。
+"""
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def mix_channels(block: np.ndarray, channels: int) -> np.ndarray:
+    """int16 (frames x device_channels) → float32 (frames x channels)。多於目標的聲道取平均 (單聲道) 或捨去。"""
+    if block.shape[1] == channels:
+        return block.astype(np.float32)
+    if channels == 1:
+        return block.mean(axis=1, dtype=np.float32, keepdims=True)
+    return block[:, :channels].astype(np.float32)
+
+
+def design_lowpass(up: int, down: int, half_width: int = 10, beta: float = 5.0) -> np.ndarray:
+    """
+    Kaiser 窗 sinc 低通濾波器 (與 scipy.signal.resample_poly 預設相同的設計)，
+    在 up 倍的升頻域中截止於 min(輸入, 輸出) 的 Nyquist，增益乘上 up。
+    """
+    max_rate = max(up, down)
+    half_len = half_width * max_rate
+    n = np.arange(2 * half_len + 1) - half_len
+    cutoff = 1.0 / max_rate  # 以升頻後的 Nyquist 為 1
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(2 * half_len + 1, beta)
+    return h * (up / h.sum())
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (in_rate → out_rate) for (frames x channels) blocks.
+    The prototype filter is split into `up` phases, so each output sample costs
+    one K-tap dot product instead of filtering the zero-stuffed signal; a whole
+    block is computed at once with sliding_window_view + einsum.
+    The filter's group delay is compensated, so output sample n lines up with
+    input time n / out_rate.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, half_width: int = 10, beta: float = 5.0):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = out_rate // g
+        self.down = in_rate // g
+
+        proto = design_lowpass(self.up, self.down, half_width, beta)
+        self.taps = -(-len(proto) // self.up)  # 每個 phase 的 tap 數 K
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(proto)] = proto
+        # phases[p, k] = proto[p + k * up]；反轉 k 之後可直接與遞增順序的輸入視窗做內積
+        self._phases = padded.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32).copy()
+        self._delay = (len(proto) - 1) // 2 // self.down  # 以輸出 sample 計的群延遲
+        self.reset()
+
+    def reset(self) -> None:
+        self._history = np.zeros((self.taps - 1, self.channels), dtype=np.float32)
+        self._in_pos = 0     # 已消耗的輸入 sample 數
+        self._out_pos = 0    # 下一個輸出 sample 的編號
+        self._skip = self._delay
+
+    def output_frames(self, n_in: int) -> int:
+        """再餵入 n_in 個輸入 sample 後會產生的輸出 sample 數 (尚未扣除延遲補償)。"""
+        total = self._in_pos + n_in
+        return -(-total * self.up // self.down) - self._out_pos
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """float32 (frames x channels) → int16 (frames' x channels)。"""
+        if block.ndim == 1:
+            block = block[:, None]
+        ext = np.concatenate((self._history, block.astype(np.float32, copy=False)))
+        total = self._in_pos + len(block)
+        end = -(-total * self.up // self.down)
+
+        n = np.arange(self._out_pos, end)
+        q = n * self.down // self.up           # 每個輸出對應的最新輸入 sample
+        phase = (n * self.down) % self.up
+        windows = sliding_window_view(ext, self.taps, axis=0)  # (T-K+1, C, K)，不複製
+        y = np.einsum("nck,nk->nc", windows[q - self._in_pos], self._phases[phase])
+
+        self._history = ext[len(ext) - (self.taps - 1):].copy()
+        self._in_pos = total
+        self._out_pos = end
+        if self._skip:
+            drop = min(self._skip, len(y))
+            y = y[drop:]
+            self._skip -= drop
+
+        np.rint(y, out=y)
+        np.clip(y, -32768, 32767, out=y)
+        return y.astype(np.int16)
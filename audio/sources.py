@@ -0,0 +1,183 @@
+"""
+不需要麥克風的輸入串流，介面與 sounddevice.InputStream 相同 (start / stop /
+close / active / read)，另外提供 readinto() 讓 AudioRecorder 直接寫入 arena。
+用法：AudioRecorder(stream_factory=lambda sr, ch: SyntheticInputStream(signal, sr, ch))
+
+InputSource 把「開串流的方式」與「來源的原生格式」包在一起，可直接當作
+AudioRecorder 的 stream_factory：DeviceSource (麥克風)、SignalSource (陣列或
+WAV 檔，可即時或加速播放)。
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class SyntheticInputStream:
+    """
+    Replays an int16 signal as if it came from a microphone.
+    realtime=True paces reads against the wall clock like a real device;
+    start_delay simulates the device start-up cost measured on CoreAudio.
+    After the signal ends, silence is returned (loop=False) or it restarts.
+    speed > 1 replays faster than real time (pacing and overflow detection
+    scale with it). Like PortAudio, if the reader falls more than
+    buffer_sec behind the device clock the missed audio is dropped and the
+    read reports overflowed=True.
+    """
+
+    def __init__(
+        self,
+        signal: np.ndarray,
+        samplerate: int = 16000,
+        channels: int = 1,
+        realtime: bool = True,
+        start_delay: float = 0.0,
+        loop: bool = False,
+        speed: float = 1.0,
+        buffer_sec: float = 0.2,
+    ):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.realtime = realtime
+        self.speed = speed
+        self.buffer_sec = buffer_sec
+        self.start_delay = start_delay
+        self.loop = loop
+        self._signal = np.asarray(signal, dtype=np.int16).reshape(-1, channels)
+        self._pos = 0
+        self._t0: Optional[float] = None
+        self._delivered = 0
+        self.active = False
+        self.closed = False
+
+    def start(self) -> None:
+        if self.start_delay:
+            time.sleep(self.start_delay)
+        self._t0 = time.perf_counter()
+        self._delivered = 0
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    def close(self) -> None:
+        self.active = False
+        self.closed = True
+
+    def read(self, frames: int):
+        out = np.empty((frames, self.channels), dtype=np.int16)
+        overflowed = self.readinto(out)
+        return out, overflowed
+
+    def readinto(self, out: np.ndarray) -> bool:
+        if not self.active:
+            raise RuntimeError("stream is not active")
+        frames = out.shape[0]
+        overflowed = False
+        if self.realtime:
+            rate = self.samplerate * self.speed
+            now = time.perf_counter()
+            behind = (now - self._t0) * rate - self._delivered
+            if behind > self.buffer_sec * rate + frames:
+                # 讀太慢，裝置緩衝區已滿：較舊的音訊被丟掉，與 paInputOverflowed 相同
+                self._advance(int(behind - frames))
+                overflowed = True
+            due = self._t0 + (self._delivered + frames) / rate
+            wait = due - now
+            if wait > 0:
+                time.sleep(wait)
+
+        filled = 0
+        total = len(self._signal)
+        while filled < frames:
+            if self._pos >= total:
+                if not self.loop or total == 0:
+                    out[filled:] = 0
+                    break
+                self._pos = 0
+            n = min(frames - filled, total - self._pos)
+            out[filled:filled + n] = self._signal[self._pos:self._pos + n]
+            self._pos += n
+            filled += n
+        self._delivered += frames
+        return overflowed
+
+    def _advance(self, frames: int) -> None:
+        total = len(self._signal)
+        self._pos += frames
+        if self.loop and total:
+            self._pos %= total
+        self._delivered += frames
+
+
+class InputSource(ABC):
+    """
+    A stream factory that also knows its native format. Pass it as
+    AudioRecorder(stream_factory=source); the recorder opens it at
+    native_format() and converts to 16 kHz mono itself.
+    """
+
+    def native_format(self) -> Optional[Tuple[int, int]]:
+        return None
+
+    @abstractmethod
+    def __call__(self, samplerate: int, channels: int):
+        """以指定格式開啟串流 (介面同 sounddevice.InputStream)。"""
+
+
+class DeviceSource(InputSource):
+    """預設麥克風 (sounddevice)。"""
+
+    def native_format(self) -> Optional[Tuple[int, int]]:
+        from audio.recorder import _device_native_format
+        return _device_native_format()
+
+    def __call__(self, samplerate: int, channels: int):
+        from audio.recorder import _open_device_stream
+        return _open_device_stream(samplerate, channels)
+
+
+class SignalSource(InputSource):
+    """
+    Replays an int16 signal (frames x channels) recorded at samplerate,
+    in real time or `speed` times faster. Each open() starts a fresh stream.
+    """
+
+    def __init__(
+        self,
+        signal: np.ndarray,
+        samplerate: int = 16000,
+        realtime: bool = True,
+        speed: float = 1.0,
+        loop: bool = False,
+        start_delay: float = 0.0,
+    ):
+        self.signal = signal if signal.ndim == 2 else signal[:, None]
+        self.samplerate = samplerate
+        self.channels = self.signal.shape[1]
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.start_delay = start_delay
+        self.streams = []  # 開過的串流，供量測讀取統計
+
+    @classmethod
+    def from_wav(cls, path: str, **kwargs) -> "SignalSource":
+        from audio.buffer import AudioBuffer
+        with open(path, "rb") as f:
+            buf = AudioBuffer.from_wav_bytes(f.read())
+        return cls(buf.pcm, buf.samplerate, **kwargs)
+
+    def native_format(self) -> Optional[Tuple[int, int]]:
+        return self.samplerate, self.channels
+
+    def __call__(self, samplerate: int, channels: int):
+        if (samplerate, channels) != (self.samplerate, self.channels):
+            raise ValueError(f"source is {self.samplerate} Hz x {self.channels}ch, asked for {samplerate} x {channels}")
+        stream = SyntheticInputStream(
+            self.signal, samplerate, channels,
+            realtime=self.realtime, start_delay=self.start_delay, loop=self.loop, speed=self.speed,
+        )
+        self.streams.append(stream)
+        return stream
@@ -0,0 +1,146 @@
+"""
+Streaming energy / zero-crossing voice activity detector.
+
+每個 50ms 區塊進來時以向量化方式切成 20ms frame 計算能量與過零率，
+再用一個小狀態機追蹤語音區段 (以 session 內的 sample offset 表示)。
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Region = Tuple[int, int]
+
+
+class EnergyVAD:
+    def __init__(
+        self,
+        samplerate: int = 16000,
+        frame_ms: int = 20,
+        min_speech_ms: int = 200,
+        hangover_ms: int = 300,
+        margin_db: float = 12.0,
+        abs_floor_db: float = -55.0,
+    ):
+        self.samplerate = samplerate
+        self.frame = int(samplerate * frame_ms / 1000)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.margin_db = margin_db
+        self.abs_floor_db = abs_floor_db
+        self.reset()
+
+    def reset(self) -> None:
+        self.regions: List[Region] = []
+        self._pos = 0                   # 已處理 (整 frame) 的 sample 數
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._noise_db: Optional[float] = None
+        self._start: Optional[int] = None   # 目前語音區段起點
+        self._voiced = 0                    # 目前區段內的有聲 frame 數
+        self._silence = 0                   # 目前區段尾端連續靜音 frame 數
+
+    @property
+    def is_speaking(self) -> bool:
+        return self._start is not None and self._voiced >= self.min_speech_frames
+
+    def process(self, chunk: np.ndarray) -> None:
+        """餵入一個 int16 區塊 (frames x channels 或 1-D)，只看第一聲道。"""
+        mono = chunk[:, 0] if chunk.ndim == 2 else chunk
+        if self._carry.size:
+            mono = np.concatenate((self._carry, mono))
+        n_frames = mono.size // self.frame
+        used = n_frames * self.frame
+        self._carry = mono[used:].copy()
+        if n_frames == 0:
+            return
+
+        frames = mono[:used].reshape(n_frames, self.frame)
+        energy = np.einsum("ij,ij->i", frames, frames, dtype=np.float64, casting="unsafe") / self.frame
+        energy_db = 10.0 * np.log10(energy / (32768.0 ** 2) + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(self.frame - 1)
+
+        if self._noise_db is None:
+            self._noise_db = float(np.min(energy_db))
+
+        for i in range(n_frames):
+            self._step(energy_db[i], zcr[i], self._pos + i * self.frame)
+        self._pos += used
+
+    def _step(self, db: float, zcr: float, offset: int) -> None:
+        high = max(self._noise_db + self.margin_db, self.abs_floor_db)
+        low = max(self._noise_db + self.margin_db / 2, self.abs_floor_db)
+        # 能量夠高，或中等能量且過零率落在摩擦音範圍 (ㄙ、ㄘ 等)
+        voiced = db > high or (db > low and 0.15 < zcr < 0.5)
+
+        if not voiced:
+            # 只用非語音 frame 追蹤背景噪音，往下快、往上慢
+            rate = 0.3 if db < self._noise_db else 0.02
+            self._noise_db += rate * (db - self._noise_db)
+
+        if self._start is None:
+            if voiced:
+                self._start, self._voiced, self._silence = offset, 1, 0
+            return
+
+        if voiced:
+            self._voiced += 1
+            self._silence = 0
+            return
+
+        self._silence += 1
+        if self._silence >= self.hangover_frames:
+            end = offset - (self._silence - 1) * self.frame
+            if self._voiced >= self.min_speech_frames:
+                self.regions.append((self._start, end))
+            self._start = None
+
+    def discard(self, before: int) -> None:
+        """丟掉 before 之前已結束的區段 (長時間錄音時避免清單無限成長)。"""
+        self.regions = [r for r in self.regions if r[1] > before]
+
+    def speech_regions(self, total: Optional[int] = None) -> List[Region]:
+        """目前為止的語音區段；仍在說話中的區段以 total (預設為已處理長度) 收尾。"""
+        regions = list(self.regions)
+        if self.is_speaking:
+            end = self._pos if total is None else total
+            regions.append((self._start, end - self._silence * self.frame))
+        return regions
+
+
+def merge_regions(regions: List[Region], max_gap: int) -> List[Region]:
+    """合併間隔小於 max_gap 個 sample 的區段，避免把句子切得太碎。"""
+    merged: List[Region] = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < max_gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def split_at_silences(regions: List[Region], total: int, target: int, max_len: int) -> List[Region]:
+    """
+    把 [0, total) 切成約 target 個 sample 的片段，切點落在語音區段之間停頓的中點；
+    單一區段長於 max_len 時才硬切。回傳的片段首尾相接、涵蓋整段。
+    """
+    cuts = [0]
+    previous = 0  # 上一個可切的停頓
+    mids = [(end + start) // 2 for (_, end), (start, _) in zip(regions, regions[1:])]
+    for mid in mids + [total]:
+        if mid - cuts[-1] > max_len and previous > cuts[-1]:
+            cuts.append(previous)  # 寧可片段短一點，也不要切在字中間
+        while mid - cuts[-1] > max_len:
+            cuts.append(cuts[-1] + max_len)
+        if mid - cuts[-1] >= target or mid == total:
+            cuts.append(mid)
+        previous = mid
+    if len(cuts) > 2 and total - cuts[-2] < target // 4 and total - cuts[-3] <= max_len:
+        cuts.pop(-2)  # 太短的尾巴併進前一片
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def detect_regions(pcm: np.ndarray, samplerate: int) -> List[Region]:
+    """對整段 int16 PCM 跑一次 EnergyVAD (錄音端沒有開 VAD 時用)。"""
+    vad = EnergyVAD(samplerate)
+    vad.process(pcm)
+    return vad.speech_regions(len(pcm))
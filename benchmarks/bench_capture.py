@@ -0,0 +1,131 @@
+"""
+AudioRecorder 擷取端量測 (不需要麥克風，可在 Linux CI 上執行)。
+
+以 SignalSource 重播 WAV 檔或合成訊號 (可加速)，跑完整的 start → 錄音 → stop，
+回報 CaptureStats：區塊間隔抖動、read overflow 次數、level callback 頻率、
+stop() 等待輪詢執行緒的時間，以及這段錄音造成的記憶體成長。
+
+用法：
+  python benchmarks/bench_capture.py [--wav speech.wav] [--seconds 30] [--speed 4]
+                                     [--format 48000x2] [--warm] [--level-cost-ms 0]
+                                     [--gil-load-ms 0] [--capture-process]
+--level-cost-ms 模擬很慢的 UI 音量回呼 (會拖慢輪詢，用來觀察 overflow)。
+--gil-load-ms   背景執行緒反覆執行持有 GIL 這麼久的 C 呼叫 (模擬辨識後處理 / Qt)。
+--capture-process 改由擷取子行程 (audio.capture_process) 讀取來源。
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from audio.recorder import AudioRecorder
+from audio.sources import SignalSource
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 回傳 bytes，Linux 回傳 KB
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _synthetic(seconds: float, rate: int, channels: int) -> np.ndarray:
+    """2.5 秒調變諧波 + 0.6 秒底噪交替，聲道間略有差異。"""
+    rng = np.random.default_rng(0)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    gate = (t % 3.1) < 2.5
+    mono = voiced * 6000 * gate + rng.standard_normal(n) * 40
+    return np.stack([mono * (1 - 0.1 * c) for c in range(channels)], axis=1).astype(np.int16)
+
+
+def _gil_hog(hold_ms: float, ready: threading.Event, stop: threading.Event) -> None:
+    """sorted() 對 float list 全程在 C 裡執行、不釋放 GIL；先校正出約 hold_ms 的大小。"""
+    data = [random.random() for _ in range(100_000)]
+    started = time.perf_counter()
+    sorted(data)
+    per_item = (time.perf_counter() - started) / len(data)
+    data = [random.random() for _ in range(int(hold_ms / 1000 / per_item))]
+    ready.set()
+    while not stop.is_set():
+        sorted(data)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--format", default="48000x2", help="合成訊號的裝置格式 (取樣率x聲道)")
+    parser.add_argument("--warm", action="store_true")
+    parser.add_argument("--level-cost-ms", type=float, default=0.0)
+    parser.add_argument("--gil-load-ms", type=float, default=0.0)
+    parser.add_argument("--capture-process", action="store_true")
+    args = parser.parse_args()
+
+    if args.wav:
+        source = SignalSource.from_wav(args.wav, speed=args.speed, loop=True)
+    else:
+        rate, channels = (int(x) for x in args.format.split("x"))
+        source = SignalSource(_synthetic(args.seconds, rate, channels), rate, speed=args.speed)
+
+    def on_level(level: float) -> None:
+        if args.level_cost_ms:
+            time.sleep(args.level_cost_ms / 1000)
+
+    proc = None
+    factory = source
+    if args.capture_process:
+        from audio.capture_process import CaptureProcess
+        proc = factory = CaptureProcess(factory=source)
+        proc.launch()
+
+    rec = AudioRecorder(level_callback=on_level, stream_factory=factory, warm=args.warm)
+    stop_load = threading.Event()
+    if args.gil_load_ms:
+        # 負載的資料在量測記憶體之前就建好，不算進錄音的記憶體成長
+        load_ready = threading.Event()
+        threading.Thread(target=_gil_hog, args=(args.gil_load_ms, load_ready, stop_load), daemon=True).start()
+        load_ready.wait()
+    tracemalloc.start()
+    rss_before = _peak_rss_mb()
+    if args.warm:
+        rec.open_standby()
+        time.sleep(0.5 / args.speed)
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    rec.start()
+    time.sleep(args.seconds / args.speed)
+    audio = rec.stop()
+    grown = tracemalloc.get_traced_memory()[0] - baseline
+    rec.close()
+    stop_load.set()
+    if proc is not None:
+        proc.shutdown()
+    tracemalloc.stop()
+
+    stats = rec.stats.summary()
+    expected_ms = rec._chunk / rec.samplerate * 1000 / args.speed
+    print(f"source           : {source.samplerate} Hz x {source.channels}ch, speed {args.speed}x, warm={args.warm}, "
+          f"capture process={args.capture_process}, GIL load={args.gil_load_ms:.0f} ms")
+    print(f"captured         : {len(rec._arena.view()) / rec.samplerate:.2f}s "
+          f"(kept after VAD trim: {audio.duration:.2f}s)")
+    print(f"chunks           : {stats['chunks']}  (interval {stats['mean_interval_ms']} ms, expected {expected_ms:.1f} ms)")
+    print(f"jitter / max gap : {stats['jitter_ms']} ms / {stats['max_gap_ms']} ms")
+    print(f"overflows        : {stats['overflows']}")
+    print(f"level callbacks  : {stats['level_rate_hz']} Hz")
+    print(f"stop() join      : {stats['stop_join_ms']} ms")
+    print(f"memory growth    : {grown / 1e6:.1f} MB traced, peak RSS {rss_before:.0f} → {_peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+對沖 STT (stt.hedge.HedgedSTT) 的尾端延遲量測，不需要網路或模型。
+
+主要引擎模擬雲端：固定延遲，偶爾卡住 stall 秒；備援模擬本機模型：RTF 固定。
+同一串錄音分別只送主要引擎、以及經過 HedgedSTT，比較 p50 / p95 / p99 延遲
+與實際送出備援請求的比例。
+
+用法：python benchmarks/bench_hedge.py [--count 60] [--seconds 3] [--stall-rate 0.1]
+                                       [--stall 4] [--percentile 85] [--scale 0.25]
+--scale 把所有模擬時間等比例縮短，讓量測跑快一點 (結果換算回原本的秒數)。
+對沖百分位數要低於 (1 - 卡住比例) 才會在卡住時送出備援：10% 卡住時 p95 本身就是
+卡住的延遲，對沖不會提早觸發。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from audio.buffer import AudioBuffer
+from stt.hedge import HedgedSTT
+from stt.stub import StubSTT
+
+
+def _percentiles(samples):
+    return [np.percentile(samples, p) for p in (50, 95, 99)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--seconds", type=float, default=3.0, help="每段錄音長度")
+    parser.add_argument("--latency", type=float, default=0.4, help="主要引擎的一般延遲")
+    parser.add_argument("--stall-rate", type=float, default=0.1)
+    parser.add_argument("--stall", type=float, default=4.0)
+    parser.add_argument("--local-rtf", type=float, default=0.3, help="備援引擎的 RTF")
+    parser.add_argument("--percentile", type=float, default=85)
+    parser.add_argument("--scale", type=float, default=0.25)
+    args = parser.parse_args()
+
+    k = args.scale
+    audio = AudioBuffer(np.full(int(16000 * args.seconds), 1000, dtype=np.int16))
+
+    def primary():
+        return StubSTT(latency=args.latency * k, stall_rate=args.stall_rate, stall_sec=args.stall * k,
+                       text="cloud", segment_sec=args.seconds, seed=1)
+
+    secondary = StubSTT(rtf=args.local_rtf * k, text="local", segment_sec=args.seconds)
+
+    rows = []
+    direct = primary()
+    plain = []
+    for _ in range(args.count):
+        started = time.perf_counter()
+        direct.transcribe(audio)
+        plain.append((time.perf_counter() - started) / k)
+    rows.append(("primary only", plain, 0))
+
+    hedged = HedgedSTT(primary(), secondary, "cloud", "local", percentile=args.percentile,
+                       default_delay=1.5 * k, min_delay=0.05 * k, max_delay=8.0 * k)
+    times, hedges, local_wins = [], 0, 0
+    for _ in range(args.count):
+        started = time.perf_counter()
+        hedged.transcribe(audio)
+        times.append((time.perf_counter() - started) / k)
+        hedges += hedged.last_hedged
+        local_wins += hedged.last_winner == "local"
+    rows.append(("hedged", times, hedges))
+
+    print(f"{args.count} utterances of {args.seconds:.1f}s, primary {args.latency:.2f}s "
+          f"(stall {args.stall_rate:.0%} x {args.stall:.1f}s), local RTF {args.local_rtf}, "
+          f"hedge at p{args.percentile:g} (now {hedged.hedge_delay() / k:.2f}s)")
+    print(f"{'':>14} {'p50':>7} {'p95':>7} {'p99':>7} {'hedged':>8}")
+    for name, samples, n in rows:
+        p50, p95, p99 = _percentiles(samples)
+        print(f"{name:>14} {p50:>6.2f}s {p95:>6.2f}s {p99:>6.2f}s {n / args.count:>7.0%}")
+    print(f"local won {local_wins} of {hedges} hedged requests")
+
+
+if __name__ == "__main__":
+    main()
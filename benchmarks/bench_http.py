@@ -0,0 +1,154 @@
+"""
+HTTP 連線重用量測：每次 httpx.post (每次新連線) 對比 transport.post (共用連線池)，
+以及每句話前先 transport.prewarm (模擬錄音期間預先連線) 的冷啟動請求。
+
+在本機起一個假的 LLM 伺服器 (HTTP/1.1 keep-alive)，--rtt 模擬網路往返延遲
+(每個新連線多付一次 TCP 往返，TLS 再多一次)，--tls 時用 openssl 產生自簽憑證。
+每次請求的額外開銷 = 總時間 - 伺服器處理時間。
+
+用法：python benchmarks/bench_http.py [--requests 20] [--rtt 0.03] [--tls]
+"""
+import argparse
+import json
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+import transport
+
+REPLY = json.dumps({"choices": [{"message": {"content": "好的。"}}]}).encode()
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 才會保持連線
+    disable_nagle_algorithm = True  # 避免 Nagle + delayed ACK 的 40 ms 混進量測
+    rtt = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+        # 新連線：TCP 握手 (TLS 時 ssl 握手在 accept 後也算一次往返)
+        time.sleep(self.rtt * (2 if isinstance(self.connection, ssl.SSLSocket) else 1))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.rtt)  # request / response 本身的往返
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def do_HEAD(self):
+        # prewarm 打的是根路徑：和真的 API 一樣回 404，但保持連線
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed(directory: str):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _serve(tls: bool, directory: str):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockLLMHandler)
+    scheme = "http"
+    cert = None
+    if tls:
+        cert, key = _self_signed(directory)
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert, key)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://localhost:{server.server_address[1]}/v1/chat/completions", cert
+
+
+def _run(label: str, call, n: int):
+    _MockLLMHandler.connections = 0
+    times = []
+    for _ in range(n):
+        started = time.perf_counter()
+        call().raise_for_status()
+        times.append(time.perf_counter() - started)
+    overhead = [t - _MockLLMHandler.rtt for t in times]
+    print(f"{label:<22} mean {statistics.mean(times) * 1000:7.1f} ms   "
+          f"overhead {statistics.mean(overhead) * 1000:6.1f} ms   "
+          f"first {times[0] * 1000:6.1f} ms   connections {_MockLLMHandler.connections}")
+    return statistics.mean(times)
+
+
+def _pool(url: str, cert):
+    """重設共用連線池；自簽憑證時換成信任它的 client (共用池預設用系統憑證)。"""
+    transport.close_all()
+    if cert:
+        transport._clients[transport.origin(url)] = httpx.Client(
+            verify=cert, timeout=transport.TIMEOUT, limits=transport.LIMITS)
+
+
+def _run_prewarmed(url: str, cert, payload: dict, n: int, recording: float):
+    """每句話都從冷的連線池開始：錄音開始時 prewarm，recording 秒後才送出請求。"""
+    _MockLLMHandler.connections = 0
+    times, handshakes = [], []
+    for _ in range(n):
+        _pool(url, cert)
+        transport.prewarm([url])
+        time.sleep(recording)
+        started = time.perf_counter()
+        transport.post(url, json=payload).raise_for_status()
+        times.append(time.perf_counter() - started)
+        handshakes.append(sum(transport.take_handshakes().values()))
+    print(f"{'prewarm + post (cold)':<22} mean {statistics.mean(times) * 1000:7.1f} ms   "
+          f"overhead {(statistics.mean(times) - _MockLLMHandler.rtt) * 1000:6.1f} ms   "
+          f"handshake while recording {statistics.mean(handshakes) * 1000:.1f} ms   "
+          f"connections {_MockLLMHandler.connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request HTTP overhead: fresh vs pooled connections")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.03, help="simulated network round trip (seconds)")
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS with a self-signed certificate")
+    args = parser.parse_args()
+
+    if args.tls and shutil.which("openssl") is None:
+        sys.exit("openssl not found; run without --tls")
+    _MockLLMHandler.rtt = args.rtt
+    payload = {"model": "mock", "messages": [{"role": "user", "content": "嗯那個我們明天開會"}]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url, cert = _serve(args.tls, tmp)
+        verify = cert or True
+        _pool(url, cert)
+        print(f"{url}  rtt={args.rtt * 1000:.0f} ms  requests={args.requests}  h2={transport.HTTP2}")
+        fresh = _run("httpx.post (fresh)", lambda: httpx.post(url, json=payload, verify=verify), args.requests)
+        pooled = _run("transport.post (pooled)", lambda: transport.post(url, json=payload), args.requests)
+        print(f"saved {(fresh - pooled) * 1000:.1f} ms per request")
+        _run_prewarmed(url, cert, payload, args.requests, recording=0.3)
+        transport.close_all()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
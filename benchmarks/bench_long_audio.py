@@ -0,0 +1,55 @@
+"""
+長錄音平行解碼的即時率 (RTF) 對 worker 數量。
+
+同一段長音訊分別以 long_audio_workers = 1, 2, 4, ... 載入 LocalWhisperSTT 辨識，
+RTF = 解碼時間 / 音訊長度 (越小越好)。workers=1 為原本的單一循序解碼。
+
+用法：python benchmarks/bench_long_audio.py [--wav speech.wav] [--model small]
+                                           [--seconds 120] [--workers 1,2,4]
+沒有 --wav 時以間隔停頓的合成音代替 (辨識內容沒有意義，但切片與解碼工作量相近)。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from audio.buffer import AudioBuffer
+from bench_stt import _load, _synthetic
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = ",".join(str(w) for w in (1, 2, 4, 8) if w <= cores) or "1"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--workers", default=default_workers)
+    args = parser.parse_args()
+
+    from stt.local_whisper import LocalWhisperSTT
+    signal = _load(args.wav, args.seconds) if args.wav else _synthetic(args.seconds)
+    audio = AudioBuffer(signal)
+
+    print(f"{args.seconds:.0f}s audio, model {args.model}, {cores} cores")
+    print(f"{'workers':>8} {'decode (s)':>11} {'RTF':>7} {'speed-up':>9}")
+    baseline = None
+    for workers in (int(x) for x in args.workers.split(",")):
+        # workers=1 走原本的單一解碼路徑 (門檻設成無限大)
+        stt = LocalWhisperSTT(
+            model_size=args.model,
+            long_audio_workers=workers if workers > 1 else 0,
+            long_audio_threshold=0 if workers > 1 else float("inf"),
+        )
+        stt.transcribe(AudioBuffer(_synthetic(2.0)))  # 暖機
+        started = time.perf_counter()
+        stt.transcribe(audio)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>11.2f} {elapsed / args.seconds:>7.3f} {baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+錄音緩衝區效能量測 (不需要麥克風)。
+
+比較舊版「每 50ms append 一個 indata.copy() + stop 時 concatenate」與
+PCMArena：兩邊都以 tracemalloc 量測 stop 後裝著錄音的 numpy 區塊數 / 大小、
+錄音過程中配置的量 (churn) 與記憶體峰值。每個情境在獨立子行程執行，
+ru_maxrss 才不會互相污染。
+
+用法：python benchmarks/bench_recorder.py
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+SAMPLERATE = 16000
+CHUNK = int(SAMPLERATE * 0.05)
+DURATIONS = [("10s", 10), ("60s", 60), ("10min", 600)]
+NUMPY_DOMAIN = np.lib.tracemalloc_domain  # numpy 的資料緩衝區記在這個 tracemalloc domain
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 回傳 bytes，Linux 回傳 KB
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _legacy(source: np.ndarray):
+    """舊版：每個區塊 read + copy 進 list + float32 RMS；stop 時 concatenate 再轉 bytes。"""
+    frames = []
+
+    def step():
+        indata = source.copy()             # sd.InputStream.read 配置的陣列
+        frames.append(indata.copy())       # _poll_audio 的 indata.copy()
+        _ = np.sqrt(np.mean(indata.astype(np.float32) ** 2))
+
+    def finish():
+        return np.concatenate(frames, axis=0).tobytes()
+
+    return step, finish
+
+
+def _arena(source: np.ndarray):
+    from audio.buffer import PCMArena, rms_level
+    arena = PCMArena(1, SAMPLERATE * 30)
+    scratch = np.empty(CHUNK, dtype=np.float32)
+
+    def step():
+        out = arena.reserve(CHUNK)
+        np.copyto(out, source)             # 相當於 Pa_ReadStream 直接寫入
+        arena.commit(CHUNK)
+        _ = rms_level(out, scratch)
+
+    def finish():
+        return arena.view()
+
+    return step, finish
+
+
+def _numpy_blocks() -> int:
+    """目前存活的 numpy 資料區塊數。"""
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.DomainFilter(True, NUMPY_DOMAIN)])
+    return sum(s.count for s in snapshot.statistics("lineno"))
+
+
+def _run_case(kind: str, seconds: int) -> dict:
+    """
+    兩種實作用同一套 tracemalloc 量法：
+    churn = 每個區塊 (與 stop) 執行期間記憶體高點減去執行前的量，加總，
+            即至少需要配置的 bytes；
+    blocks = stop 後仍存活的 numpy 區塊數 (對照開始前的快照)；held = 當時仍佔用的記憶體
+            (舊版包含 WAV bytes)。
+    """
+    source = (np.random.default_rng(0).standard_normal((CHUNK, 1)) * 3000).astype(np.int16)
+    tracemalloc.start()
+    baseline = _numpy_blocks(), tracemalloc.get_traced_memory()[0]
+    step, finish = (_legacy if kind == "legacy" else _arena)(source)
+    churn = traced_peak = 0
+
+    def measured(fn):
+        nonlocal churn, traced_peak
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()  # Python 3.9+
+        out = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        churn += peak - before
+        traced_peak = max(traced_peak, peak)
+        return out
+
+    for _ in range(int(seconds / 0.05)):
+        measured(step)
+    result = measured(finish)
+    blocks = _numpy_blocks()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return {
+        "blocks": blocks - baseline[0],
+        "held_mb": round((held - baseline[1]) / 1e6, 1),
+        "churn_mb": round(churn / 1e6, 1),
+        "traced_peak_mb": round(traced_peak / 1e6, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main():
+    if len(sys.argv) == 3:
+        print(json.dumps(_run_case(sys.argv[1], int(sys.argv[2]))))
+        return
+
+    print(f"{'case':<8} {'impl':<8} {'blocks':>8} {'held MB':>8} {'churn MB':>9} {'traced peak MB':>15} {'peak RSS MB':>12}")
+    for label, seconds in DURATIONS:
+        for kind in ("legacy", "arena"):
+            out = subprocess.run(
+                [sys.executable, __file__, kind, str(seconds)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{label:<8} {kind:<8} {r['blocks']:>8} {r['held_mb']:>8} {r['churn_mb']:>9} "
+                  f"{r['traced_peak_mb']:>15} {r['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
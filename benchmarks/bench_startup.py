@@ -0,0 +1,98 @@
+"""
+引擎註冊表的延遲 import 檢查與啟動成本量測。
+
+每個已登記的 STT / LLM 引擎各開一個乾淨的子行程，只選用該引擎 (registry 的
+load_class)，記錄 import 時間、峰值 RSS，並檢查是否載入了其他引擎的模組或
+第三方套件 (例如選 groq 卻載入 faster_whisper)。最後一列是「全部引擎都 import」
+的對照 (等於改版前 import stt / import llm 的成本)。
+
+用法：python benchmarks/bench_startup.py [--kind stt|llm|all]
+有任何引擎載入了別的引擎時以 exit code 1 結束，可直接當成檢查使用。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import registry
+
+# 多個引擎共用的基礎設施 (transport 連線池、httpx)：OpenAI / Anthropic / Groq SDK
+# 本身也 import httpx，載入它們不算載入了別的引擎
+SHARED = {"httpx", "transport"}
+
+_CHILD = r"""
+import json, resource, sys, time
+started = time.perf_counter()
+import registry
+names = {names!r}
+error = None
+for kind, name in names:
+    info = (registry.stt_engine if kind == "stt" else registry.llm_engine)(name)
+    try:
+        info.load_class()
+    except Exception as e:
+        error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"sec": elapsed, "rss_mb": rss_mb, "modules": sorted(sys.modules), "error": error}}))
+"""
+
+
+def _run(names):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(names=names)],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "child failed")
+    return json.loads(lines[-1])
+
+
+def _footprint(info):
+    """這個引擎自己的模組與第三方套件 (其他引擎不該載入)；共用基礎設施不算。"""
+    return {info.module, *info.requires} - SHARED
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kind", choices=("stt", "llm", "all"), default="all")
+    args = parser.parse_args()
+
+    engines = []
+    if args.kind in ("stt", "all"):
+        engines += [("stt", info) for info in registry.STT_ENGINES.values()]
+    if args.kind in ("llm", "all"):
+        engines += [("llm", info) for info in registry.LLM_ENGINES.values()]
+
+    print(f"{'engine':<18} {'import':>8} {'RSS':>8}  foreign modules")
+    leaks = 0
+    for kind, info in engines:
+        result = _run([(kind, info.name)])
+        loaded = set(result["modules"])
+        own = _footprint(info)
+        foreign = sorted({
+            mod for _, other in engines if other is not info
+            for mod in _footprint(other) - own if mod in loaded
+        })
+        leaks += bool(foreign)
+        note = ", ".join(foreign) or "none"
+        if result["error"]:
+            note += f"  (not installed: {result['error'][:60]})"
+        print(f"{kind + ':' + info.name:<18} {result['sec'] * 1000:>6.0f}ms {result['rss_mb']:>6.0f}MB  {note}")
+
+    eager = _run([(kind, info.name) for kind, info in engines])
+    print(f"{'(all engines)':<18} {eager['sec'] * 1000:>6.0f}ms {eager['rss_mb']:>6.0f}MB")
+    if leaks:
+        print(f"FAIL: {leaks} engine(s) imported other engines")
+        sys.exit(1)
+    print("OK: selecting one engine imports none of the others")
+
+
+if __name__ == "__main__":
+    main()
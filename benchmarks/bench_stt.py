@@ -0,0 +1,124 @@
+"""
+STT 放開快捷鍵 → 文字的延遲量測 (LocalWhisperSTT)。
+
+以 SyntheticInputStream 即時播放音訊給 AudioRecorder，比較：
+  batch     : 放開後才整段 transcribe
+  streaming : 錄音時停頓切段交給 StreamingTranscriber，放開後只解尾段
+
+用法：python benchmarks/bench_stt.py [--wav speech.wav] [--model small] [--lengths 5,20,60]
+沒有指定 --wav 時以間隔停頓的合成音代替 (辨識結果沒有意義，但解碼工作量相近)。
+
+--ipc：比較同一個引擎在行程內與 STT worker 行程 (stt.worker.ProcessSTT) 的每段延遲，
+差值即 shared memory 複製 + Pipe 往返的成本。預設用不需要模型的 StubSTT，
+加上 --model 則兩邊都用 LocalWhisperSTT。
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from audio.buffer import AudioBuffer
+from audio.recorder import AudioRecorder
+from audio.sources import SyntheticInputStream
+
+SAMPLERATE = 16000
+
+
+def _synthetic(seconds: float) -> np.ndarray:
+    """2.5 秒「語音」(調變諧波) + 0.6 秒停頓，重複到指定長度。"""
+    rng = np.random.default_rng(0)
+    out = []
+    total = 0
+    while total < seconds * SAMPLERATE:
+        t = np.arange(int(SAMPLERATE * 2.5)) / SAMPLERATE
+        f0 = 120 + 40 * rng.random()
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        voiced *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+        out += [voiced * 6000, rng.standard_normal(int(SAMPLERATE * 0.6)) * 40]
+        total += len(out[-2]) + len(out[-1])
+    return np.concatenate(out)[: int(seconds * SAMPLERATE)].astype(np.int16)
+
+
+def _load(path: str, seconds: float) -> np.ndarray:
+    pcm = AudioBuffer.from_wav_bytes(open(path, "rb").read())
+    audio = pcm.pcm[:, 0]
+    reps = int(np.ceil(seconds * SAMPLERATE / len(audio)))
+    return np.tile(audio, reps)[: int(seconds * SAMPLERATE)]
+
+
+def _run(stt, signal: np.ndarray, streaming: bool) -> float:
+    from stt.streaming import StreamingTranscriber
+    streamer = StreamingTranscriber(stt) if streaming else None
+    rec = AudioRecorder(
+        stream_factory=lambda sr, ch: SyntheticInputStream(signal, sr, ch),
+        segment_callback=streamer.feed if streamer else None,
+    )
+    rec.start()
+    time.sleep(len(signal) / SAMPLERATE + 0.1)
+    released = time.perf_counter()
+    audio = rec.stop()
+    if streamer:
+        streamer.finish(audio)
+    else:
+        stt.transcribe(audio)
+    return time.perf_counter() - released
+
+
+def _ipc(args) -> None:
+    from stt.worker import ProcessSTT
+    if args.model:
+        spec = ("stt.local_whisper", "LocalWhisperSTT", {"model_size": args.model})
+    else:
+        spec = ("stt.stub", "StubSTT", {})
+    module, name, kwargs = spec
+    local = getattr(importlib.import_module(module), name)(**kwargs)
+    remote = ProcessSTT(spec, workers=1)
+    runs = 20 if not args.model else 3
+
+    print(f"engine: {name}, {runs} runs per length")
+    print(f"{'length':>7} {'in-process ms':>14} {'worker ms':>10} {'overhead ms':>12}")
+    for seconds in (float(x) for x in args.lengths.split(",")):
+        signal = _load(args.wav, seconds) if args.wav else _synthetic(seconds)
+        audio = AudioBuffer(signal)
+        timings = []
+        for stt in (local, remote):
+            stt.transcribe(audio)  # 暖機 (含第一次配置共享記憶體)
+            started = time.perf_counter()
+            for _ in range(runs):
+                stt.transcribe(audio)
+            timings.append((time.perf_counter() - started) / runs * 1000)
+        print(f"{seconds:>6.0f}s {timings[0]:>14.2f} {timings[1]:>10.2f} {timings[1] - timings[0]:>12.2f}")
+    remote.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav")
+    parser.add_argument("--model")
+    parser.add_argument("--lengths", default="5,20,60")
+    parser.add_argument("--ipc", action="store_true")
+    args = parser.parse_args()
+    if args.ipc:
+        _ipc(args)
+        return
+    args.model = args.model or "small"
+
+    from stt.local_whisper import LocalWhisperSTT
+    stt = LocalWhisperSTT(model_size=args.model)
+    stt.transcribe(AudioBuffer(_synthetic(1.0)))  # 先暖機，避免第一次量測偏高
+
+    print(f"{'length':>7} {'batch (s)':>10} {'streaming (s)':>14}")
+    for seconds in (float(x) for x in args.lengths.split(",")):
+        signal = _load(args.wav, seconds) if args.wav else _synthetic(seconds)
+        batch = _run(stt, signal, streaming=False)
+        streaming = _run(stt, signal, streaming=True)
+        print(f"{seconds:>6.0f}s {batch:>10.2f} {streaming:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
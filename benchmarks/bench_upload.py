@@ -0,0 +1,123 @@
+"""
+雲端 STT 上傳量測：WAV / FLAC / Opus 的實際傳輸位元組數與上傳時間。
+
+在本機起一個假的 STT 伺服器，依 --kbps 模擬上行頻寬慢慢讀取 request body，
+記錄 wire 上的位元組數 (含 multipart / JSON + base64 的額外開銷)。
+  multipart : Groq / OpenRouter 的 /audio/transcriptions 上傳方式
+  json-b64  : Gemini inline_data 的上傳方式
+
+用法：python benchmarks/bench_upload.py [--wav speech.wav] [--lengths 5,30,120] [--kbps 2000]
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import numpy as np
+
+from audio.buffer import AudioBuffer
+from stt.codecs import available_codecs, encode_audio
+
+SAMPLERATE = 16000
+
+
+class _MockSTTHandler(BaseHTTPRequestHandler):
+    kbps = 0.0
+    received = 0
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        got = 0
+        started = time.perf_counter()
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 16384))
+            if not block:
+                break
+            remaining -= len(block)
+            got += len(block)
+            if self.kbps:
+                # 模擬上行頻寬：讀到的位元組數超前頻寬允許的量就等一下
+                ahead = got * 8 / (self.kbps * 1000) - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        type(self).received = got
+        body = json.dumps({"text": ""}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _synthetic(seconds: float) -> np.ndarray:
+    """調變諧波 + 底噪，頻譜與語音相近 (純正弦波對 FLAC / Opus 太有利)。"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLERATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    voiced *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    return (voiced * 5000 + rng.standard_normal(t.size) * 150).astype(np.int16)
+
+
+def _load(path: str, seconds: float) -> np.ndarray:
+    audio = AudioBuffer.from_wav_bytes(open(path, "rb").read()).pcm[:, 0]
+    reps = int(np.ceil(seconds * SAMPLERATE / len(audio)))
+    return np.tile(audio, reps)[: int(seconds * SAMPLERATE)]
+
+
+def _upload(client: httpx.Client, url: str, upload, style: str) -> float:
+    started = time.perf_counter()
+    if style == "multipart":
+        files = {"file": (upload.filename, io.BytesIO(upload.data), upload.mime)}
+        client.post(url, files=files, data={"model": "whisper-large-v3"})
+    else:
+        payload = {"contents": [{"parts": [
+            {"text": "Transcribe."},
+            {"inline_data": {"mime_type": upload.mime, "data": base64.b64encode(upload.data).decode()}},
+        ]}]}
+        client.post(url, json=payload)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav")
+    parser.add_argument("--lengths", default="5,30,120")
+    parser.add_argument("--kbps", type=float, default=2000, help="模擬上行頻寬 (0 = 不限速)")
+    args = parser.parse_args()
+
+    _MockSTTHandler.kbps = args.kbps
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockSTTHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/audio/transcriptions"
+    codecs = [c for c in ("wav", "flac", "opus") if c in available_codecs()]
+
+    print(f"uplink: {args.kbps:.0f} kbps, codecs: {', '.join(codecs)}")
+    print(f"{'length':>7} {'codec':>6} {'style':>10} {'wire KB':>9} {'encode ms':>10} {'upload ms':>10}")
+    with httpx.Client(timeout=120) as client:
+        for seconds in (float(x) for x in args.lengths.split(",")):
+            signal = _load(args.wav, seconds) if args.wav else _synthetic(seconds)
+            audio = AudioBuffer(signal)
+            for codec in codecs:
+                upload = encode_audio(audio, codec)
+                for style in ("multipart", "json-b64"):
+                    elapsed = _upload(client, url, upload, style)
+                    print(f"{seconds:>6.0f}s {codec:>6} {style:>10} {_MockSTTHandler.received / 1024:>9.1f} "
+                          f"{upload.encode_sec * 1000:>10.1f} {elapsed * 1000:>10.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
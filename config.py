@@ -8,15 +8,45 @@ DEFAULT_CONFIG = {
     # STT
     "stt_engine": "local_whisper",
     "whisper_model": "medium",
+    "long_audio_workers": 0,      # >1：長錄音在停頓處切片，用這麼多個 CTranslate2 worker 平行解碼
+    "long_audio_threshold_sec": 30,
+    "whisper_runtime_profiles": {},  # 模型大小 → 最快的 compute_type / 執行緒數 (python -m stt.calibrate 寫入)
+    "stt_prefault_weights": True,  # 載入本機模型前先把權重循序讀進 page cache (每個模型每次啟動一次)
+    "stt_worker_processes": 0,    # >0：本機模型在獨立 worker 行程執行 (模型當掉不影響 App)
+    "stt_two_tier": False,        # 本機模型：小模型草稿先輸入，背景由 whisper_model 重新辨識，不同才替換
+    "stt_draft_model": "base",    # 兩段式辨識的草稿模型 (tiny / base)
+    "stt_latency_budget": 0,      # >0：放開快捷鍵到出字的目標秒數，本機模型依每句長度自動挑大小
+    "stt_budget_models": ["base", "small", "medium"],  # 可挑選的模型 (由小到大)
+    "stt_resident_models": 2,     # 同時常駐記憶體的模型數 (含最小的那個)
+    "stt_hedge_engine": "",       # 備援引擎 (例如 "local_whisper")：主要引擎超過延遲的第 p 百分位數就同時送出
+    "stt_hedge_percentile": 95,
+    "model_idle_unload_min": 0,   # >0：閒置這麼多分鐘就卸載 STT 模型 (與 Ollama 模型)，按下快捷鍵時背景重新載入
+    "model_reload_wait_sec": 15,  # 閒置卸載後放開快捷鍵時，最多等重新載入幾秒 (超過就提示稍後再試)
     "groq_api_key": "",
+    "stt_upload_codec": "auto",   # 雲端 STT 上傳格式："auto" | "opus" | "flac" | "wav"
     "language": "zh",
+    "stt_streaming": False,  # 按住快捷鍵時就先辨識已講完的段落 (需開啟 VAD；只對支援串流上下文的引擎生效)
+    "continuous_dictation": False,  # 切換式快捷鍵：每段停頓就辨識並直接輸入，不等到結束
+    "vad_enabled": True,     # 錄音端 VAD：裁掉頭尾靜音，沒講話就不送 STT
+    "audio_warm_standby": False,  # 麥克風串流常駐 + pre-roll，避免第一個字被切掉 (麥克風指示燈會一直亮)
+    "audio_preroll_ms": 300,
+    "audio_native_capture": True,  # 以裝置原生取樣率開啟麥克風，由程式轉成 16 kHz 單聲道
+    "audio_capture_process": False,  # 在獨立子行程擷取麥克風 (不受辨識 / UI 佔用 GIL 影響)
+    "audio_warm_idle_sec": 300,   # warm 模式閒置多久後關閉麥克風
+    "record_spill_mb": 64,        # 單段錄音超過此大小改寫入磁碟 memmap (0 = 不溢寫)
+    "record_keep_files": False,   # 保留溢寫的錄音檔 (當機復原 / 重新辨識用)
+    "record_keep_days": 7,        # 保留的錄音檔 / 復原的逐字稿幾天後於啟動時刪除 (0 = 不刪)
     # LLM
     "llm_enabled": False,
     "llm_engine": "ollama",
     "llm_mode": "replace",   # "replace" | "fast"
+    "llm_streaming": False,  # replace 模式：LLM 邊生成邊輸入 (每個子句貼上一次)
+    "http_prewarm": True,    # 按下快捷鍵時先對雲端 STT / LLM 建立連線 (DNS + TCP + TLS)
+    "soul_watch_sec": 2,     # 每幾秒檢查一次靈魂檔是否被修改 (修改後快取的 prompt 失效)；0 = 不監看
     "llm_prompt": "",        # 留空使用內建 prompt
     "ollama_model": "llama3",
     "ollama_base_url": "http://localhost:11434",
+    "ollama_keep_alive": "30m",   # 模型在 Ollama 常駐時間 (預設 5 分鐘太短，閒一下第一句就要重新載入)
     "openai_api_key": "",
     "openai_model": "gpt-4o-mini",
     "anthropic_api_key": "",
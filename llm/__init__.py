@@ -1,22 +1,24 @@
 from .base import BaseLLM
-from .ollama import OllamaLLM
-from .openai_llm import OpenAILLM
-from .claude import ClaudeLLM
-from .openrouter import OpenRouterLLM
-from .gemini import GeminiLLM
-from .qwen import QwenLLM
-from .deepseek import DeepSeekLLM
+
+# 引擎類別改為用到時才 import (見 registry.py)：import llm 不會載入 openai / anthropic
+_ENGINE_CLASSES = {
+    "OllamaLLM": "ollama",
+    "OpenAILLM": "openai",
+    "ClaudeLLM": "claude",
+    "OpenRouterLLM": "openrouter",
+    "GeminiLLM": "gemini",
+    "QwenLLM": "qwen",
+    "DeepSeekLLM": "deepseek",
+}
+
+
+def __getattr__(name: str):
+    if name in _ENGINE_CLASSES:
+        from registry import llm_engine
+        return llm_engine(_ENGINE_CLASSES[name]).load_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_llm(config: dict) -> BaseLLM:
-    engine = config.get("llm_engine", "ollama")
-    engines = {
-        "ollama": OllamaLLM,
-        "openai": OpenAILLM,
-        "claude": ClaudeLLM,
-        "openrouter": OpenRouterLLM,
-        "gemini": GeminiLLM,
-        "qwen": QwenLLM,
-        "deepseek": DeepSeekLLM,
-    }
-    cls = engines.get(engine, OllamaLLM)
-    return cls(config)
+    from registry import create_llm
+    return create_llm(config)
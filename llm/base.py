@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterator, List
 
 
 class BaseLLM(ABC):
@@ -6,3 +7,23 @@ class BaseLLM(ABC):
     def refine(self, text: str, prompt: str) -> str:
         """Refine raw transcription text using the given system prompt."""
         ...
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        """
+        Yield the refined text in pieces as the model generates it.
+        The default waits for refine() and yields the whole result once.
+        """
+        result = self.refine(text, prompt)
+        if result:
+            yield result
+
+    def warmup(self) -> float:
+        """Load the model ahead of the first request (local servers); returns seconds spent."""
+        return 0.0
+
+    def endpoints(self) -> List[str]:
+        """URLs this engine will call; pre-connected when recording starts."""
+        return []
+
+    def unload(self) -> None:
+        """Ask a local server to free the model (idle policy); cloud engines ignore it."""
@@ -1,12 +1,19 @@
+from typing import Iterator, List
+
 import anthropic
+
+import transport
 from .base import BaseLLM
 
 
 class ClaudeLLM(BaseLLM):
     def __init__(self, api_key: str, model: str = "claude-3-haiku-20240307"):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=transport.client("https://api.anthropic.com"))
         self.model = model
 
+    def endpoints(self) -> List[str]:
+        return ["https://api.anthropic.com"]
+
     def refine(self, text: str, prompt: str) -> str:
         message = self.client.messages.create(
             model=self.model,
@@ -17,3 +24,12 @@ class ClaudeLLM(BaseLLM):
         result = message.content[0].text.strip()
         print(f"[llm] Claude refined: {result}")
         return result
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=1024,
+            system=prompt,
+            messages=[{"role": "user", "content": text}],
+        ) as stream:
+            yield from stream.text_stream
@@ -1,5 +1,8 @@
-import httpx
+from typing import Iterator, List
+
+import transport
 from .base import BaseLLM
+from .streaming import sse_data
 
 class DeepSeekLLM(BaseLLM):
     """DeepSeek LLM"""
@@ -9,6 +12,9 @@ class DeepSeekLLM(BaseLLM):
         self.model = config.get("deepseek_model", "deepseek-chat")
         self.prompt = config.get("llm_prompt", "請將以下語音辨識結果整理成通順的文字，保持原意，只回傳結果：")
 
+    def endpoints(self) -> List[str]:
+        return ["https://api.deepseek.com"] if self.api_key else []
+
     def refine(self, text: str, prompt: str) -> str:
         if not self.api_key:
             return text
@@ -23,7 +29,7 @@ class DeepSeekLLM(BaseLLM):
             ],
         }
         try:
-            resp = httpx.post(
+            resp = transport.post(
                 "https://api.deepseek.com/chat/completions",
                 headers=headers,
                 json=payload,
@@ -34,3 +40,34 @@ class DeepSeekLLM(BaseLLM):
         except Exception as e:
             print(f"[DeepSeek LLM Error] {e}")
             return text
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        if not self.api_key:
+            yield text
+            return
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": f"{prompt}\n\n{text}"}
+            ],
+            "stream": True,
+        }
+        produced = False
+        try:
+            with transport.stream("POST", "https://api.deepseek.com/chat/completions",
+                              headers=headers, json=payload, timeout=30) as resp:
+                resp.raise_for_status()
+                for event in sse_data(resp):
+                    choices = event.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        produced = True
+                        yield delta
+        except Exception as e:
+            print(f"[DeepSeek LLM Error] {e}")
+            if not produced:
+                yield text
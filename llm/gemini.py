@@ -1,5 +1,8 @@
-import httpx
+from typing import Iterator, List
+
+import transport
 from .base import BaseLLM
+from .streaming import sse_data
 
 class GeminiLLM(BaseLLM):
     """Google Gemini LLM"""
@@ -9,6 +12,9 @@ class GeminiLLM(BaseLLM):
         self.model = config.get("gemini_model", "gemini-2.0-flash")
         self.prompt = config.get("llm_prompt", "請將以下語音辨識結果整理成通順的文字，保持原意，只回傳結果：")
 
+    def endpoints(self) -> List[str]:
+        return ["https://generativelanguage.googleapis.com"] if self.api_key else []
+
     def refine(self, text: str, prompt: str) -> str:
         if not self.api_key:
             return text
@@ -17,9 +23,32 @@ class GeminiLLM(BaseLLM):
             "contents": [{"parts": [{"text": f"{prompt}\n\n{text}"}]}]
         }
         try:
-            resp = httpx.post(url, json=payload, timeout=30)
+            resp = transport.post(url, json=payload, timeout=30)
             resp.raise_for_status()
             return resp.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
         except Exception as e:
             print(f"[Gemini LLM Error] {e}")
             return text
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        if not self.api_key:
+            yield text
+            return
+        url = (f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}"
+               f":streamGenerateContent?alt=sse&key={self.api_key}")
+        payload = {
+            "contents": [{"parts": [{"text": f"{prompt}\n\n{text}"}]}]
+        }
+        produced = False
+        try:
+            with transport.stream("POST", url, json=payload, timeout=30) as resp:
+                resp.raise_for_status()
+                for event in sse_data(resp):
+                    for part in event.get("candidates", [{}])[0].get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            produced = True
+                            yield part["text"]
+        except Exception as e:
+            print(f"[Gemini LLM Error] {e}")
+            if not produced:
+                yield text
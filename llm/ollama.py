@@ -1,11 +1,46 @@
-import requests
+import time
+from typing import Iterator, List
+
+import httpx
+
+import transport
 from .base import BaseLLM
+from .streaming import ndjson
 
 
 class OllamaLLM(BaseLLM):
-    def __init__(self, model: str = "llama3", base_url: str = "http://localhost:11434"):
+    def __init__(self, model: str = "llama3", base_url: str = "http://localhost:11434", keep_alive: str = "30m"):
         self.model = model
         self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive  # 模型在 Ollama 伺服器上常駐多久 (Ollama 預設只有 5 分鐘)
+
+    def warmup(self) -> float:
+        """沒有 prompt 的 generate 請求只會把模型載入記憶體 (Ollama 的 preload 用法)。"""
+        started = time.perf_counter()
+        try:
+            resp = transport.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": self.keep_alive},
+                timeout=120,
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"[llm] Ollama preload failed: {e}")
+        return time.perf_counter() - started
+
+    def endpoints(self) -> List[str]:
+        return [self.base_url]
+
+    def unload(self) -> None:
+        """keep_alive=0：Ollama 立即把模型移出記憶體。"""
+        try:
+            transport.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": 0},
+                timeout=10,
+            ).raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"[llm] Ollama unload failed: {e}")
 
     def refine(self, text: str, prompt: str) -> str:
         payload = {
@@ -15,9 +50,30 @@ class OllamaLLM(BaseLLM):
                 {"role": "user", "content": text},
             ],
             "stream": False,
+            "keep_alive": self.keep_alive,
         }
-        resp = requests.post(f"{self.base_url}/api/chat", json=payload, timeout=30)
+        resp = transport.post(f"{self.base_url}/api/chat", json=payload, timeout=30)
         resp.raise_for_status()
         result = resp.json()["message"]["content"].strip()
         print(f"[llm] Ollama refined: {result}")
         return result
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text},
+            ],
+            "stream": True,
+            "keep_alive": self.keep_alive,
+        }
+        # 串流時每行一個 JSON (NDJSON)，最後一行 done=true
+        with transport.stream("POST", f"{self.base_url}/api/chat", json=payload, timeout=30) as resp:
+            resp.raise_for_status()
+            for chunk in ndjson(resp):
+                content = chunk.get("message", {}).get("content")
+                if content:
+                    yield content
+                if chunk.get("done"):
+                    return
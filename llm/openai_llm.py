@@ -1,12 +1,19 @@
+from typing import Iterator, List
+
 from openai import OpenAI
+
+import transport
 from .base import BaseLLM
 
 
 class OpenAILLM(BaseLLM):
     def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, http_client=transport.client("https://api.openai.com"))
         self.model = model
 
+    def endpoints(self) -> List[str]:
+        return ["https://api.openai.com"]
+
     def refine(self, text: str, prompt: str) -> str:
         response = self.client.chat.completions.create(
             model=self.model,
@@ -19,3 +26,17 @@ class OpenAILLM(BaseLLM):
         result = response.choices[0].message.content.strip()
         print(f"[llm] OpenAI refined: {result}")
         return result
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text},
+            ],
+            max_tokens=1024,
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
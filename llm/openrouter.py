@@ -1,5 +1,8 @@
-import httpx
+from typing import Iterator, List
+
+import transport
 from .base import BaseLLM
+from .streaming import sse_data
 
 class OpenRouterLLM(BaseLLM):
     """OpenRouter LLM — 支援數百個模型 (Gemini, Qwen, DeepSeek...)"""
@@ -9,6 +12,9 @@ class OpenRouterLLM(BaseLLM):
         self.model = config.get("openrouter_model", "google/gemini-2.0-flash-001")
         self.prompt = config.get("llm_prompt", "請將以下語音辨識結果整理成通順的文字，保持原意，只回傳結果：")
 
+    def endpoints(self) -> List[str]:
+        return ["https://openrouter.ai"] if self.api_key else []
+
     def refine(self, text: str, prompt: str) -> str:
         if not self.api_key:
             return text
@@ -26,7 +32,7 @@ class OpenRouterLLM(BaseLLM):
             ],
         }
         try:
-            resp = httpx.post(
+            resp = transport.post(
                 "https://openrouter.ai/api/v1/chat/completions",
                 headers=headers,
                 json=payload,
@@ -37,3 +43,37 @@ class OpenRouterLLM(BaseLLM):
         except Exception as e:
             print(f"[OpenRouter LLM Error] {e}")
             return text
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        if not self.api_key:
+            yield text
+            return
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://github.com/voicetype-mac",
+            "X-Title": "VoiceType Mac",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text}
+            ],
+            "stream": True,
+        }
+        produced = False
+        try:
+            with transport.stream("POST", "https://openrouter.ai/api/v1/chat/completions",
+                              headers=headers, json=payload, timeout=30) as resp:
+                resp.raise_for_status()
+                for event in sse_data(resp):
+                    choices = event.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        produced = True
+                        yield delta
+        except Exception as e:
+            print(f"[OpenRouter LLM Error] {e}")
+            if not produced:
+                yield text
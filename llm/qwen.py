@@ -1,5 +1,8 @@
-import httpx
+from typing import Iterator, List
+
+import transport
 from .base import BaseLLM
+from .streaming import sse_data
 
 class QwenLLM(BaseLLM):
     """Alibaba Qwen LLM (DashScope API)"""
@@ -9,6 +12,9 @@ class QwenLLM(BaseLLM):
         self.model = config.get("qwen_model", "qwen-plus")
         self.prompt = config.get("llm_prompt", "請將以下語音辨識結果整理成通順的文字，保持原意，只回傳結果：")
 
+    def endpoints(self) -> List[str]:
+        return ["https://dashscope.aliyuncs.com"] if self.api_key else []
+
     def refine(self, text: str, prompt: str) -> str:
         if not self.api_key:
             return text
@@ -25,7 +31,7 @@ class QwenLLM(BaseLLM):
             },
         }
         try:
-            resp = httpx.post(
+            resp = transport.post(
                 "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation",
                 headers=headers,
                 json=payload,
@@ -36,3 +42,38 @@ class QwenLLM(BaseLLM):
         except Exception as e:
             print(f"[Qwen LLM Error] {e}")
             return text
+
+    def refine_stream(self, text: str, prompt: str) -> Iterator[str]:
+        if not self.api_key:
+            yield text
+            return
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "X-DashScope-SSE": "enable",
+        }
+        payload = {
+            "model": self.model,
+            "input": {
+                "messages": [
+                    {"role": "user", "content": f"{prompt}\n\n{text}"}
+                ]
+            },
+            # incremental_output：每個事件只帶新增的部分 (預設是到目前為止的全文)
+            "parameters": {"result_format": "message", "incremental_output": True},
+        }
+        produced = False
+        try:
+            with transport.stream("POST", "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation",
+                              headers=headers, json=payload, timeout=30) as resp:
+                resp.raise_for_status()
+                for event in sse_data(resp):
+                    choices = event.get("output", {}).get("choices") or [{}]
+                    delta = choices[0].get("message", {}).get("content")
+                    if delta:
+                        produced = True
+                        yield delta
+        except Exception as e:
+            print(f"[Qwen LLM Error] {e}")
+            if not produced:
+                yield text
@@ -0,0 +1,56 @@
+"""
+LLM 串流輸出的共用工具：SSE / NDJSON 逐行解析，以及把 token 湊成子句再輸入的
+ClauseChunker (每次輸入都要經過剪貼簿 + 貼上，一個 token 一次太慢也太閃)。
+"""
+import json
+import re
+from typing import Iterator
+
+# 子句結尾：中文標點直接切；英文標點要等到後面的空白出現才算 (避免切在 3.14、e.g. 中間)
+_CLAUSE_END = re.compile(r"[。！？；：，、\n]|[.!?;:,](?=\s)")
+
+
+def sse_data(response) -> Iterator[dict]:
+    """httpx 串流回應中每個 SSE `data:` 事件的 JSON；遇到 [DONE] 結束。"""
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+def ndjson(response) -> Iterator[dict]:
+    """每行一個 JSON 物件的串流 (Ollama)。"""
+    for line in response.iter_lines():
+        if line.strip():
+            yield json.loads(line)
+
+
+class ClauseChunker:
+    """Buffers streamed tokens and releases text up to the last clause boundary."""
+
+    def __init__(self, min_chars: int = 2):
+        self.min_chars = min_chars
+        self._pending = ""
+        self._started = False
+
+    def feed(self, delta: str) -> str:
+        self._pending += delta
+        if not self._started:
+            # 模型常以空白或換行開頭，refine() 會 strip，這裡也一樣
+            self._pending = self._pending.lstrip()
+        end = 0
+        for m in _CLAUSE_END.finditer(self._pending):
+            end = m.end()
+        if end < self.min_chars:
+            return ""
+        out, self._pending = self._pending[:end], self._pending[end:]
+        self._started = True
+        return out
+
+    def flush(self) -> str:
+        out, self._pending = self._pending.rstrip(), ""
+        return out
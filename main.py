@@ -9,21 +9,24 @@ import os
 import certifi
 import platform
 from pathlib import Path
+from typing import Optional
 
 # Fix SSL certificate issue in py2app bundles when using httpx/huggingface_hub
 os.environ["SSL_CERT_FILE"] = certifi.where()
 
 # ── Debug Log 寫入檔案 (App 版除錯用) ──────────────────────────────
 import logging
-from paths import APP_DATA_DIR
+from paths import APP_DATA_DIR, get_data_dir
 _log_dir = APP_DATA_DIR
 _log_dir.mkdir(parents=True, exist_ok=True)
 _log_file = _log_dir / "debug.log"
+# 擷取子行程 (spawn) 會以 __mp_main__ 重新載入本檔，不能再清空 log
+_log_mode = "a" if __name__ == "__mp_main__" else "w"
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[
-        logging.FileHandler(str(_log_file), mode='w', encoding='utf-8'),
+        logging.FileHandler(str(_log_file), mode=_log_mode, encoding='utf-8'),
         logging.StreamHandler(sys.stdout),
     ],
 )
@@ -31,7 +34,11 @@ log = logging.getLogger("voicetype")
 log.info(f"=== VoiceType4TW Starting === Log: {_log_file}")
 
 from config import load_config, save_config
+import registry
+from soul_cache import SoulCache
+import transport
 from audio.recorder import AudioRecorder
+from audio.buffer import list_recordings, load_recording, remove_recording
 from hotkey.listener import HotkeyListener
 from output.injector import TextInjector
 from ui.mic_indicator import MicIndicator
@@ -85,130 +92,208 @@ def _fix_punctuation(text: str) -> str:
 
 
 def _find_soul_file(directory: Path, name: str) -> Path:
-    """在 macOS 等環境下，處理 NFC/NFD 編碼不一致導致找不到檔案的問題。"""
-    import unicodedata
-    if not directory.exists():
-        return directory / f"{name}.md"
-    
-    target = unicodedata.normalize('NFC', name).lower()
-    for f in directory.glob("*.md"):
-        if unicodedata.normalize('NFC', f.stem).lower() == target:
-            return f
-    # Fallback
-    return directory / f"{name}.md"
+    """在 macOS 等環境下，處理 NFC/NFD 編碼不一致導致找不到檔案的問題 (索引見 SoulCache)。"""
+    return SOUL_CACHE.find(directory, name)
 
 def _load_soul_stack(config: dict) -> str:
-    """載入三層式靈魂架構：Base + Scenario + Format + (Template)"""
-    parts = []
-    
-    # 1. 基底靈魂 (Base)
-    if SOUL_BASE_PATH.exists():
-        try:
-            parts.append(SOUL_BASE_PATH.read_text(encoding="utf-8").strip())
-        except Exception: pass
-        
-    # 2. 情境模板 (Scenario)
+    """載入三層式靈魂架構：Base + Scenario + Format (檔案內容由 SOUL_CACHE 快取)"""
     scenario = config.get("active_scenario", "default")
-    scenario_path = _find_soul_file(SOUL_SCENARIO_DIR, scenario)
-    
-    if scenario_path.exists():
-        try:
-            parts.append(f"【當前情境：{scenario}】\n" + scenario_path.read_text(encoding="utf-8").strip())
-        except Exception: pass
-
-    # 3. 輸出格式 (Format)
     fmt = config.get("active_format", "natural")
-    fmt_path = _find_soul_file(SOUL_FORMAT_DIR, fmt)
-
-    if fmt_path.exists():
-        try:
-            parts.append(f"【輸出架構：{fmt}】\n" + fmt_path.read_text(encoding="utf-8").strip())
-        except Exception: pass
-        
-    result = "\n\n" + "\n\n---\n\n".join(parts) + "\n\n"
+    result = SOUL_CACHE.soul_stack(scenario, fmt)
     if config.get("debug_mode"):
-        print(f"[debug] Soul Files Path: Base={SOUL_BASE_PATH.exists()}, Scenario={scenario_path}, Format={fmt_path}")
-        
+        print(f"[debug] Soul Files Path: Base={SOUL_BASE_PATH.exists()}, "
+              f"Scenario={_find_soul_file(SOUL_SCENARIO_DIR, scenario)}, Format={_find_soul_file(SOUL_FORMAT_DIR, fmt)}")
     return result
 
 
-def _build_llm_prompt(config: dict, memory_context: str = "", is_refine: bool = False, template_output: str = "") -> str:
-    """
-    組合完整的 LLM system prompt：
-    [Soul Stack] + [記憶上下文] + [模板範例] + [內建/自訂 prompt]
-    """
+def _compose_prompt(soul: str, template_output: str = "", memory_context: str = "", base_prompt: str = "") -> str:
+    """[Soul Stack] + [模板範例] + [記憶上下文] + [內建/自訂 prompt]"""
     parts = []
-    soul = _load_soul_stack(config)
     if soul:
-        if config.get("debug_mode"):
-            print(f"[debug] Soul stack applied (len: {len(soul)})")
         parts.append(soul)
-    
+
     # 模板範例 (Few-shot)
     if template_output:
         parts.append(f"【參考範例風格】\n以下是使用者上次非常滿意的輸出，請務必參考其風格、語氣與結構：\n<Example>\n{template_output}\n</Example>")
 
-    # 潤飾模式下，減少或不使用記憶上下文
-    if memory_context and not is_refine:
+    if memory_context:
         parts.append(memory_context)
-    
-    base_prompt = config.get("llm_prompt") or DEFAULT_LLM_PROMPT
-    parts.append(base_prompt)
+
+    parts.append(base_prompt or DEFAULT_LLM_PROMPT)
     return "\n\n".join(parts)
 
 
-def build_stt(config: dict):
+def _build_llm_prompt(config: dict, memory_context: str = "", is_refine: bool = False, template_output: str = "",
+                      soul: Optional[str] = None) -> str:
+    """
+    組合完整的 LLM system prompt：
+    [Soul Stack] + [記憶上下文] + [模板範例] + [內建/自訂 prompt]
+    soul 已先載入時直接傳進來，不再讀檔；沒有記憶上下文時直接取 SOUL_CACHE 組好的結果。
+    """
+    # 潤飾模式下，減少或不使用記憶上下文
+    if is_refine:
+        memory_context = ""
+    if soul is None and not memory_context:
+        prompt = SOUL_CACHE.prompt(config.get("active_scenario", "default"), config.get("active_format", "natural"),
+                                   template_output, config.get("llm_prompt") or "")
+        if config.get("debug_mode"):
+            print(f"[debug] Soul stack applied from cache (prompt len: {len(prompt)})")
+        return prompt
+    if soul is None:
+        soul = _load_soul_stack(config)
+    if soul and config.get("debug_mode"):
+        print(f"[debug] Soul stack applied (len: {len(soul)})")
+    return _compose_prompt(soul, template_output, memory_context, config.get("llm_prompt") or "")
+
+
+SOUL_CACHE = SoulCache(
+    SOUL_BASE_PATH, SOUL_SCENARIO_DIR, SOUL_FORMAT_DIR,
+    render=lambda soul, template, override: _compose_prompt(soul, template, "", override),
+)
+
+
+def _soul_paths(config: dict) -> list:
+    return [
+        SOUL_BASE_PATH,
+        _find_soul_file(SOUL_SCENARIO_DIR, config.get("active_scenario", "default")),
+        _find_soul_file(SOUL_FORMAT_DIR, config.get("active_format", "natural")),
+    ]
+
+
+def _mtimes(paths) -> tuple:
+    result = []
+    for path in paths:
+        try:
+            result.append(path.stat().st_mtime_ns)
+        except OSError:
+            result.append(None)
+    return tuple(result)
+
+
+class _PreparedPrompts:
+    """
+    Everything the release path needs from disk, built in the background while
+    the user speaks: soul stack, memory context, the refine system prompt and
+    the Whisper vocabulary prompt. `key` is the in-memory part of the config it
+    was built from; the soul files' mtimes are checked again on release.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.paths = []
+        self.mtimes = ()
+        self.soul = ""
+        self.memory_context = ""
+        self.system_prompt = ""
+        self.vocab_prompt: Optional[str] = None
+        self.done = threading.Event()
+
+    def build(self, config: dict, template_output: str) -> "_PreparedPrompts":
+        try:
+            # 先確認靈魂檔快取沒有過期 (只 stat)，再記 mtime：之後被改也會在放開時被發現
+            SOUL_CACHE.check()
+            self.paths = _soul_paths(config)
+            self.mtimes = _mtimes(self.paths)
+            self.soul = _load_soul_stack(config)
+            if config.get("memory_enabled", True):
+                try:
+                    from memory.manager import get_context_for_llm
+                    self.memory_context = get_context_for_llm()
+                except Exception:
+                    pass
+            self.system_prompt = _build_llm_prompt(config, self.memory_context, is_refine=True,
+                                                   template_output=template_output)
+            # 只有用得到詞彙提示的引擎 (hotwords) 才讀詞彙庫
+            if registry.stt_caps(config)["hotwords"]:
+                try:
+                    from vocab.manager import build_vocab_prompt
+                    self.vocab_prompt = build_vocab_prompt()
+                except Exception:
+                    self.vocab_prompt = None
+        finally:
+            self.done.set()
+        return self
+
+    def valid(self) -> bool:
+        return self.done.is_set() and _mtimes(self.paths) == self.mtimes
+
+    def wait_vocab(self, timeout: float = 5.0) -> Optional[str]:
+        """串流辨識用：等背景組好後取詞彙提示 (None 時引擎自己讀詞彙庫)。"""
+        self.done.wait(timeout)
+        return self.vocab_prompt
+
+
+def _local_stt_spec(config: dict):
+    """本機模型引擎的 (module, class, kwargs)，供 STT worker 行程建立引擎。"""
+    info = registry.stt_engine(config.get("stt_engine"))
+    if not info.caps["local"]:
+        return None
+    return (info.module, info.class_name, info.kwargs(config))
+
+
+def build_stt(config: dict, previous=None):
     engine = config.get("stt_engine", "local_whisper")
-    if engine == "mlx_whisper":
-        from stt.mlx_whisper import MLXWhisperSTT
-        return MLXWhisperSTT(model_size=config.get("whisper_model", "medium"))
-    elif engine == "groq":
-        from stt.groq_whisper import GroqWhisperSTT
-        return GroqWhisperSTT(api_key=config["groq_api_key"])
-    elif engine == "gemini":
-        from stt.gemini_stt import GeminiSTT
-        return GeminiSTT(api_key=config["gemini_api_key"],
-                         model=config.get("gemini_stt_model", "gemini-2.0-flash"))
-    elif engine == "openrouter":
-        from stt.openrouter_stt import OpenRouterSTT
-        return OpenRouterSTT(api_key=config["openrouter_api_key"],
-                             model=config.get("openrouter_model", "google/gemini-2.0-flash-001"))
-    else:
-        from stt.local_whisper import LocalWhisperSTT
-        return LocalWhisperSTT(model_size=config.get("whisper_model", "medium"))
+    if int(config.get("long_audio_workers", 0)) > 1 and not registry.stt_caps(config)["batching"]:
+        print(f"[main] long_audio_workers ignored: {engine} cannot decode long audio in parallel")
+        config = {**config, "long_audio_workers": 0}
+    workers = int(config.get("stt_worker_processes", 0))
+    spec = _local_stt_spec(config)
+    hedge = config.get("stt_hedge_engine") or ""
+    if hedge and hedge != engine:
+        # 對沖：主要引擎太慢時同時送備援引擎，先回來的勝出。兩者都重新建立，
+        # 不沿用 previous (否則 _load_models_async 關掉舊引擎時會連帶關掉它)
+        from stt.hedge import HedgedSTT
+        return HedgedSTT(
+            build_stt({**config, "stt_hedge_engine": ""}),
+            build_stt({**config, "stt_engine": hedge, "stt_hedge_engine": "", "stt_latency_budget": 0}),
+            primary_name=engine,
+            secondary_name=hedge,
+            percentile=float(config.get("stt_hedge_percentile", 95)),
+            path=get_data_dir("stats") / "stt_latency.json",
+        )
+    budget = float(config.get("stt_latency_budget", 0) or 0)
+    if budget > 0 and spec is not None:
+        # 延遲預算：依每句長度挑模型大小，每個大小各自用下面的流程建立
+        from stt.selector import BudgetSTT, RTFTable
+        models = config.get("stt_budget_models") or ["base", "small", "medium"]
+        table = RTFTable(get_data_dir("stats") / f"stt_rtf_{engine}.json")
+        stt = BudgetSTT(
+            models, budget,
+            factory=lambda size: build_stt({**config, "whisper_model": size, "stt_latency_budget": 0}),
+            resident=int(config.get("stt_resident_models", 2)),
+            table=table,
+        )
+        if config.get("whisper_model") in models:
+            stt.preload(config["whisper_model"])
+        return stt
+    if workers > 0 and spec is not None:
+        from stt.worker import ProcessSTT
+        if isinstance(previous, ProcessSTT):
+            # Warm restart：新 worker 載入完成前，舊的繼續服務
+            previous.restart(spec, workers)
+            return previous
+        return ProcessSTT(spec, workers=workers)
+    return registry.create_stt(config)
+
+
+def build_draft_stt(config: dict):
+    """兩段式辨識的草稿引擎：只用於本機模型，且草稿模型與主模型不同時才建立。"""
+    if not config.get("stt_two_tier"):
+        return None
+    if not registry.stt_caps(config)["local"]:
+        return None
+    draft = config.get("stt_draft_model", "base")
+    if draft == config.get("whisper_model", "medium"):
+        return None
+    # 草稿模型很小，留在主行程即可，也不做長錄音平行解碼
+    return build_stt({**config, "whisper_model": draft, "stt_worker_processes": 0, "long_audio_workers": 0,
+                      "stt_latency_budget": 0, "stt_hedge_engine": ""})
 
 
 def build_llm(config: dict):
     if not config.get("llm_enabled"):
         return None
-    engine = config.get("llm_engine", "ollama")
-    if engine == "openai":
-        from llm.openai_llm import OpenAILLM
-        return OpenAILLM(api_key=config["openai_api_key"],
-                         model=config.get("openai_model", "gpt-4o-mini"))
-    elif engine == "claude":
-        from llm.claude import ClaudeLLM
-        return ClaudeLLM(api_key=config["anthropic_api_key"],
-                         model=config.get("anthropic_model", "claude-3-haiku-20240307"))
-    elif engine == "openrouter":
-        from llm.openrouter import OpenRouterLLM
-        return OpenRouterLLM(config)
-    elif engine == "gemini":
-        from llm.gemini import GeminiLLM
-        return GeminiLLM(api_key=config["gemini_api_key"],
-                         model=config.get("gemini_model", "gemini-2.0-flash"))
-    elif engine == "deepseek":
-        from llm.deepseek import DeepSeekLLM
-        return DeepSeekLLM(api_key=config["deepseek_api_key"],
-                           model=config.get("deepseek_model", "deepseek-chat"))
-    elif engine == "qwen":
-        from llm.qwen import QwenLLM
-        return QwenLLM(api_key=config["qwen_api_key"],
-                       model=config.get("qwen_model", "qwen-plus"))
-    else:
-        from llm.ollama import OllamaLLM
-        return OllamaLLM(model=config.get("ollama_model", "llama3"),
-                         base_url=config.get("ollama_base_url", "http://localhost:11434"))
+    return registry.create_llm(config)
 
 
 class VoiceTypeApp:
@@ -217,15 +302,32 @@ class VoiceTypeApp:
         self.indicator = MicIndicator()
         self.injector = TextInjector()
         self.stt = None       # 改為延遲載入
+        self.stt_draft = None  # stt_two_tier：先出草稿的小模型
         self.llm = None       # 改為延遲載入
         self._models_ready = False
+        self._launched_at = time.time()
+        self._ready_at = None
+        self._first_transcription = True  # 載入 (含暖機) 後的第一句，debug 模式下回報延遲
+        self._loaded = threading.Event()   # 模型載入 (含暖機) 完成
+        self._last_used = time.time()
+        self._models_unloaded = False      # model_idle_unload_min：閒置卸載中
+        self._idle_unloaded = False        # 閒置卸載過、重新載入還沒成功 (只有這時放開快捷鍵才等載入)
+        self._idle_thread = None           # _idle_watch 執行緒 (整個 App 只有一個)
+        self._reload_wait = 0.0            # 放開快捷鍵後等待重新載入的秒數
         self.recorder = AudioRecorder(level_callback=self._on_level)
+        self._capture_proc = None       # audio_capture_process：擷取子行程
+        self._apply_recorder_config()
         self._recording_start: float = 0.0
+        self._streamer = None           # 邊講邊辨識的背景 worker (stt_streaming / 連續聽寫)
+        self._continuous_parts = []     # 連續聽寫已輸入的段落
         self._active_mode: str = "ptt"
         self.translation_target = None  # 紀錄翻譯目標，例如 "英文"
         self._last_stt_text = ""        # 用於儲存模板
         self._last_final_text = ""      # 用於儲存模板
         self._active_template = None    # 當前回用模板的內容
+        self._prepared = None           # 錄音期間在背景組好的 prompt (_PreparedPrompts)
+        SOUL_CACHE.start(float(self.config.get("soul_watch_sec", 2)))
+        self._precompute_prompts()
         
         from actions.dispatcher import ActionDispatcher
         self.action_dispatcher = ActionDispatcher(self.injector, self.indicator)
@@ -244,10 +346,46 @@ class VoiceTypeApp:
     def _on_level(self, level: float):
         self.indicator.set_level(level)
 
+    def _apply_recorder_config(self):
+        """把錄音相關設定套用到 AudioRecorder (啟動時與設定儲存後呼叫)。"""
+        rec = self.recorder
+        rec.vad_enabled = self.config.get("vad_enabled", True)
+        rec.native_capture = bool(self.config.get("audio_native_capture", True))
+        use_process = bool(self.config.get("audio_capture_process", False))
+        if use_process and self._capture_proc is None:
+            from audio.capture_process import CaptureProcess
+            self._capture_proc = CaptureProcess()
+            self._capture_proc.launch()
+            rec.set_stream_factory(self._capture_proc)
+        elif not use_process and self._capture_proc is not None:
+            rec.set_stream_factory(None)
+            self._capture_proc.shutdown()
+            self._capture_proc = None
+        if self._capture_proc is not None:
+            self._capture_proc.native_capture = rec.native_capture
+        rec.idle_timeout = float(self.config.get("audio_warm_idle_sec", 300))
+        rec.spill_mb = float(self.config.get("record_spill_mb", 64))
+        rec.spill_dir = get_data_dir("recordings")
+        preroll_ms = int(self.config.get("audio_preroll_ms", 300))
+        if preroll_ms != rec.preroll_ms:
+            rec.set_preroll(preroll_ms)
+        warm = bool(self.config.get("audio_warm_standby", False))
+        if rec.warm and not warm:
+            rec.warm = False
+            rec.close()
+        rec.warm = warm
+
     def _on_start(self, mode: str):
+        pressed_at = time.perf_counter()
         self._recording_start = time.time()
         self._active_mode = mode
+        self._last_used = time.time()
         print(f"[main] Recording started (mode: {mode})")
+        if self._models_unloaded:
+            self._reload_models()
+        if self.config.get("http_prewarm", True):
+            self._prewarm_connections(mode)
+        self._prepare_prompts()
         
         # 顯示錄音狀態與功能標籤
         prefix = ""
@@ -274,10 +412,90 @@ class VoiceTypeApp:
         # 透過指示器播放提示音 (這會在 GUI 執行緒上執行)
         self.indicator.play_beep()
         
-        self.recorder.start()
+        # 邊講邊辨識：停頓切出的段落交給背景 worker，放開時只剩尾段要解碼
+        self._streamer = None
+        self._continuous_parts = []
+        continuous = mode == "toggle" and self.config.get("continuous_dictation", False)
+        # stt_streaming 只是為了縮短放開後的等待，引擎無法延續段落上下文時 (雲端 / MLX) 分段只會更不準；
+        # 沒開 VAD 時只能每 segment_max_sec 硬切 (可能切在字中間)，只有連續聽寫需要
+        streaming = (self.config.get("stt_streaming") and self.config.get("vad_enabled", True)
+                     and registry.stt_caps(self.config)["streaming"])
+        if (continuous or streaming) and self._models_ready and self.stt:
+            from stt.streaming import StreamingTranscriber
+            self._streamer = StreamingTranscriber(
+                self.stt,
+                self.config.get("language", "zh"),
+                on_partial=self._inject_partial if continuous else None,
+                # 雲端引擎每段是獨立請求：前一段還在路上時下一段就先送出
+                concurrency=3 if registry.stt_caps(self.config)["async"] else 1,
+                prompt=self._prepared.wait_vocab if self._prepared else None,
+            )
+        self.recorder.segment_callback = self._streamer.feed if self._streamer else None
+        # 連續聽寫：段落複製出去後即釋放，錄多久記憶體都不會成長
+        self.recorder.bounded = bool(continuous and self._streamer)
+
+        self.recorder.start(pressed_at)
+
+    def _prewarm_connections(self, mode: str):
+        """錄音時先建好雲端引擎的連線，放開後的 STT / LLM 請求不必再等握手。"""
+        urls = []
+        if self._models_ready and self.stt is not None:
+            urls += self.stt.endpoints()
+        if self.llm and (self.config.get("llm_enabled") or mode == "llm" or self.translation_target):
+            urls += self.llm.endpoints()
+        if urls:
+            transport.prewarm(urls)
+
+    def _precompute_prompts(self):
+        """背景先組好所有 情境 × 格式 的 system prompt (啟動與設定儲存後)。"""
+        def run():
+            started = time.perf_counter()
+            count = SOUL_CACHE.precompute("", self.config.get("llm_prompt") or "")
+            if self.config.get("debug_mode"):
+                print(f"[debug] Precomputed {count} soul prompts in {(time.perf_counter() - started) * 1000:.0f} ms")
+        threading.Thread(target=run, name="soul-precompute", daemon=True).start()
+
+    def _prompt_key(self) -> tuple:
+        """影響 prompt 的設定 (都在記憶體裡，比對不必讀檔)。"""
+        c = self.config
+        return (c.get("active_scenario", "default"), c.get("active_format", "natural"),
+                c.get("llm_prompt") or "", bool(c.get("memory_enabled", True)), self._active_template or "")
+
+    def _prepare_prompts(self):
+        """錄音開始時在背景讀靈魂檔、記憶與詞彙庫，組好 system prompt 與 Whisper 詞彙提示。"""
+        prepared = _PreparedPrompts(self._prompt_key())
+        self._prepared = prepared
+        threading.Thread(
+            target=prepared.build,
+            args=(self.config.copy(), self._active_template or ""),
+            name="prompt-prepare",
+            daemon=True,
+        ).start()
+
+    def _take_prompts(self) -> _PreparedPrompts:
+        """放開時取用預先組好的 prompt；設定或靈魂檔在錄音期間變了才同步重組。"""
+        prepared, self._prepared = self._prepared, None
+        if prepared is not None and prepared.key == self._prompt_key():
+            prepared.done.wait(timeout=5.0)
+            if prepared.valid():
+                return prepared
+        if self.config.get("debug_mode"):
+            print("[debug] Prepared prompt missing or stale, rebuilding on release")
+        return _PreparedPrompts(self._prompt_key()).build(self.config.copy(), self._active_template or "")
 
     def _on_stop(self, mode: str):
         # ── 1. Check Model Load State ───────────────────────────
+        self._reload_wait = 0.0
+        if self._idle_unloaded and not self._loaded.is_set():
+            # 閒置卸載後按下快捷鍵時已開始重新載入：等一下它完成，而不是要使用者重講
+            # (儲存設定觸發的重新載入不等，照常提示載入中)
+            self.indicator.set_state("loading")
+            waited = time.time()
+            self._loaded.wait(timeout=float(self.config.get("model_reload_wait_sec", 15)))
+            self._reload_wait = time.time() - waited
+            if self.config.get("debug_mode"):
+                print(f"[debug] Waited {self._reload_wait:.2f}s for the idle reload after release")
+        self._last_used = time.time()
         if not self._models_ready:
             from PyQt6.QtWidgets import QMessageBox
             self.indicator.hide()
@@ -285,17 +503,69 @@ class VoiceTypeApp:
             return
 
         # Determine recording duration early
-        duration = time.time() - self._recording_start
+        released = time.time()
+        duration = released - self._recording_start
         print(f"[main] Recording stopped (mode: {mode}), duration: {duration:.2f}s")
         self.indicator.set_state("processing")
         self._on_level(0.0) # 強制將音量波形歸零，避免視覺殘留
         
-        # ── 2. Stop and get WAV bytes ───────────────────────────
-        audio_bytes = self.recorder.stop()
+        # ── 2. Stop and get raw PCM (只有雲端引擎才會編碼成 WAV) ──
+        audio = self.recorder.stop()
+        streamer, self._streamer = self._streamer, None
+        if self.config.get("debug_mode") and self.recorder.last_start_latency is not None:
+            print(f"[debug] Hotkey → first sample: {self.recorder.last_start_latency * 1000:.0f} ms "
+                  f"(warm: {self.recorder.warm}, pre-roll {self.recorder.last_preroll * 1000:.0f} ms)")
+        if self.config.get("debug_mode"):
+            print(f"[debug] Capture: {self.recorder.stats.summary()}")
+
+        # 誤觸或只錄到環境音：直接結束，不跑 STT 與 LLM
+        if not audio.has_speech and not (streamer and streamer.fed):
+            if streamer:
+                streamer.cancel()
+            audio.release_backing(keep=self.config.get("record_keep_files", False))
+            if self.config.get("debug_mode"):
+                print("[debug] VAD: no speech detected, skipping STT.")
+            self.indicator.set_state("done")
+            time.sleep(0.4)
+            self.indicator.hide()
+            return
+
+        # ── 連續聽寫：各段已在錄音中辨識並輸入，只剩尾段 ───────────
+        if streamer and streamer.on_partial:
+            streamer.finish(audio)
+            audio.release_backing(keep=self.config.get("record_keep_files", False))
+            self.indicator.set_state("done")
+            if self.config.get("completion_sound", True):
+                self.indicator.play_beep()
+            text = "".join(self._continuous_parts)
+            if self.config.get("debug_mode"):
+                print(f"[debug] Continuous dictation: {len(self._continuous_parts)} segment(s), {len(text)} chars")
+            if text:
+                self._post_process(text, text, duration)
+            return
 
         # ── STT ──────────────────────────────────────────────────
+        prepared = self._take_prompts()
         stt_start = time.time()
-        raw_stt = self.stt.transcribe(audio_bytes, language=self.config.get("language", "zh"))
+        # 兩段式辨識：小模型草稿先輸入，主模型在背景重新辨識。會交給 LLM 的不走這條
+        # (LLM 的輸出無法再用辨識結果替換)
+        draft_stt = None
+        if (not streamer and self.stt_draft is not None and self.translation_target is None
+                and not (self.llm and (self.config.get("llm_enabled") or mode == "llm"))):
+            draft_stt = self.stt_draft
+        if streamer:
+            raw_stt = streamer.finish(audio)
+            if self.config.get("debug_mode"):
+                print(f"[debug] Streaming STT: {streamer.fed} segment(s), tail {audio.duration:.2f}s")
+        else:
+            # 本機引擎直接吃 arena 的 PCM view；其餘的交給它 WAV bytes (WAV 上傳時原封不動送出)
+            pcm_ok = draft_stt is not None or registry.stt_caps(self.config)["accepts_pcm"]
+            raw_stt = (draft_stt or self.stt).transcribe(audio if pcm_ok else audio.to_wav_bytes(),
+                                                         language=self.config.get("language", "zh"),
+                                                         prompt=prepared.vocab_prompt)
+        # 辨識完成後就不再需要音訊：刪除溢寫到磁碟的暫存檔
+        # (POSIX 上已 map 的 view 仍可讀，兩段式的背景辨識不受影響)
+        audio.release_backing(keep=self.config.get("record_keep_files", False))
         stt_text = _fix_punctuation(raw_stt)
         
         # ── 1.5. Apply Voice Snippets (Local Expansion) ────────────────
@@ -304,7 +574,14 @@ class VoiceTypeApp:
         stt_elapsed = time.time() - stt_start
 
         if self.config.get("debug_mode"):
-            print(f"STT：{stt_text}（耗時：{stt_elapsed:.2f} 秒）")
+            tier = "（草稿）" if draft_stt else ""
+            print(f"STT{tier}：{stt_text}（耗時：{stt_elapsed:.2f} 秒）")
+        if stt_text and self._first_transcription:
+            self._first_transcription = False
+            if self.config.get("debug_mode"):
+                print(f"[debug] First transcription after load: STT {stt_elapsed:.2f}s "
+                      f"+ reload wait {self._reload_wait:.2f}s, {time.time() - self._launched_at:.1f}s since launch "
+                      f"(models ready at {self._ready_at - self._launched_at:.1f}s)")
 
         # ── 檢查魔術指令 (翻譯模式) ──────────────────────────────────
         import re
@@ -481,18 +758,14 @@ class VoiceTypeApp:
                 if self.config.get("debug_mode"):
                     print("[action] No builtin command found for:", clean_text)
 
-        # ── 記憶上下文 ────────────────────────────────────────────
-        memory_context = ""
-        if self.config.get("memory_enabled", True):
-            try:
-                from memory.manager import get_context_for_llm
-                memory_context = get_context_for_llm()
-            except Exception:
-                pass
+        # ── 記憶上下文 (錄音期間已在背景讀好) ─────────────────────
+        memory_context = prepared.memory_context
 
             # ── LLM ──────────────────────────────────────────────────
         final_text = stt_text
         llm_elapsed = 0.0
+        streamed = False        # llm_streaming：結果已在生成時逐段輸入
+        first_char_at = None
 
         # LLM if enabled OR if triggered by LLM-specific hotkey (mode="llm") OR if translating
         force_llm = (mode == "llm") or (self.translation_target is not None)
@@ -512,7 +785,7 @@ class VoiceTypeApp:
                 llm_mode = "replace"
                 user_msg = f"請翻譯以下文字：\n\n<Text>\n{stt_text}\n</Text>\n\n注意：只要輸出翻譯結果，不要任何多餘的回覆。"
             else:
-                full_prompt = _build_llm_prompt(self.config, memory_context, is_refine=True, template_output=self._active_template or "")
+                full_prompt = prepared.system_prompt
                 llm_mode = self.config.get("llm_mode", "replace")
                 
                 # 自動偵測是否切換到了英文相關的情境，若是，則修改引導語
@@ -543,7 +816,7 @@ class VoiceTypeApp:
                         print(f"LLM：{refined}（耗時：{elapsed:.2f} 秒）")
                     if refined and refined != raw:
                         # 避免 AI 只有回傳重複的指令、空值或是整個靈魂檔案內容
-                        soul_content = _load_soul()
+                        soul_content = prepared.soul.strip()
                         if (len(refined) < 2 and len(raw) > 5) or (soul_content and soul_content[:100] in refined):
                              if self.config.get("debug_mode"):
                                  print("[debug] LLM output rejected (possibly prompt leakage or invalid)")
@@ -566,9 +839,7 @@ class VoiceTypeApp:
                 if self.config.get("debug_demo_mode"):
                     demo_results = []
                     # 獲取所有情境檔案
-                    scenarios = ["🏠 基底靈魂"]
-                    if SOUL_SCENARIO_DIR.exists():
-                        scenarios += sorted([f.stem for f in SOUL_SCENARIO_DIR.glob("*.md")])
+                    scenarios = ["🏠 基底靈魂"] + SOUL_CACHE.scenarios()
                     
                     self.indicator.set_state("loading")
                     for s_name in scenarios:
@@ -583,7 +854,12 @@ class VoiceTypeApp:
                     final_text = "\n\n" + "\n\n---\n\n".join(demo_results)
                 else:
                     llm_start = time.time()
-                    refined = self.llm.refine(user_msg, full_prompt)
+                    if self.config.get("llm_streaming"):
+                        # 邊生成邊輸入：湊滿一個子句就貼上
+                        refined, first_char_at = self._refine_streaming(user_msg, full_prompt)
+                        streamed = bool(refined)
+                    else:
+                        refined = self.llm.refine(user_msg, full_prompt)
                     llm_elapsed = time.time() - llm_start
                     if self.config.get("debug_mode"):
                         print(f"LLM：{refined}（耗時：{llm_elapsed:.2f} 秒）")
@@ -595,19 +871,123 @@ class VoiceTypeApp:
         if self.config.get("completion_sound", True):
             self.indicator.play_beep()
             
-        self.injector.inject(_fix_punctuation(final_text))
+        injected = _fix_punctuation(final_text)
+        if not streamed:
+            self.injector.inject(injected)
+            first_char_at = time.time()
+        handshakes = transport.take_handshakes()
+        if self.config.get("debug_mode"):
+            print(f"[debug] Release → first character: {first_char_at - released:.2f}s")
+            if handshakes:
+                saved = ", ".join(f"{o} {s * 1000:.0f} ms" for o, s in handshakes.items())
+                print(f"[debug] Pre-connected during recording (handshake saved): {saved}")
         
         if self.config.get("debug_mode"):
             print(f"[main] Injection done. Mode was: {mode}")
 
-        # ── 記憶 & 統計 ───────────────────────────────────────────
-        self._post_process(stt_text, final_text, duration)
-        
         # 紀錄最後一次輸出，供模板系統使用
         self._last_stt_text = stt_text
         self._last_final_text = final_text
 
-    def _post_process(self, stt_text: str, final_text: str, duration: float):
+        if draft_stt and final_text == stt_text:
+            # 兩段式：主模型在背景重新辨識，記憶 & 統計等最終結果出來再寫
+            threading.Thread(
+                target=self._upgrade_draft,
+                args=(audio, injected, duration, {"stt_draft": stt_elapsed, "reload_wait": self._reload_wait,
+                                                  "first_char": first_char_at - released,
+                                                  "handshake_saved": sum(handshakes.values())},
+                      prepared.vocab_prompt),
+                daemon=True,
+            ).start()
+            return
+
+        # ── 記憶 & 統計 ───────────────────────────────────────────
+        timings = {"stt": stt_elapsed, "llm": llm_elapsed, "first_char": first_char_at - released}
+        if self._reload_wait:
+            timings["reload_wait"] = self._reload_wait
+        if handshakes:
+            timings["handshake_saved"] = sum(handshakes.values())
+        self._post_process(stt_text, final_text, duration, timings)
+
+    def _upgrade_draft(self, audio, injected: str, duration: float, timings: dict, vocab_prompt: Optional[str] = None):
+        """兩段式辨識第二段：主模型重新辨識同一段音訊，結果與草稿不同才往回選取替換。"""
+        session = self._recording_start
+        t0 = time.time()
+        try:
+            raw = self.stt.transcribe(audio, language=self.config.get("language", "zh"), prompt=vocab_prompt)
+        except Exception as e:
+            print(f"[main] Final STT failed, keeping draft: {e}")
+            raw = ""
+        timings["stt_final"] = time.time() - t0
+        stt_text = self._apply_snippets(_fix_punctuation(raw))
+        fixed = _fix_punctuation(stt_text)
+
+        patched = False
+        if fixed and fixed != injected:
+            if self._recording_start != session:
+                # 使用者已開始下一段錄音，游標不在草稿後面，不能再往回選取
+                if self.config.get("debug_mode"):
+                    print("[debug] Two-tier: new recording started, draft left as is")
+            else:
+                self.injector.select_back(len(injected))
+                self.injector.inject(fixed)
+                patched = True
+        timings["patched"] = patched
+        if self.config.get("debug_mode"):
+            print(f"STT（最終）：{stt_text}（耗時：{timings['stt_final']:.2f} 秒，"
+                  f"草稿 {timings['stt_draft']:.2f} 秒，{'已替換' if patched else '未替換'}）")
+
+        final_text = fixed if patched else injected
+        self._post_process(stt_text or injected, final_text, duration, timings)
+        self._last_stt_text = stt_text or injected
+        self._last_final_text = final_text
+
+    def _refine_streaming(self, user_msg: str, prompt: str):
+        """
+        llm_streaming：LLM 一邊生成一邊在子句邊界輸入。回傳 (全文, 第一個字輸入的時間)；
+        串流完全失敗時回傳 ("", None)，由呼叫端照舊輸入 STT 原文。
+        """
+        from llm.streaming import ClauseChunker
+        chunker = ClauseChunker()
+        parts = []
+        injected = ""
+        first_char_at = None
+
+        def emit(piece):
+            nonlocal injected, first_char_at
+            if not piece:
+                return
+            parts.append(piece)
+            # 全型標點轉換依「到目前為止的全文」判斷中文比例；逐字對應，長度不變
+            fixed = _fix_punctuation("".join(parts))
+            new = fixed[len(injected):]
+            if new:
+                if first_char_at is None:
+                    first_char_at = time.time()
+                    self.indicator.set_state("done")
+                self.injector.inject(new)
+                injected = fixed
+
+        try:
+            for delta in self.llm.refine_stream(user_msg, prompt):
+                emit(chunker.feed(delta))
+        except Exception as e:
+            print(f"[main] LLM streaming failed: {e}")
+        emit(chunker.flush())
+        return "".join(parts), first_char_at
+
+    def _inject_partial(self, raw: str, segment):
+        """連續聽寫：每段辨識完立刻後處理並輸入 (在 StreamingTranscriber 執行緒上執行)。"""
+        text = self._apply_snippets(_fix_punctuation(raw.strip()))
+        if not text:
+            return
+        from stt.streaming import needs_space
+        if self._continuous_parts and needs_space(self._continuous_parts[-1], text):
+            text = " " + text
+        self.injector.inject(text)
+        self._continuous_parts.append(text)
+
+    def _post_process(self, stt_text: str, final_text: str, duration: float, timings: dict = None):
         """錄音結束後：存記憶、存統計、學習詞彙。"""
         # 1. 儲存對話記憶
         if self.config.get("memory_enabled", True):
@@ -620,7 +1000,7 @@ class VoiceTypeApp:
         # 2. 累計使用統計
         try:
             from stats.tracker import record_session
-            record_session(duration, len(final_text))
+            record_session(duration, len(final_text), timings)
         except Exception as e:
             print(f"[main] 統計儲存失敗: {e}")
             
@@ -720,6 +1100,9 @@ class VoiceTypeApp:
             on_stop=self._on_stop,
         )
         self.hotkey_listener.start()
+        self._apply_recorder_config()
+        self.recorder.open_standby()
+        self._precompute_prompts()
         print("[main] Config & Hotkeys reloaded.")
         
         # 為了避免在主執行緒載入龐大模型造成卡死/崩潰，切換為背景載入
@@ -733,19 +1116,172 @@ class VoiceTypeApp:
 
     def _on_quit(self):
         self.hotkey_listener.stop()
+        self.recorder.close()
+        if self._capture_proc is not None:
+            self._capture_proc.shutdown()
+        if hasattr(self.stt, "shutdown"):
+            self.stt.shutdown()
+        transport.close_all()
+        SOUL_CACHE.stop()
 
     def _load_models_async(self):
         """背景執行緒：專門負責載入耗時的 STT 和 LLM 模型"""
         print("[main] Starting async model loading...")
+        self._loaded.clear()
         try:
-            self.stt = build_stt(self.config)
+            previous = self.stt
+            self.stt = build_stt(self.config, previous=previous)
+            if previous is not None and previous is not self.stt and hasattr(previous, "shutdown"):
+                previous.shutdown()  # 從 worker 模式切回行程內引擎
+            self.stt_draft = build_draft_stt(self.config)
             self.llm = build_llm(self.config)
+            warm = self._warm_up()
+            self._ready_at = time.time()
+            self._first_transcription = True
             self._models_ready = True
-            print("[main] Models are READY.")
-            # 載入完後隱藏藍色橫條
-            self.indicator.hide()
+            self._idle_unloaded = False
+            print(f"[main] Models are READY (warm-up {warm:.1f}s).")
+            # 載入完後隱藏藍色橫條 (閒置後的重新載入時正在錄音，不要動指示器)
+            if not self.recorder.recording:
+                self.indicator.hide()
         except Exception as e:
             print(f"[main] FAILED to load models: {e}")
+        finally:
+            self._loaded.set()
+
+    # ── 上次留下的錄音檔 ──────────────────────────────────────────
+    def _recover_recordings(self, paths):
+        """
+        啟動時處理磁碟上留下的溢寫錄音：沒開 record_keep_files 時那是上次當機的殘留，
+        模型載入後重新辨識、逐字稿存成同名 .txt 再刪除錄音檔；保留的錄音與逐字稿
+        超過 record_keep_days 天就刪除。
+        """
+        keep_days = float(self.config.get("record_keep_days", 7) or 0)
+        cutoff = time.time() - keep_days * 86400
+        directory = get_data_dir("recordings")
+        if keep_days > 0:
+            for txt in directory.glob("rec_*.txt"):
+                try:
+                    if txt.stat().st_mtime < cutoff:
+                        txt.unlink()
+                except OSError:
+                    pass
+        for path in paths:
+            try:
+                expired = keep_days > 0 and path.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if expired:
+                remove_recording(path)
+                print(f"[main] Pruned old recording {path.name}")
+                continue
+            if self.config.get("record_keep_files", False):
+                continue
+            self._loaded.wait()
+            if not self._models_ready:
+                return  # 模型載入失敗：留著下次再試
+            try:
+                audio = load_recording(path)
+                text = ""
+                if audio.duration > 0:
+                    text = _fix_punctuation(self.stt.transcribe(
+                        audio, language=self.config.get("language", "zh")))
+                    del audio  # 先放開 memmap 再刪檔
+                if text:
+                    path.with_suffix(".txt").write_text(text, encoding="utf-8")
+                    print(f"[main] Recovered {path.name}: {text}")
+            except Exception as e:
+                print(f"[main] Could not recover {path.name}: {e}")
+                continue
+            remove_recording(path)
+
+    # ── 閒置卸載 ────────────────────────────────────────────────
+    def _start_idle_watch(self):
+        """啟動閒置監看 (只啟動一次；閒置分鐘數每輪重新讀取設定，改設定不必重啟)。"""
+        if self._idle_thread is not None and self._idle_thread.is_alive():
+            return
+        self._idle_thread = threading.Thread(target=self._idle_watch, name="idle-watch", daemon=True)
+        self._idle_thread.start()
+
+    def _idle_watch(self):
+        """閒置超過 model_idle_unload_min 就卸載模型；卸載期間定期預讀權重，留在 page cache。"""
+        last_readahead = 0.0
+        while True:
+            time.sleep(30)
+            limit = float(self.config.get("model_idle_unload_min", 0) or 0) * 60
+            if limit <= 0:
+                continue
+            if self._models_unloaded:
+                if time.time() - last_readahead > 600:
+                    self._readahead_weights()
+                    last_readahead = time.time()
+            elif (self._models_ready and not self.recorder.recording
+                    and time.time() - self._last_used > limit):
+                self._unload_models()
+                last_readahead = time.time()
+
+    def _unload_models(self):
+        from stats.perf import rss_mb
+        before = rss_mb()
+        self._models_ready = False
+        self._models_unloaded = True
+        self._idle_unloaded = True
+        stt, draft, self.stt, self.stt_draft = self.stt, self.stt_draft, None, None
+        for engine in (stt, draft):
+            if hasattr(engine, "shutdown"):
+                engine.shutdown()
+        del stt, draft
+        if self.llm:
+            self.llm.unload()
+        import gc
+        gc.collect()
+        self._readahead_weights()
+        idle_min = (time.time() - self._last_used) / 60
+        print(f"[main] Models unloaded after {idle_min:.0f} min idle: RSS {before:.0f} → {rss_mb():.0f} MB")
+
+    def _readahead_weights(self):
+        """卸載後模型檔仍留在 OS page cache，重新載入只需記憶體複製而不必等磁碟。"""
+        info = registry.stt_engine(self.config.get("stt_engine"))
+        if not info.caps["local"] or not self.config.get("stt_prefault_weights", True):
+            return
+        from stt.weights import model_dir, prefault_dir
+        sizes = {self.config.get("whisper_model", "medium")}
+        if self.config.get("stt_two_tier"):
+            sizes.add(self.config.get("stt_draft_model", "base"))
+        for size in sizes:
+            prefault_dir(model_dir(info.name, size), size)
+
+    def _reload_models(self):
+        """按下快捷鍵就開始重新載入，與使用者講話的時間重疊。"""
+        self._models_unloaded = False
+        self._loaded.clear()
+        print("[main] Reloading models after idle unload...")
+        threading.Thread(target=self._load_models_async, daemon=True).start()
+
+    def _warm_up(self) -> float:
+        """載入後先各跑一次 (STT 合成音解碼 / Ollama preload)，都完成才算就緒。"""
+        started = time.time()
+
+        def warm(engine, label):
+            try:
+                sec = engine.warmup()
+                if self.config.get("debug_mode") and sec:
+                    print(f"[debug] {label} warm-up: {sec:.2f}s")
+            except Exception as e:
+                print(f"[main] {label} warm-up failed: {e}")
+
+        # LLM 的 preload 是 HTTP 請求，與 STT 暖機同時進行
+        llm_thread = None
+        if self.llm:
+            llm_thread = threading.Thread(target=warm, args=(self.llm, "LLM"), daemon=True)
+            llm_thread.start()
+        if self.stt:
+            warm(self.stt, "STT")
+        if self.stt_draft:
+            warm(self.stt_draft, "Draft STT")
+        if llm_thread:
+            llm_thread.join()
+        return time.time() - started
 
     def _on_set_template(self, output_text, name):
         """當使用者從 Menu Bar 選擇模板時。"""
@@ -764,11 +1300,18 @@ class VoiceTypeApp:
         start_page = 0 if has_api_key(self.config) else 4
 
         # Background model loading
+        leftovers = list_recordings(get_data_dir("recordings"))  # 先列出，之後新錄的不算
         threading.Thread(target=self._load_models_async, daemon=True).start()
+        self._start_idle_watch()
+        if leftovers:
+            threading.Thread(target=self._recover_recordings, args=(leftovers,),
+                             name="recover-recordings", daemon=True).start()
 
         def _on_config_changed(new_config):
             self.config.clear()
             self.config.update(new_config)
+            self._apply_recorder_config()
+            self.recorder.open_standby()
             self._models_ready = False
             self.indicator.set_state("loading")
             self.indicator.show()
@@ -782,6 +1325,7 @@ class VoiceTypeApp:
 
         # 3. Hotkey Listener
         self.hotkey_listener.start()
+        self.recorder.open_standby()
 
         # 4. Menu Bar & Tray Integration
         self.menu_bar = VoiceTypeMenuBar(
@@ -827,5 +1371,7 @@ class VoiceTypeApp:
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # py2app / PyInstaller 打包後擷取子行程需要
     app = VoiceTypeApp()
     app.run()
@@ -0,0 +1,159 @@
+"""
+STT / LLM 引擎註冊表。
+
+每個引擎以 "module:Class" 字串登記，只有真的被選到時才 import；選 groq 不會
+載入 faster_whisper，選本機模型也不會載入 groq / anthropic / openai。各引擎的
+建構參數不一致 (有的吃 api_key=...，有的吃整個 config)，由這裡的 kwargs 函式
+從 config 組出來，main.build_stt / build_llm 與 stt.get_stt / llm.get_llm 共用。
+
+能力旗標讓 pipeline 不必認得引擎名稱就能挑路徑：
+  streaming    transcribe_stream 能把前一段帶進下一段的上下文 (stt_streaming 只對這類引擎開啟)
+  batching     長錄音可切片平行解碼 (long_audio_workers 只對這類引擎生效)
+  async        每次辨識是獨立的 HTTP 請求，可同時送出多個 (連續聽寫的段落不必排隊)
+  accepts_pcm  直接吃 PCM 陣列 (AudioBuffer)；沒有的引擎由 main 交給它 WAV bytes
+  hotwords     使用詞彙提示 (initial_prompt)；沒有的引擎不必在錄音時組 vocab prompt
+  local        在本機推論 (可放進 STT worker 行程、可做兩段式 / 延遲預算 / 閒置卸載)
+"""
+import importlib
+import importlib.util
+from typing import Callable, Dict, Optional
+
+CAPABILITIES = ("streaming", "batching", "async", "accepts_pcm", "hotwords", "local")
+
+
+class EngineInfo:
+    """One registered engine: where its class lives, what it needs and what it can do."""
+
+    def __init__(self, name: str, kind: str, target: str, kwargs: Callable[[dict], dict],
+                 requires=(), **caps):
+        unknown = set(caps) - set(CAPABILITIES)
+        if unknown:
+            raise ValueError(f"unknown capability flag(s) for {name}: {sorted(unknown)}")
+        self.name = name
+        self.kind = kind
+        self.target = target
+        self._kwargs = kwargs
+        self.requires = tuple(requires)
+        self.caps = {flag: bool(caps.get(flag, False)) for flag in CAPABILITIES}
+
+    @property
+    def module(self) -> str:
+        return self.target.partition(":")[0]
+
+    @property
+    def class_name(self) -> str:
+        return self.target.partition(":")[2]
+
+    def available(self) -> bool:
+        """需要的第三方套件都裝了 (只查找，不 import)。"""
+        return all(importlib.util.find_spec(mod) is not None for mod in self.requires)
+
+    def load_class(self):
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def kwargs(self, config: dict) -> dict:
+        return self._kwargs(config)
+
+    def create(self, config: dict, **overrides):
+        return self.load_class()(**{**self.kwargs(config), **overrides})
+
+
+# ── STT ─────────────────────────────────────────────────────────
+def _local_whisper_kwargs(config: dict) -> dict:
+    return {
+        "model_size": config.get("whisper_model", "medium"),
+        "long_audio_workers": int(config.get("long_audio_workers", 0)),
+        "long_audio_threshold": float(config.get("long_audio_threshold_sec", 30)),
+        "prefault": bool(config.get("stt_prefault_weights", True)),
+    }
+
+
+STT_ENGINES: Dict[str, EngineInfo] = {}
+LLM_ENGINES: Dict[str, EngineInfo] = {}
+
+
+def register(info: EngineInfo) -> EngineInfo:
+    (STT_ENGINES if info.kind == "stt" else LLM_ENGINES)[info.name] = info
+    return info
+
+
+register(EngineInfo(
+    "local_whisper", "stt", "stt.local_whisper:LocalWhisperSTT", _local_whisper_kwargs,
+    requires=("faster_whisper",),
+    streaming=True, batching=True, accepts_pcm=True, hotwords=True, local=True,
+))
+register(EngineInfo(
+    "mlx_whisper", "stt", "stt.mlx_whisper:MLXWhisperSTT",
+    lambda c: {"model_size": c.get("whisper_model", "medium"),
+               "prefault": bool(c.get("stt_prefault_weights", True))},
+    requires=("mlx_whisper",),
+    accepts_pcm=True, hotwords=True, local=True,
+))
+register(EngineInfo(
+    "groq", "stt", "stt.groq_whisper:GroqWhisperSTT",
+    lambda c: {"api_key": c.get("groq_api_key", ""), "codec": c.get("stt_upload_codec", "auto")},
+    requires=("groq",),
+    **{"async": True},  # async 是保留字，不能寫成關鍵字參數
+))
+register(EngineInfo(
+    "gemini", "stt", "stt.gemini_stt:GeminiSTT", lambda c: {"config": c},
+    requires=("httpx",),
+    **{"async": True},
+))
+register(EngineInfo(
+    "openrouter", "stt", "stt.openrouter_stt:OpenRouterSTT", lambda c: {"config": c},
+    requires=("httpx",),
+    **{"async": True},
+))
+
+# ── LLM ─────────────────────────────────────────────────────────
+register(EngineInfo(
+    "ollama", "llm", "llm.ollama:OllamaLLM",
+    lambda c: {"model": c.get("ollama_model", "llama3"),
+               "base_url": c.get("ollama_base_url", "http://localhost:11434"),
+               "keep_alive": c.get("ollama_keep_alive", "30m")},
+    requires=("httpx",),
+    local=True,
+))
+register(EngineInfo(
+    "openai", "llm", "llm.openai_llm:OpenAILLM",
+    lambda c: {"api_key": c.get("openai_api_key", ""), "model": c.get("openai_model", "gpt-4o-mini")},
+    requires=("openai",),
+))
+register(EngineInfo(
+    "claude", "llm", "llm.claude:ClaudeLLM",
+    lambda c: {"api_key": c.get("anthropic_api_key", ""),
+               "model": c.get("anthropic_model", "claude-3-haiku-20240307")},
+    requires=("anthropic",),
+))
+for _name, _target in (
+    ("openrouter", "llm.openrouter:OpenRouterLLM"),
+    ("gemini", "llm.gemini:GeminiLLM"),
+    ("deepseek", "llm.deepseek:DeepSeekLLM"),
+    ("qwen", "llm.qwen:QwenLLM"),
+):
+    register(EngineInfo(_name, "llm", _target, lambda c: {"config": c}, requires=("httpx",)))
+
+DEFAULT_STT = "local_whisper"
+DEFAULT_LLM = "ollama"
+
+
+def stt_engine(name: Optional[str]) -> EngineInfo:
+    """未知的名稱退回預設的本機 Whisper (與舊版 get_stt 相同)。"""
+    return STT_ENGINES.get(name or DEFAULT_STT, STT_ENGINES[DEFAULT_STT])
+
+
+def llm_engine(name: Optional[str]) -> EngineInfo:
+    return LLM_ENGINES.get(name or DEFAULT_LLM, LLM_ENGINES[DEFAULT_LLM])
+
+
+def stt_caps(config: dict) -> dict:
+    return stt_engine(config.get("stt_engine")).caps
+
+
+def create_stt(config: dict, **overrides):
+    return stt_engine(config.get("stt_engine")).create(config, **overrides)
+
+
+def create_llm(config: dict, **overrides):
+    return llm_engine(config.get("llm_engine")).create(config, **overrides)
@@ -0,0 +1,170 @@
+"""
+靈魂檔 (soul stack) 與組好的 system prompt 快取。
+
+base.md + 情境 + 格式讀一次就留在記憶體；macOS 上 NFC / NFD 不一致的檔名只在
+建立索引時正規化一次，之後查名稱是 dict 查詢。組好的 prompt 以
+(情境, 格式, 模板範例, 自訂 prompt) 為 key 快取。
+
+背景執行緒每隔幾秒掃一次靈魂資料夾 (每個 .md 的 mtime / 大小與檔案清單，
+只 stat 不讀內容)：有變動就清掉全部快取、重建索引，並重新預先組合上次
+precompute 過的 prompt，放開快捷鍵時就不必讀檔。
+"""
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+MAX_PROMPTS = 256  # 模板範例是任意文字，key 不設上限會一直長
+
+
+def _nfc(name: str) -> str:
+    return unicodedata.normalize("NFC", name).lower()
+
+
+class SoulCache:
+    """
+    Soul stacks and fully rendered refine prompts, keyed on
+    (scenario, format, template, prompt override). `render(soul, template,
+    override)` turns a soul stack into the final system prompt. A polling
+    watcher drops everything when a file under the soul directories changes.
+    """
+
+    def __init__(self, base_path: Path, scenario_dir: Path, format_dir: Path,
+                 render: Callable[[str, str, str], str]):
+        self.base_path = base_path
+        self.scenario_dir = scenario_dir
+        self.format_dir = format_dir
+        self.render = render
+        self.generation = 0   # 每次偵測到變動就 +1
+        self._lock = threading.RLock()
+        self._index: Dict[Path, Dict[str, Path]] = {}
+        self._texts: Dict[Path, str] = {}
+        self._stacks: Dict[Tuple[str, str], str] = {}
+        self._prompts: "OrderedDict[tuple, str]" = OrderedDict()
+        self._warm: Optional[Tuple[str, str]] = None   # 上次 precompute 的 (template, override)
+        self._snapshot = self._scan()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── 查詢 ────────────────────────────────────────────────────
+    def _dir_index(self, directory: Path) -> Dict[str, Path]:
+        with self._lock:
+            index = self._index.get(directory)
+            if index is None:
+                index = self._index[directory] = {
+                    _nfc(f.stem): f for f in (directory.glob("*.md") if directory.exists() else ())
+                }
+            return index
+
+    def find(self, directory: Path, name: str) -> Path:
+        """名稱 → 檔案 (NFC、不分大小寫)；找不到時回傳 directory/name.md。"""
+        return self._dir_index(directory).get(_nfc(name), directory / f"{name}.md")
+
+    def names(self, directory: Path) -> List[str]:
+        return sorted(f.stem for f in self._dir_index(directory).values())
+
+    def scenarios(self) -> List[str]:
+        return self.names(self.scenario_dir)
+
+    def _read(self, path: Path) -> Optional[str]:
+        with self._lock:
+            if path not in self._texts:
+                try:
+                    self._texts[path] = path.read_text(encoding="utf-8").strip()
+                except OSError:
+                    self._texts[path] = None
+            return self._texts[path]
+
+    def soul_stack(self, scenario: str, fmt: str) -> str:
+        """三層式靈魂架構：Base + Scenario + Format。"""
+        key = (scenario, fmt)
+        with self._lock:
+            stack = self._stacks.get(key)
+            if stack is not None:
+                return stack
+            parts = []
+            base = self._read(self.base_path)
+            if base is not None:
+                parts.append(base)
+            text = self._read(self.find(self.scenario_dir, scenario))
+            if text is not None:
+                parts.append(f"【當前情境：{scenario}】\n" + text)
+            text = self._read(self.find(self.format_dir, fmt))
+            if text is not None:
+                parts.append(f"【輸出架構：{fmt}】\n" + text)
+            stack = self._stacks[key] = "\n\n" + "\n\n---\n\n".join(parts) + "\n\n"
+            return stack
+
+    def prompt(self, scenario: str, fmt: str, template: str = "", override: str = "") -> str:
+        key = (scenario, fmt, template, override)
+        with self._lock:
+            prompt = self._prompts.get(key)
+            if prompt is None:
+                prompt = self.render(self.soul_stack(scenario, fmt), template, override)
+                self._prompts[key] = prompt
+                if len(self._prompts) > MAX_PROMPTS:
+                    self._prompts.popitem(last=False)
+            else:
+                self._prompts.move_to_end(key)
+            return prompt
+
+    def precompute(self, template: str = "", override: str = "") -> int:
+        """把所有 情境 × 格式 的 prompt 先組好 (啟動時與檔案變動後)，回傳數量。"""
+        with self._lock:
+            self._warm = (template, override)
+            scenarios = ["default"] + [s for s in self.scenarios() if s != "default"]
+            formats = self.names(self.format_dir) or ["natural"]
+            for scenario in scenarios:
+                for fmt in formats:
+                    self.prompt(scenario, fmt, template, override)
+            return len(scenarios) * len(formats)
+
+    # ── 失效 ────────────────────────────────────────────────────
+    def _scan(self) -> dict:
+        state = {}
+        for directory in (self.base_path.parent, self.scenario_dir, self.format_dir):
+            try:
+                for f in directory.glob("*.md"):
+                    st = f.stat()
+                    state[f] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return state
+
+    def check(self) -> bool:
+        """掃一次靈魂資料夾；有變動就清空快取 (並重新預先組合)，回傳是否有變動。"""
+        snapshot = self._scan()
+        with self._lock:
+            if snapshot == self._snapshot:
+                return False
+            self._snapshot = snapshot
+            self._index.clear()
+            self._texts.clear()
+            self._stacks.clear()
+            self._prompts.clear()
+            self.generation += 1
+            warm = self._warm
+        print("[soul] Soul files changed, prompt cache invalidated")
+        if warm is not None:
+            self.precompute(*warm)
+        return True
+
+    def start(self, interval: float = 2.0) -> None:
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    print(f"[soul] Watcher error: {e}")
+
+        self._thread = threading.Thread(target=watch, name="soul-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
@@ -0,0 +1,33 @@
+"""
+行程資源量測：目前的常駐記憶體 (RSS)。
+有 psutil 就用；沒有時 Linux 讀 /proc，macOS 呼叫 ps，都失敗才退回峰值 RSS。
+"""
+import os
+import resource
+import subprocess
+import sys
+
+
+def rss_mb(pid: int = None) -> float:
+    """目前 (不是峰值) 的 RSS，單位 MB。"""
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except ImportError:
+        pass
+    except Exception:
+        return 0.0
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=2)
+        return int(out.stdout.strip()) * 1024 / 1e6
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak * 1024 / 1e6
@@ -34,14 +34,23 @@ def save_stats(stats: dict):
         json.dump(stats, f, ensure_ascii=False, indent=2)
 
 
-def record_session(duration_sec: float, char_count: int):
-    """錄音結束後呼叫，記錄這次 session。"""
+def record_session(duration_sec: float, char_count: int, timings: dict = None):
+    """
+    錄音結束後呼叫，記錄這次 session。
+    timings：各階段耗時 (秒)，例如兩段式辨識的 {"stt_draft": 0.4, "stt_final": 2.1}；
+    非數值 (如 "patched": True) 原樣保存。
+    """
     stats = load_stats()
-    stats["sessions"].append({
+    session = {
         "ts": datetime.now().isoformat(timespec="seconds"),
         "duration": round(duration_sec, 2),
         "chars": char_count,
-    })
+    }
+    if timings:
+        session["timings"] = {
+            k: round(v, 3) if isinstance(v, float) else v for k, v in timings.items()
+        }
+    stats["sessions"].append(session)
     save_stats(stats)
 
 
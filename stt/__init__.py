@@ -1,18 +1,22 @@
 from .base import BaseSTT
-from .local_whisper import LocalWhisperSTT
-from .groq_whisper import GroqWhisperSTT
-from .openrouter_stt import OpenRouterSTT
-from .gemini_stt import GeminiSTT
-from .mlx_whisper import MLXWhisperSTT
+
+# 引擎類別改為用到時才 import (見 registry.py)：import stt 不會載入 faster_whisper / groq
+_ENGINE_CLASSES = {
+    "LocalWhisperSTT": "local_whisper",
+    "MLXWhisperSTT": "mlx_whisper",
+    "GroqWhisperSTT": "groq",
+    "OpenRouterSTT": "openrouter",
+    "GeminiSTT": "gemini",
+}
+
+
+def __getattr__(name: str):
+    if name in _ENGINE_CLASSES:
+        from registry import stt_engine
+        return stt_engine(_ENGINE_CLASSES[name]).load_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_stt(config: dict) -> BaseSTT:
-    engine = config.get("stt_engine", "local_whisper")
-    engines = {
-        "local_whisper": LocalWhisperSTT,
-        "mlx_whisper": MLXWhisperSTT,
-        "groq": GroqWhisperSTT,
-        "openrouter": OpenRouterSTT,
-        "gemini": GeminiSTT,
-    }
-    cls = engines.get(engine, LocalWhisperSTT)
-    return cls(config)
+    from registry import create_stt
+    return create_stt(config)
@@ -1,8 +1,70 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from audio.buffer import AudioBuffer
+
+
+def as_audio_buffer(audio: Union[AudioBuffer, bytes]) -> AudioBuffer:
+    """相容舊呼叫端：WAV bytes 轉成 AudioBuffer。"""
+    if isinstance(audio, AudioBuffer):
+        return audio
+    if not audio:
+        return AudioBuffer(np.zeros(0, dtype=np.int16))
+    return AudioBuffer.from_wav_bytes(audio)
+
+
+def warmup_audio(seconds: float = 1.0, samplerate: int = 16000) -> AudioBuffer:
+    """暖機用的短音訊：調變諧波，整段標成語音 (不經 VAD，一定會真的解碼)。"""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    voiced *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    pcm = (voiced * 6000).astype(np.int16)
+    return AudioBuffer(pcm, samplerate, 1, speech_regions=[(0, len(pcm))])
 
 
 class BaseSTT(ABC):
+    # 雲端引擎上傳時 API 接受的音訊格式，依偏好排序 (見 stt.codecs.choose_codec)
+    UPLOAD_CODECS = ("wav",)
+
     @abstractmethod
-    def transcribe(self, audio_bytes: bytes, language: str = "zh") -> str:
-        """Transcribe WAV audio bytes to text."""
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        """
+        Transcribe recorded PCM audio to text (WAV bytes are still accepted).
+        `prompt` is a vocabulary hint prepared by the caller (Whisper's
+        initial_prompt); engines that use one build it themselves when None.
+        """
         ...
+
+    def warmup(self) -> float:
+        """
+        Pay first-use costs (weight paging, kernel init, lazy downloads) before
+        the first real utterance; returns the seconds spent. Cloud engines
+        have nothing to warm, so the default does nothing.
+        """
+        return 0.0
+
+    def endpoints(self) -> List[str]:
+        """URLs this engine will call; pre-connected when recording starts. Local engines have none."""
+        return []
+
+    def iter_segments(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield the transcript piece by piece as the engine decodes it.
+        The default transcribes the whole utterance and yields it once.
+        """
+        text = self.transcribe(audio, language=language, prompt=prompt)
+        if text:
+            yield text
+
+    def transcribe_stream(self, segments: Iterable[AudioBuffer], language: str = "zh",
+                          prompt: Optional[str] = None) -> Iterator[str]:
+        """
+        Transcribe pause-delimited segments as they arrive, yielding one partial
+        result per segment. Engines that can carry context between segments
+        (e.g. as a Whisper initial_prompt) override this. `prompt` is the
+        vocabulary hint, as for transcribe().
+        """
+        for segment in segments:
+            yield self.transcribe(segment, language=language, prompt=prompt)
@@ -0,0 +1,258 @@
+"""
+faster-whisper 執行參數校正 (一次性)。
+
+偵測 CPU 特性後，對 compute_type × cpu_threads 跑幾次短解碼，挑出最快的組合；
+再以該組合比較 num_workers (每個 worker 分到 cpu_threads / num_workers 條執行緒)
+同時解多段音訊的吞吐量。結果依模型大小存進 config["whisper_runtime_profiles"]，
+LocalWhisperSTT 載入模型時自動套用 compute_type 與 cpu_threads；num_workers 只是
+建議值，要在設定開啟 long_audio_workers 才會平行解碼。
+
+用法：python -m stt.calibrate [--model small] [--wav speech.wav] [--seconds 8]
+                              [--repeats 3] [--dry-run]
+沒有 --wav 時以合成音代替 (辨識內容沒有意義，但解碼工作量相近)。
+"""
+import argparse
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SAMPLERATE = 16000
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+TIE_TOLERANCE = 0.05  # 差距在 5% 內視為一樣快，選用較少執行緒的 (讓出核心給 UI)
+
+# 與 CTranslate2 int8 / float 核心效能有關的 CPU 旗標
+_INTERESTING_FLAGS = ("avx", "avx2", "fma", "avx512f", "avx512_vnni", "avx512_bf16", "amx_int8", "neon", "asimd", "dotprod", "i8mm")
+
+
+def cpu_features() -> dict:
+    """CPU 架構、邏輯核心數與相關指令集 (讀不到的欄位留空)。"""
+    info = {"arch": platform.machine(), "cores": os.cpu_count() or 1, "model": "", "flags": []}
+    flags = set()
+    if platform.system() == "Linux":
+        try:
+            with open("/proc/cpuinfo", encoding="utf-8") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    key = key.strip()
+                    if key in ("flags", "Features") and not flags:
+                        flags = set(value.split())
+                    elif key == "model name" and not info["model"]:
+                        info["model"] = value.strip()
+        except OSError:
+            pass
+    elif platform.system() == "Darwin":
+        try:
+            out = subprocess.run(
+                ["sysctl", "-n", "machdep.cpu.brand_string", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                capture_output=True, text=True, timeout=2,
+            ).stdout.splitlines()
+            info["model"] = out[0].strip() if out else ""
+            flags = {f.lower().replace(".", "_") for line in out[1:] for f in line.split()}
+        except (OSError, subprocess.SubprocessError):
+            pass
+        if info["arch"] == "arm64":
+            flags |= {"neon", "asimd"}
+    info["flags"] = sorted(f for f in _INTERESTING_FLAGS if f in flags)
+    return info
+
+
+def candidate_threads(cores: int) -> List[int]:
+    """半數、全部留一核給 UI、全部核心，再加上 4 (小模型常見的甜蜜點)。"""
+    return sorted({max(1, cores // 2), max(1, cores - 1), cores, min(4, cores)})
+
+
+def candidate_workers(cores: int) -> List[int]:
+    return [w for w in (1, 2, 4) if w == 1 or cores // w >= 2]
+
+
+def _synthetic(seconds: float) -> np.ndarray:
+    """2.5 秒調變諧波 + 0.6 秒停頓交替。"""
+    rng = np.random.default_rng(0)
+    n = int(seconds * SAMPLERATE)
+    t = np.arange(n) / SAMPLERATE
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    voiced *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    gate = (t % 3.1) < 2.5
+    return (voiced * 0.2 * gate + rng.standard_normal(n) * 0.001).astype(np.float32)
+
+
+def _load_wav(path: str, seconds: float) -> np.ndarray:
+    from audio.buffer import AudioBuffer
+    audio = AudioBuffer.from_wav_bytes(open(path, "rb").read())
+    if audio.samplerate != SAMPLERATE:
+        from audio.resample import PolyphaseResampler, mix_channels
+        # 先混成單聲道再轉取樣率 (交錯的多聲道當單聲道轉會變成雜訊)
+        pcm = PolyphaseResampler(audio.samplerate, SAMPLERATE, 1).process(mix_channels(audio.pcm, 1))
+        audio = AudioBuffer(pcm, SAMPLERATE, 1)
+    return audio.float32[: int(seconds * SAMPLERATE)]
+
+
+def _decode(model, signal: np.ndarray, language: str) -> None:
+    segments, _ = model.transcribe(signal, language=language, beam_size=1, vad_filter=False)
+    for _ in segments:
+        pass
+
+
+class Calibrator:
+    """Times short decodes over the runtime grid for one model size."""
+
+    def __init__(self, model_size: str, signal: np.ndarray, language: str = "zh", repeats: int = 3, device: str = "cpu"):
+        self.model_size = model_size
+        self.signal = signal
+        self.language = language
+        self.repeats = repeats
+        self.device = device
+        self.results: List[dict] = []
+
+    def _load(self, compute_type: str, cpu_threads: int, num_workers: int):
+        from faster_whisper import WhisperModel
+        return WhisperModel(
+            self.model_size, device=self.device, compute_type=compute_type,
+            cpu_threads=cpu_threads, num_workers=num_workers,
+        )
+
+    def time_latency(self, compute_type: str, cpu_threads: int) -> float:
+        """單段解碼時間 (取中位數)：按下快捷鍵說一句話時實際等待的時間。"""
+        model = self._load(compute_type, cpu_threads, 1)
+        _decode(model, self.signal[:SAMPLERATE], self.language)  # 暖機
+        times = []
+        for _ in range(self.repeats):
+            started = time.perf_counter()
+            _decode(model, self.signal, self.language)
+            times.append(time.perf_counter() - started)
+        del model
+        return float(np.median(times))
+
+    def time_throughput(self, compute_type: str, cpu_threads: int, num_workers: int) -> float:
+        """num_workers 段同時解碼，回傳平均每段的時間 (長錄音平行解碼用)。"""
+        threads = max(1, cpu_threads // num_workers)
+        model = self._load(compute_type, threads, num_workers)
+        _decode(model, self.signal[:SAMPLERATE], self.language)
+        jobs = num_workers * self.repeats
+        with ThreadPoolExecutor(num_workers) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: _decode(model, self.signal, self.language), range(jobs)))
+            elapsed = time.perf_counter() - started
+        del model
+        return elapsed / jobs
+
+    def run(self, compute_types, threads, workers) -> dict:
+        audio_sec = len(self.signal) / SAMPLERATE
+        best = None
+        for compute_type in compute_types:
+            for cpu_threads in threads:
+                try:
+                    sec = self.time_latency(compute_type, cpu_threads)
+                except Exception as e:
+                    print(f"[calibrate] {compute_type} x{cpu_threads}: skipped ({e})")
+                    continue
+                self.results.append({"compute_type": compute_type, "cpu_threads": cpu_threads, "num_workers": 1, "sec": sec})
+                print(f"[calibrate] {compute_type:<13} threads={cpu_threads:<3} {sec:6.2f}s  RTF {sec / audio_sec:.3f}")
+                # threads 由少到多：只有明顯更快才換成用更多執行緒的組合
+                if best is None or sec < best["sec"] * (1 - TIE_TOLERANCE):
+                    best = self.results[-1]
+        if best is None:
+            raise RuntimeError(f"no runtime configuration could load {self.model_size}")
+
+        best_workers, single = 1, None
+        for num_workers in workers:
+            if num_workers == 1 and single is not None:
+                continue
+            try:
+                per_job = self.time_throughput(best["compute_type"], best["cpu_threads"], num_workers)
+            except Exception as e:
+                print(f"[calibrate] num_workers={num_workers}: skipped ({e})")
+                continue
+            print(f"[calibrate] num_workers={num_workers:<2} {per_job:6.2f}s per clip (parallel)")
+            if num_workers == 1:
+                single = per_job
+            elif single is not None and per_job < single * (1 - TIE_TOLERANCE):
+                single, best_workers = per_job, num_workers
+
+        return {
+            "device": self.device,
+            "compute_type": best["compute_type"],
+            "cpu_threads": best["cpu_threads"],
+            "num_workers": best_workers,
+            "rtf": round(best["sec"] / audio_sec, 4),
+        }
+
+
+def load_profile(model_size: str) -> Optional[dict]:
+    """config 中這個模型大小的校正結果；換了機器 (核心數不同) 就不套用。"""
+    try:
+        from config import load_config
+        profile = load_config().get("whisper_runtime_profiles", {}).get(model_size)
+    except Exception:
+        return None
+    if not profile:
+        return None
+    if profile.get("cores") != (os.cpu_count() or 1):
+        print(f"[stt] Runtime profile for {model_size} was calibrated on another CPU, ignoring it")
+        return None
+    return profile
+
+
+def save_profile(model_size: str, profile: dict) -> None:
+    from config import load_config, save_config
+    config = load_config()
+    profiles = dict(config.get("whisper_runtime_profiles") or {})
+    profiles[model_size] = profile
+    config["whisper_runtime_profiles"] = profiles
+    save_config(config)
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(prog="python -m stt.calibrate")
+    parser.add_argument("--model", help="模型大小 (預設 config 的 whisper_model)")
+    parser.add_argument("--wav")
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--language")
+    parser.add_argument("--dry-run", action="store_true", help="只顯示結果，不寫入 config")
+    args = parser.parse_args(argv)
+
+    import ctranslate2
+    from config import load_config
+    config = load_config()
+    model_size = args.model or config.get("whisper_model", "medium")
+    language = args.language or config.get("language", "zh")
+
+    cpu = cpu_features()
+    print(f"[calibrate] CPU: {cpu['model'] or cpu['arch']} ({cpu['cores']} cores) flags: {' '.join(cpu['flags']) or '-'}")
+    device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    supported = ctranslate2.get_supported_compute_types(device)
+    compute_types = [c for c in COMPUTE_TYPES if c in supported]
+    if device == "cuda":
+        # GPU 上執行緒數與 worker 無關緊要，只比較 compute_type
+        compute_types = [c for c in ("int8_float16", "float16", "int8") if c in supported] or compute_types
+        threads, workers = [cpu["cores"]], [1]
+    else:
+        threads, workers = candidate_threads(cpu["cores"]), candidate_workers(cpu["cores"])
+
+    signal = _load_wav(args.wav, args.seconds) if args.wav else _synthetic(args.seconds)
+    print(f"[calibrate] Model {model_size} on {device}: {len(compute_types)} compute type(s) x {len(threads)} thread count(s)")
+    calibrator = Calibrator(model_size, signal, language=language, repeats=args.repeats, device=device)
+    profile = calibrator.run(compute_types, threads, workers)
+    profile.update({
+        "cores": cpu["cores"],
+        "flags": cpu["flags"],
+        "calibrated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    print(f"[calibrate] Best for {model_size}: {profile['compute_type']}, cpu_threads={profile['cpu_threads']}, "
+          f"num_workers={profile['num_workers']} (RTF {profile['rtf']})")
+    if profile["num_workers"] > 1:
+        print(f"[calibrate] Set long_audio_workers to {profile['num_workers']} to decode long recordings in parallel")
+    if not args.dry_run:
+        save_profile(model_size, profile)
+        print("[calibrate] Saved to config (whisper_runtime_profiles)")
+    return profile
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+雲端 STT 上傳用的音訊編碼。
+
+16 kHz int16 WAV 一秒就要 32 KB；FLAC 無損約可省一半，Opus (OGG 容器)
+對語音辨識而言幾乎沒有差別，大小只剩約 1/10。編碼使用 faster-whisper
+已經依賴的 PyAV，以每秒一個區塊的方式送進編碼器 (memmap 溢寫的長錄音
+也不會整段載入)；沒有 PyAV 或編碼失敗時退回 WAV。
+"""
+import io
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from audio.buffer import AudioBuffer
+
+# codec -> (PyAV 容器格式, PyAV 編碼器候選, 副檔名, MIME)
+_FORMATS: Dict[str, Tuple[str, Tuple[str, ...], str, str]] = {
+    "opus": ("ogg", ("libopus", "opus"), "ogg", "audio/ogg"),
+    "flac": ("flac", ("flac",), "flac", "audio/flac"),
+    "wav": ("wav", (), "wav", "audio/wav"),
+}
+
+OPUS_BITRATE = 24000  # 16 kHz 單聲道語音用 24 kbps 已足夠，辨識率與 WAV 相當
+
+_available: Optional[Dict[str, str]] = None
+
+
+class EncodedAudio:
+    """編碼完成、可直接上傳的音訊。"""
+
+    def __init__(self, data: bytes, codec: str, ext: str, mime: str, encode_sec: float = 0.0):
+        self.data = data
+        self.codec = codec
+        self.ext = ext
+        self.mime = mime
+        self.encode_sec = encode_sec
+
+    @property
+    def filename(self) -> str:
+        return f"audio.{self.ext}"
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def available_codecs() -> Dict[str, str]:
+    """可用的 codec -> PyAV 編碼器名稱 (WAV 永遠可用)。"""
+    global _available
+    if _available is None:
+        _available = {"wav": ""}
+        try:
+            import av
+            for codec, (_, encoders, _, _) in _FORMATS.items():
+                for name in encoders:
+                    if name in av.codecs_available:
+                        _available[codec] = name
+                        break
+        except ImportError:
+            pass
+    return _available
+
+
+def choose_codec(accepted: Iterable[str], requested: str = "auto") -> str:
+    """
+    在引擎接受的格式 (依偏好排序) 中挑第一個本機能編碼的；
+    requested 指定特定格式時，只要引擎接受且可用就照用。
+    """
+    accepted = list(accepted)
+    avail = available_codecs()
+    if requested and requested != "auto":
+        if requested in accepted and requested in avail:
+            return requested
+        print(f"[stt] Upload codec '{requested}' not usable here, choosing automatically.")
+    for codec in accepted:
+        if codec in avail:
+            return codec
+    return "wav"
+
+
+def _mono_blocks(audio: AudioBuffer, block: int) -> Iterable[np.ndarray]:
+    """逐區塊取出單聲道 int16，不對整段錄音做轉換。"""
+    pcm = audio.pcm
+    for start in range(0, len(pcm), block):
+        chunk = pcm[start:start + block]
+        if audio.channels > 1:
+            yield chunk.mean(axis=1).astype(np.int16)
+        else:
+            yield np.ascontiguousarray(chunk[:, 0])
+
+
+def _encode_av(audio: AudioBuffer, container_fmt: str, encoder: str, bit_rate: Optional[int]) -> bytes:
+    import av
+
+    out = io.BytesIO()
+    with av.open(out, mode="w", format=container_fmt) as container:
+        stream = container.add_stream(encoder, rate=audio.samplerate)
+        stream.layout = "mono"
+        if bit_rate:
+            stream.bit_rate = bit_rate
+        pts = 0
+        for chunk in _mono_blocks(audio, audio.samplerate):
+            frame = av.AudioFrame.from_ndarray(chunk.reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = audio.samplerate
+            frame.pts = pts
+            pts += len(chunk)
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return out.getvalue()
+
+
+def encode_audio(audio: Union[AudioBuffer, bytes], codec: str = "wav") -> EncodedAudio:
+    """把 AudioBuffer (或 WAV bytes) 編碼成指定格式；失敗時退回 WAV。WAV bytes 要上傳 WAV 時原封不動。"""
+    started = time.perf_counter()
+    if isinstance(audio, (bytes, bytearray)):
+        if codec == "wav":
+            _, _, ext, mime = _FORMATS["wav"]
+            return EncodedAudio(bytes(audio), "wav", ext, mime, 0.0)
+        audio = AudioBuffer.from_wav_bytes(audio)
+    if codec != "wav":
+        container_fmt, _, ext, mime = _FORMATS[codec]
+        try:
+            bit_rate = OPUS_BITRATE if codec == "opus" else None
+            data = _encode_av(audio, container_fmt, available_codecs()[codec], bit_rate)
+            return EncodedAudio(data, codec, ext, mime, time.perf_counter() - started)
+        except Exception as e:
+            print(f"[stt] {codec} encode failed, falling back to WAV: {e}")
+    _, _, ext, mime = _FORMATS["wav"]
+    return EncodedAudio(audio.to_wav_bytes(), "wav", ext, mime, time.perf_counter() - started)
+
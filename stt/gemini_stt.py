@@ -1,36 +1,43 @@
-import httpx
+import transport
+from typing import List, Optional
 import base64
-import io
+from audio.buffer import AudioBuffer
 from .base import BaseSTT
+from .codecs import choose_codec, encode_audio
 
 class GeminiSTT(BaseSTT):
     """Google Gemini STT (Audio understanding)"""
 
+    # inline_data 需要 base64 (再多 1/3)，所以更要先壓縮；Gemini 支援 ogg / flac / wav
+    UPLOAD_CODECS = ("opus", "flac", "wav")
+
     def __init__(self, config: dict):
         self.api_key = config.get("gemini_api_key", "")
         self.model = config.get("gemini_stt_model", "gemini-2.0-flash")
         self.language = config.get("language", "zh")
+        self.codec = choose_codec(self.UPLOAD_CODECS, config.get("stt_upload_codec", "auto"))
+
+    def endpoints(self) -> List[str]:
+        return ["https://generativelanguage.googleapis.com"] if self.api_key else []
 
-    def transcribe(self, audio_data: bytes, sample_rate: int = 16000) -> str:
-        if not self.api_key:
+    def transcribe(self, audio: AudioBuffer, language: str = None, prompt: Optional[str] = None) -> str:
+        if not self.api_key or not audio:
             return ""
         try:
-            import soundfile as sf
-            buf = io.BytesIO()
-            sf.write(buf, audio_data, sample_rate, format="WAV")
-            audio_b64 = base64.b64encode(buf.getvalue()).decode()
+            upload = encode_audio(audio, self.codec)
+            audio_b64 = base64.b64encode(upload.data).decode()
 
-            lang_hint = "Traditional Chinese" if self.language == "zh" else "English"
+            lang_hint = "Traditional Chinese" if (language or self.language) == "zh" else "English"
             url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
             payload = {
                 "contents": [{
                     "parts": [
                         {"text": f"Please transcribe this audio accurately in {lang_hint}. Return only the transcribed text, nothing else."},
-                        {"inline_data": {"mime_type": "audio/wav", "data": audio_b64}}
+                        {"inline_data": {"mime_type": upload.mime, "data": audio_b64}}
                     ]
                 }]
             }
-            resp = httpx.post(url, json=payload, timeout=30)
+            resp = transport.post(url, json=payload, timeout=30)
             resp.raise_for_status()
             return resp.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
         except Exception as e:
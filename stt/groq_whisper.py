@@ -1,18 +1,32 @@
 import io
+from typing import List, Optional
+
 from groq import Groq
+
+import transport
+from audio.buffer import AudioBuffer
 from .base import BaseSTT
+from .codecs import choose_codec, encode_audio
 
 
 class GroqWhisperSTT(BaseSTT):
-    def __init__(self, api_key: str):
-        self.client = Groq(api_key=api_key)
+    # Groq 接受 flac / ogg / opus / wav 等格式
+    UPLOAD_CODECS = ("opus", "flac", "wav")
+
+    def __init__(self, api_key: str, codec: str = "auto"):
+        self.client = Groq(api_key=api_key, http_client=transport.client("https://api.groq.com"))
+        self.codec = choose_codec(self.UPLOAD_CODECS, codec)
+
+    def endpoints(self) -> List[str]:
+        return ["https://api.groq.com"]
 
-    def transcribe(self, audio_bytes: bytes, language: str = "zh") -> str:
-        if not audio_bytes:
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        if not audio:
             return ""
+        upload = encode_audio(audio, self.codec)
         transcription = self.client.audio.transcriptions.create(
             model="whisper-large-v3",
-            file=("audio.wav", io.BytesIO(audio_bytes), "audio/wav"),
+            file=(upload.filename, io.BytesIO(upload.data), upload.mime),
             language=language,
             response_format="text",
         )
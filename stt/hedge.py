@@ -0,0 +1,213 @@
+"""
+對 STT 下對沖請求 (stt_hedge_engine 有設定時使用)。
+
+先只送主要引擎；超過「主要引擎延遲的第 p 百分位數」還沒有結果 (雲端卡住、本機
+模型還沒暖好)，才同時送備援引擎，先回來的有效結果勝出，另一個取消：能逐段
+取消的 (本機 / worker) 在下一段停止，HTTP 請求則放著跑完、結果丟棄。
+
+每個引擎的延遲記在 LatencyHistogram (對數分桶、舊資料逐步衰減)，存成 JSON，
+重新啟動後仍沿用這台機器量到的分佈。
+"""
+import json
+import math
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer
+
+_BUCKET_MIN = 0.05   # 秒
+_BUCKET_GROWTH = 1.2
+_BUCKETS = 45        # 0.05s × 1.2^45 ≈ 180s
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with exponential decay of old samples. Thread-safe."""
+
+    def __init__(self, decay: float = 0.98, counts=None):
+        self.decay = decay
+        self.counts = list(counts) if counts else [0.0] * _BUCKETS
+        self._lock = threading.Lock()  # 主要 / 備援兩個 attempt 執行緒會同時寫入
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        if seconds <= _BUCKET_MIN:
+            return 0
+        return min(int(math.log(seconds / _BUCKET_MIN, _BUCKET_GROWTH)) + 1, _BUCKETS - 1)
+
+    @staticmethod
+    def _upper(index: int) -> float:
+        return _BUCKET_MIN * _BUCKET_GROWTH ** index
+
+    @property
+    def count(self) -> float:
+        with self._lock:
+            return sum(self.counts)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            counts = [c * self.decay for c in self.counts]
+            counts[self._bucket(seconds)] += 1.0
+            self.counts = counts
+
+    def percentile(self, p: float) -> Optional[float]:
+        """第 p 百分位數 (取所在分桶的上緣)；沒有資料時回傳 None。"""
+        counts = self.snapshot()
+        total = sum(counts)
+        if total <= 0:
+            return None
+        target = total * p / 100.0
+        seen = 0.0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= target:
+                return self._upper(i)
+        return self._upper(_BUCKETS - 1)
+
+
+class _Attempt:
+    """One engine working on the utterance in its own thread; reports to a shared queue."""
+
+    def __init__(self, name: str, engine: BaseSTT, audio: AudioBuffer, language: str, prompt: Optional[str],
+                 results: queue.Queue, histogram: LatencyHistogram):
+        self.name = name
+        self.engine = engine
+        self.started = time.perf_counter()
+        self.cancelled = threading.Event()
+        self._histogram = histogram
+        self._results = results
+        threading.Thread(target=self._run, args=(audio, language, prompt), name=f"stt-hedge-{name}", daemon=True).start()
+
+    def _run(self, audio: AudioBuffer, language: str, prompt: Optional[str]) -> None:
+        parts, error = [], None
+        try:
+            segments = self.engine.iter_segments(audio, language=language, prompt=prompt)
+            for text in segments:
+                if self.cancelled.is_set():
+                    # 輸掉的也要記錄：雲端引擎整個請求完成才交出第一段，這時的耗時就是完整延遲；
+                    # 本機引擎中途停下則是下限 (censored)。只記贏家的話分佈會只剩快的那一半
+                    self._histogram.observe(time.perf_counter() - self.started)
+                    segments.close()  # worker / 本機引擎在這裡停下
+                    return
+                parts.append(text)
+        except Exception as e:
+            error = e
+        elapsed = time.perf_counter() - self.started
+        if error is None:
+            self._histogram.observe(elapsed)
+        self._results.put((self, "".join(parts).strip(), error, elapsed))
+
+
+class HedgedSTT(BaseSTT):
+    """
+    Sends the utterance to `primary`; if it has not answered after the
+    primary's p-th latency percentile (clamped to [min_delay, max_delay]),
+    also sends it to `secondary`. The first non-empty result wins and the
+    other attempt is cancelled. Until min_samples latencies are known the
+    delay is default_delay.
+    """
+
+    def __init__(self, primary: BaseSTT, secondary: BaseSTT, primary_name: str = "primary",
+                 secondary_name: str = "secondary", percentile: float = 95.0,
+                 default_delay: float = 1.5, min_delay: float = 0.3, max_delay: float = 8.0,
+                 min_samples: int = 5, path: Optional[Path] = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.names = (primary_name, secondary_name)
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.path = path
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.last_winner: Optional[str] = None
+        self.last_hedged = False
+        if path is not None and path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for name, counts in json.load(f).items():
+                        if len(counts) == _BUCKETS:
+                            self.histograms[name] = LatencyHistogram(counts=counts)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[stt] Warning: failed to load latency histograms: {e}")
+        for name in self.names:
+            self.histograms.setdefault(name, LatencyHistogram())
+
+    def hedge_delay(self) -> float:
+        hist = self.histograms[self.names[0]]
+        delay = hist.percentile(self.percentile) if hist.count >= self.min_samples else None
+        if delay is None:
+            delay = self.default_delay
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({name: [round(c, 4) for c in h.snapshot()] for name, h in self.histograms.items()}, f)
+        except OSError as e:
+            print(f"[stt] Warning: failed to save latency histograms: {e}")
+
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return ""
+        results: queue.Queue = queue.Queue()
+        primary_name, secondary_name = self.names
+        pending = [_Attempt(primary_name, self.primary, audio, language, prompt, results, self.histograms[primary_name])]
+        delay = self.hedge_delay()
+        self.last_hedged = False
+        text = ""
+        try:
+            while pending:
+                try:
+                    attempt, text, error, elapsed = results.get(timeout=None if self.last_hedged else delay)
+                except queue.Empty:
+                    attempt = None
+                if attempt is not None:
+                    pending.remove(attempt)
+                    if error is not None:
+                        print(f"[stt] {attempt.name} failed: {error}")
+                    if text:
+                        self.last_winner = attempt.name
+                        if self.last_hedged:
+                            print(f"[stt] Hedged: {attempt.name} won after {elapsed:.2f}s (delay {delay:.2f}s)")
+                        return text
+                if not self.last_hedged:
+                    # 主要引擎逾時或失敗 / 沒有結果：送出備援
+                    self.last_hedged = True
+                    pending.append(_Attempt(secondary_name, self.secondary, audio, language, prompt,
+                                            results, self.histograms[secondary_name]))
+            self.last_winner = None
+            return ""
+        finally:
+            for attempt in pending:
+                attempt.cancelled.set()
+            self._save()
+
+    def transcribe_stream(self, segments: Iterable[AudioBuffer], language: str = "zh",
+                          prompt: Optional[str] = None) -> Iterator[str]:
+        # 串流的每段都很短，對沖的好處不大；維持主要引擎的上下文延續
+        return self.primary.transcribe_stream(segments, language=language, prompt=prompt)
+
+    def warmup(self) -> float:
+        # 備援引擎也要暖好，否則對沖時送出去的正好是最慢的第一次
+        return self.primary.warmup() + self.secondary.warmup()
+
+    def endpoints(self) -> List[str]:
+        # 備援隨時可能被送出，兩邊的連線都先建好
+        return self.primary.endpoints() + self.secondary.endpoints()
+
+    def shutdown(self) -> None:
+        for engine in (self.primary, self.secondary):
+            if hasattr(engine, "shutdown"):
+                engine.shutdown()
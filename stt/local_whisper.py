@@ -1,34 +1,171 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
 from faster_whisper import WhisperModel
-import io
-import numpy as np
-import wave
-from .base import BaseSTT
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer, warmup_audio
+
+LONG_CHUNK_SEC = 20.0   # 長錄音平行解碼時每片的目標長度
+LONG_CHUNK_MAX = 28.0   # 沒有停頓可切時的上限 (Whisper 一次最多看 30 秒)
+LONG_OVERLAP_SEC = 0.2  # 每片前後多帶的音訊，避免切點附近的字頭字尾被截掉
+
+
+def _vocab_prompt() -> str:
+    # 動態從詞彙庫組合 initial_prompt
+    try:
+        from vocab.manager import build_vocab_prompt
+        return build_vocab_prompt()
+    except Exception:
+        return "以下是繁體中文的語音內容："
 
 
 class LocalWhisperSTT(BaseSTT):
-    def __init__(self, model_size: str = "medium"):
+    """
+    faster-whisper on the local machine. With long_audio_workers > 1 the model
+    is loaded with that many CTranslate2 workers (cores split between them),
+    and recordings longer than long_audio_threshold seconds are cut at VAD
+    pauses and the pieces decoded concurrently, then stitched in order.
+    compute_type and thread counts come from the runtime profile saved by
+    `python -m stt.calibrate` for this model size, when there is one.
+    """
+
+    def __init__(self, model_size: str = "medium", long_audio_workers: int = 0, long_audio_threshold: float = 30.0,
+                 runtime: Optional[dict] = None, prefault: bool = True):
         print(f"[stt] Loading local Whisper model: {model_size} ...")
-        self.model = WhisperModel(model_size, device="auto", compute_type="int8")
+        # python -m stt.calibrate 量出的 compute_type / 執行緒數；沒有校正過就用預設值
+        if runtime is None:
+            from .calibrate import load_profile
+            runtime = load_profile(model_size) or {}
+        self.long_audio_workers = long_audio_workers
+        self.long_audio_threshold = long_audio_threshold
+        threads = int(runtime.get("cpu_threads", 0))
+        options = {"cpu_threads": threads} if threads else {}
+        if long_audio_workers > 1:
+            options = {
+                "num_workers": long_audio_workers,
+                "cpu_threads": max(1, (threads or os.cpu_count() or 1) // long_audio_workers),
+            }
+        device = runtime.get("device", "auto")
+        compute_type = runtime.get("compute_type", "int8")
+        if runtime:
+            print(f"[stt] Runtime profile: {device}, {compute_type}, {options or 'default threads'}")
+        # 先把權重循序讀進 page cache，載入時就不必零碎地等磁碟 (每個模型每個行程一次)
+        if prefault:
+            from .weights import prefault_dir, whisper_model_dir
+            prefault_dir(whisper_model_dir(model_size), model_size, once=True)
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, **options)
+        self._pool = ThreadPoolExecutor(long_audio_workers) if long_audio_workers > 1 else None
         print("[stt] Model loaded.")
 
-    def transcribe(self, audio_bytes: bytes, language: str = "zh") -> str:
-        if not audio_bytes:
+    def warmup(self) -> float:
+        """解一段短的合成音：CTranslate2 第一次推論時的配置與初始化在這裡付掉。"""
+        started = time.perf_counter()
+        texts, _ = self._decode(warmup_audio(), "zh", "")
+        for _ in texts:
+            pass
+        return time.perf_counter() - started
+
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        audio = as_audio_buffer(audio)
+        if not audio:
             return ""
-        # 動態從詞彙庫組合 initial_prompt
-        try:
-            from vocab.manager import build_vocab_prompt
-            prompt = build_vocab_prompt()
-        except Exception:
-            prompt = "以下是繁體中文的語音內容："
-
-        audio_io = io.BytesIO(audio_bytes)
+        if prompt is None:
+            prompt = _vocab_prompt()
+        if self._is_long(audio):
+            text = "".join(self._iter_long(audio, language, prompt)).strip()
+            print(f"[stt] Transcribed (parallel): {text}")
+            return text
+        texts, info = self._decode(audio, language, prompt)
+        text = "".join(texts).strip()
+        print(f"[stt] Transcribed ({info.language}): {text}")
+        return text
+
+    def iter_segments(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> Iterator[str]:
+        # faster-whisper 的 segments 是 lazy generator，解出一段就能先交出去
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return
+        if prompt is None:
+            prompt = _vocab_prompt()
+        if self._is_long(audio):
+            yield from self._iter_long(audio, language, prompt)
+            return
+        texts, _ = self._decode(audio, language, prompt)
+        yield from texts
+
+    def _is_long(self, audio: AudioBuffer) -> bool:
+        return self._pool is not None and audio.duration > self.long_audio_threshold
+
+    def _split_long(self, audio: AudioBuffer) -> List[Tuple[int, int]]:
+        from audio.vad import detect_regions, split_at_silences
+        sr = audio.samplerate
+        regions = audio.speech_regions
+        if regions is None:
+            regions = detect_regions(audio.pcm, sr)
+        return split_at_silences(regions, len(audio), int(LONG_CHUNK_SEC * sr), int(LONG_CHUNK_MAX * sr))
+
+    def _chunk(self, audio: AudioBuffer, start: int, end: int) -> AudioBuffer:
+        pad = int(LONG_OVERLAP_SEC * audio.samplerate)
+        lo, hi = max(start - pad, 0), min(end + pad, len(audio))
+        regions = None
+        if audio.speech_regions is not None:
+            regions = [(max(s, lo) - lo, min(e, hi) - lo) for s, e in audio.speech_regions if e > lo and s < hi]
+        return AudioBuffer(audio.pcm[lo:hi], audio.samplerate, audio.channels, speech_regions=regions)
+
+    def _iter_long(self, audio: AudioBuffer, language: str, prompt: str) -> Iterator[str]:
+        """各片同時送進 CTranslate2 的多個 worker，依原本順序一片一片交出結果。"""
+        from .streaming import needs_space
+        chunks = [self._chunk(audio, s, e) for s, e in self._split_long(audio)]
+        print(f"[stt] Long audio {audio.duration:.0f}s: {len(chunks)} chunk(s) on {self.long_audio_workers} workers")
+
+        def decode(chunk: AudioBuffer) -> str:
+            if chunk.speech_regions is not None and not chunk.speech_regions:
+                return ""
+            texts, _ = self._decode(chunk, language, prompt)
+            return "".join(texts).strip()
+
+        previous = ""
+        for future in [self._pool.submit(decode, c) for c in chunks]:
+            text = future.result()
+            if not text:
+                continue
+            if needs_space(previous, text):
+                text = " " + text
+            previous = text
+            yield text
+
+    def transcribe_stream(self, segments: Iterable[AudioBuffer], language: str = "zh",
+                          prompt: Optional[str] = None) -> Iterator[str]:
+        base_prompt = _vocab_prompt() if prompt is None else prompt
+        previous = ""
+        for segment in segments:
+            if not segment:
+                yield ""
+                continue
+            # 把上一段的結尾接進 initial_prompt，讓分段解碼仍保有上下文
+            prompt = f"{base_prompt}{previous[-60:]}" if previous else base_prompt
+            texts, _ = self._decode(segment, language, prompt)
+            text = "".join(texts).strip()
+            print(f"[stt] Partial: {text}")
+            previous = (previous + text)[-200:]
+            yield text
+
+    def _decode(self, audio: AudioBuffer, language: str, prompt: str):
+        # 錄音端已經做過 VAD 並裁掉頭尾靜音時，就不必再跑一次 Silero VAD
+        options = {"vad_filter": audio.speech_regions is None}
+        if audio.speech_regions:
+            clips = audio.speech_timestamps()
+            if len(clips) > 2:
+                options["clip_timestamps"] = clips
+
+        # 直接傳 float32 陣列，省掉 WAV 容器與 PyAV 解碼
         segments, info = self.model.transcribe(
-            audio_io,
+            audio.float32,
             language=language,
             beam_size=1,
-            vad_filter=True,
             initial_prompt=prompt,
+            **options,
         )
-        text = "".join(seg.text for seg in segments).strip()
-        print(f"[stt] Transcribed ({info.language}): {text}")
-        return text
+        return (seg.text for seg in segments), info
@@ -1,7 +1,8 @@
-import io
-import wave
-import numpy as np
-from .base import BaseSTT
+import time
+from typing import Optional
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer, warmup_audio
 
 MODEL_REPO_MAP = {
     "tiny":   "mlx-community/whisper-tiny-mlx",
@@ -13,39 +14,42 @@ MODEL_REPO_MAP = {
 
 
 class MLXWhisperSTT(BaseSTT):
-    def __init__(self, model_size: str = "medium"):
+    def __init__(self, model_size: str = "medium", prefault: bool = True):
         self.model_repo = MODEL_REPO_MAP.get(model_size, MODEL_REPO_MAP["medium"])
+        self.prefault = prefault
         print(f"[stt] MLX Whisper model: {self.model_repo} (lazy load on first use)")
 
-    def transcribe(self, audio_bytes: bytes, language: str = "zh") -> str:
-        if not audio_bytes:
-            return ""
-
-        try:
-            from vocab.manager import build_vocab_prompt
-            prompt = build_vocab_prompt()
-        except Exception:
-            prompt = "以下是繁體中文的語音內容："
-
-        # WAV bytes → float32 numpy array [-1, 1]
-        audio_io = io.BytesIO(audio_bytes)
-        with wave.open(audio_io, "rb") as wf:
-            n_channels = wf.getnchannels()
-            sampwidth = wf.getsampwidth()
-            n_frames = wf.getnframes()
-            raw_data = wf.readframes(n_frames)
+    def warmup(self) -> float:
+        """下載 (第一次) 並預讀權重，再解一段短音訊讓 MLX 編譯好 kernel。"""
+        started = time.perf_counter()
+        from .weights import mlx_model_dir, prefault_dir
+        directory = mlx_model_dir(self.model_repo, download=True)
+        if self.prefault:
+            prefault_dir(directory, self.model_repo, once=True)
+        import mlx_whisper
+        mlx_whisper.transcribe(
+            warmup_audio().float32,
+            path_or_hf_repo=self.model_repo,
+            language="zh",
+            verbose=False,
+        )
+        return time.perf_counter() - started
 
-        if sampwidth == 2:
-            audio_np = np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
-        else:
-            audio_np = np.frombuffer(raw_data, dtype=np.float32)
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return ""
 
-        if n_channels > 1:
-            audio_np = audio_np.reshape(-1, n_channels).mean(axis=1)
+        if prompt is None:
+            try:
+                from vocab.manager import build_vocab_prompt
+                prompt = build_vocab_prompt()
+            except Exception:
+                prompt = "以下是繁體中文的語音內容："
 
         import mlx_whisper
         result = mlx_whisper.transcribe(
-            audio_np,
+            audio.float32,
             path_or_hf_repo=self.model_repo,
             language=language,
             initial_prompt=prompt,
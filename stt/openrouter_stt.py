@@ -1,26 +1,33 @@
-import httpx
+import transport
+from typing import List, Optional
 import io
+from audio.buffer import AudioBuffer
 from .base import BaseSTT
+from .codecs import choose_codec, encode_audio
 
 class OpenRouterSTT(BaseSTT):
     """OpenRouter STT — 使用 Whisper Large v3 (via OpenRouter)"""
 
+    # OpenAI 相容的 transcriptions 端點；後端不一定都吃 ogg，預設用無損 FLAC
+    UPLOAD_CODECS = ("flac", "opus", "wav")
+
     def __init__(self, config: dict):
         self.api_key = config.get("openrouter_api_key", "")
         self.language = config.get("language", "zh")
+        self.codec = choose_codec(self.UPLOAD_CODECS, config.get("stt_upload_codec", "auto"))
+
+    def endpoints(self) -> List[str]:
+        return ["https://openrouter.ai"] if self.api_key else []
 
-    def transcribe(self, audio_data: bytes, sample_rate: int = 16000) -> str:
-        if not self.api_key:
+    def transcribe(self, audio: AudioBuffer, language: str = None, prompt: Optional[str] = None) -> str:
+        if not self.api_key or not audio:
             return ""
         try:
-            import soundfile as sf
-            buf = io.BytesIO()
-            sf.write(buf, audio_data, sample_rate, format="WAV")
-            buf.seek(0)
-            files = {"file": ("audio.wav", buf, "audio/wav")}
-            data = {"model": "openai/whisper-large-v3", "language": self.language}
+            upload = encode_audio(audio, self.codec)
+            files = {"file": (upload.filename, io.BytesIO(upload.data), upload.mime)}
+            data = {"model": "openai/whisper-large-v3", "language": language or self.language}
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            resp = httpx.post(
+            resp = transport.post(
                 "https://openrouter.ai/api/v1/audio/transcriptions",
                 headers=headers,
                 files=files,
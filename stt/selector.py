@@ -0,0 +1,214 @@
+"""
+依延遲預算逐句挑選模型大小 (stt_latency_budget > 0 時使用)。
+
+每個模型在這台機器上的即時率 (RTF = 解碼時間 / 音訊長度) 記在 RTFTable，每句
+辨識完就以 EMA 更新並存檔。放開快捷鍵時，依錄音長度估計每個模型要花多久，
+選預算內最大 (最準) 的；短句用大模型也夠快，長段落才退回小模型。
+
+模型實例以 LRU 常駐 (最小的模型一定常駐，當作後備)；想用的模型還沒載入時，
+這一句先用已常駐且在預算內的，同時在背景載入，下一句就能用上。
+"""
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer
+
+# 沒有量測資料前的保守估計 (CPU int8、beam_size=1)
+DEFAULT_RTF = {
+    "tiny": 0.03,
+    "base": 0.05,
+    "small": 0.15,
+    "medium": 0.4,
+    "large-v3-turbo": 0.3,
+    "large-v2": 0.8,
+    "large-v3": 0.8,
+}
+CALL_OVERHEAD_SEC = 0.15  # 每次呼叫固定成本 (特徵擷取、第一個 token)
+
+
+class RTFTable:
+    """Per-model real-time factor, learned as an EMA and persisted as JSON."""
+
+    def __init__(self, path: Optional[Path] = None, alpha: float = 0.3):
+        self.path = path
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._table: Dict[str, dict] = {}
+        if path is not None and path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._table = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[stt] Warning: failed to load RTF table: {e}")
+
+    def rtf(self, model: str) -> float:
+        entry = self._table.get(model)
+        if entry:
+            return entry["rtf"]
+        return DEFAULT_RTF.get(model, 1.0)
+
+    def estimate(self, model: str, duration: float) -> float:
+        return CALL_OVERHEAD_SEC + self.rtf(model) * duration
+
+    def observe(self, model: str, duration: float, elapsed: float) -> None:
+        # 太短的錄音幾乎全是固定成本，不拿來更新 RTF
+        if duration < 1.0:
+            return
+        sample = max(elapsed - CALL_OVERHEAD_SEC, 0.0) / duration
+        with self._lock:
+            entry = self._table.get(model)
+            if entry is None:
+                entry = self._table[model] = {"rtf": sample, "n": 0}
+            else:
+                entry["rtf"] += self.alpha * (sample - entry["rtf"])
+            entry["n"] += 1
+            self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._table, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"[stt] Warning: failed to save RTF table: {e}")
+
+
+class BudgetSTT(BaseSTT):
+    """
+    Picks a model size per utterance so that the estimated decode time stays
+    within budget_sec. models is ordered smallest to largest; factory(size)
+    builds an engine. Up to `resident` engines stay loaded (LRU, the smallest
+    one is pinned) and missing ones are loaded in the background.
+    """
+
+    def __init__(self, models: List[str], budget_sec: float, factory: Callable[[str], BaseSTT],
+                 resident: int = 2, table: Optional[RTFTable] = None):
+        if not models:
+            raise ValueError("BudgetSTT needs at least one model size")
+        self.models = list(models)
+        self.budget_sec = budget_sec
+        self.factory = factory
+        self.resident = max(1, resident)
+        self.table = table or RTFTable()
+        self.last_model: Optional[str] = None
+        self._engines: "OrderedDict[str, BaseSTT]" = OrderedDict()
+        self._loading = set()
+        self._lock = threading.Lock()
+        self._engines[self.models[0]] = factory(self.models[0])
+
+    # ── 模型選擇 ────────────────────────────────────────────────
+    def preferred(self, duration: float) -> str:
+        """預算內最大的模型；全部都超過預算就用最小的。"""
+        for model in reversed(self.models):
+            if self.table.estimate(model, duration) <= self.budget_sec:
+                return model
+        return self.models[0]
+
+    def choose(self, duration: float) -> str:
+        want = self.preferred(duration)
+        with self._lock:
+            if want in self._engines:
+                return want
+            resident = [m for m in self.models if m in self._engines]
+        self.preload(want)
+        fitting = [m for m in resident if self.table.estimate(m, duration) <= self.budget_sec]
+        return fitting[-1] if fitting else resident[0]
+
+    def _engine(self, model: str) -> BaseSTT:
+        with self._lock:
+            if model not in self._engines:
+                # 選好之後剛好被背景載入擠出 LRU：改用常駐的最小模型
+                model = self.models[0]
+            self._engines.move_to_end(model)
+            return self._engines[model]
+
+    # ── 常駐模型 (LRU) ──────────────────────────────────────────
+    def preload(self, model: str) -> None:
+        """在背景載入 model (已常駐或載入中則不動作)。"""
+        with self._lock:
+            if model in self._engines or model in self._loading:
+                return
+            self._loading.add(model)
+        threading.Thread(target=self._load, args=(model,), daemon=True).start()
+
+    def _load(self, model: str) -> None:
+        started = time.perf_counter()
+        try:
+            engine = self.factory(model)
+            engine.warmup()
+        except Exception as e:
+            print(f"[stt] Failed to load {model} for the latency budget: {e}")
+            with self._lock:
+                self._loading.discard(model)
+            return
+        evicted = []
+        with self._lock:
+            self._loading.discard(model)
+            self._engines[model] = engine
+            pinned = self.models[0]
+            while len(self._engines) > self.resident:
+                victim = next(m for m in self._engines if m != pinned)
+                evicted.append(self._engines.pop(victim))
+        print(f"[stt] Budget model {model} loaded in {time.perf_counter() - started:.1f}s")
+        for engine in evicted:
+            if hasattr(engine, "shutdown"):
+                engine.shutdown()
+
+    def warmup(self) -> float:
+        # 背景載入的模型在 _load 裡各自暖機，這裡只處理已常駐的
+        with self._lock:
+            engines = list(self._engines.values())
+        return sum(engine.warmup() for engine in engines)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            engines, self._engines = list(self._engines.values()), OrderedDict()
+        for engine in engines:
+            if hasattr(engine, "shutdown"):
+                engine.shutdown()
+
+    # ── BaseSTT ─────────────────────────────────────────────────
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return ""
+        duration = audio.duration
+        model = self.choose(duration)
+        self.last_model = model
+        started = time.perf_counter()
+        text = self._engine(model).transcribe(audio, language=language, prompt=prompt)
+        elapsed = time.perf_counter() - started
+        self.table.observe(model, duration, elapsed)
+        print(f"[stt] Budget {self.budget_sec:.1f}s, {duration:.1f}s audio → {model} "
+              f"({elapsed:.2f}s, estimate {self.table.estimate(model, duration):.2f}s)")
+        return text
+
+    def iter_segments(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> Iterator[str]:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return
+        duration = audio.duration
+        model = self.choose(duration)
+        self.last_model = model
+        started = time.perf_counter()
+        yield from self._engine(model).iter_segments(audio, language=language, prompt=prompt)
+        self.table.observe(model, duration, time.perf_counter() - started)
+
+    def transcribe_stream(self, segments: Iterable[AudioBuffer], language: str = "zh",
+                          prompt: Optional[str] = None) -> Iterator[str]:
+        """整個串流固定用同一個模型 (依第一段長度挑選)，段落之間才能延續上下文。"""
+        segments = iter(segments)
+        first = next(segments, None)
+        if first is None:
+            return
+        model = self.choose(first.duration)
+        self.last_model = model
+        yield from self._engine(model).transcribe_stream(itertools.chain([first], segments), language=language,
+                                                         prompt=prompt)
@@ -0,0 +1,138 @@
+"""
+邊講邊辨識：錄音端每遇到停頓就把一段音訊丟進來，背景執行緒立刻用
+BaseSTT.transcribe_stream 解碼；放開快捷鍵時只剩最後一小段需要等。
+"""
+import queue
+import re
+import threading
+from typing import Callable, List, Optional
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT
+
+_DONE = object()
+
+
+def needs_space(prev: str, nxt: str) -> bool:
+    """中文直接相接；前後都是英數字時才需要補一個空白。"""
+    return bool(prev and nxt and re.match(r"[A-Za-z0-9.,!?]", prev[-1]) and re.match(r"[A-Za-z0-9]", nxt[0]))
+
+
+def join_partials(parts: List[str]) -> str:
+    text = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if needs_space(text, part):
+            text += " "
+        text += part
+    return text
+
+
+class StreamingTranscriber:
+    """
+    Background worker that transcribes VAD segments while recording continues.
+    feed() is called from the recorder's poll thread and never blocks;
+    finish() adds the tail segment and waits only for what is left.
+    on_partial, if given, receives each segment's text as soon as it is decoded.
+    prompt, if given, is called once in the worker thread before the first
+    decode and returns the vocabulary hint (main passes the one prepared in
+    the background while recording), so engines do not read it from disk.
+    With concurrency > 1 (engines whose requests are independent, the
+    "async" capability) up to that many segments are transcribed at once
+    and the texts are still delivered in order.
+    """
+
+    def __init__(
+        self,
+        stt: BaseSTT,
+        language: str = "zh",
+        on_partial: Optional[Callable[[str, AudioBuffer], None]] = None,
+        concurrency: int = 1,
+        prompt: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.stt = stt
+        self.language = language
+        self.on_partial = on_partial
+        self.concurrency = concurrency
+        self._prompt_source = prompt
+        self._prompt: Optional[str] = None
+        self.parts: List[str] = []
+        self.fed = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._cancelled = False
+        self._error: Optional[Exception] = None
+        self._current: Optional[AudioBuffer] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, segment: AudioBuffer) -> None:
+        if segment.has_speech:
+            self.fed += 1
+            self._queue.put(segment)
+
+    def _segments(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE or self._cancelled:
+                return
+            self._current = item
+            yield item
+
+    def _run(self) -> None:
+        try:
+            if self._prompt_source is not None:
+                self._prompt = self._prompt_source()
+            if self.concurrency > 1:
+                self._run_concurrent()
+                return
+            for text in self.stt.transcribe_stream(self._segments(), language=self.language, prompt=self._prompt):
+                if self._cancelled:
+                    break
+                self._emit(text, self._current)
+        except Exception as e:
+            self._error = e
+            print(f"[stt] Streaming transcription failed: {e}")
+
+    def _emit(self, text: str, segment: AudioBuffer) -> None:
+        self.parts.append(text)
+        if self.on_partial:
+            self.on_partial(text, segment)
+
+    def _run_concurrent(self) -> None:
+        """每段一到就送出，各自辨識完後等前一段交出結果再交出自己的，順序不變。"""
+        from concurrent.futures import ThreadPoolExecutor
+        previous: Optional[threading.Event] = None
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="stt-segment") as pool:
+            for segment in self._segments():
+                done = threading.Event()
+                pool.submit(self._transcribe_in_order, segment, previous, done)
+                previous = done
+
+    def _transcribe_in_order(self, segment: AudioBuffer, previous: Optional[threading.Event],
+                             done: threading.Event) -> None:
+        try:
+            text = "" if self._cancelled else self.stt.transcribe(segment, language=self.language,
+                                                                          prompt=self._prompt)
+            if previous is not None:
+                previous.wait()  # 先送出的段落一定先被執行，不會互等
+            if not self._cancelled:
+                self._emit(text, segment)
+        except Exception as e:
+            self._error = e
+            print(f"[stt] Streaming transcription failed: {e}")
+        finally:
+            done.set()
+
+    def finish(self, tail: Optional[AudioBuffer] = None, timeout: Optional[float] = None) -> str:
+        """送入最後一段 (放開快捷鍵時剩下的音訊)，等待所有段落解碼完成後回傳全文。"""
+        if tail is not None:
+            self.feed(tail)
+        self._queue.put(_DONE)
+        self._thread.join(timeout)
+        return join_partials(self.parts)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self._queue.put(_DONE)
@@ -0,0 +1,43 @@
+import random
+import time
+from typing import Iterator, Optional
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer
+
+
+class StubSTT(BaseSTT):
+    """
+    Fake engine for benchmarks: sleeps rtf * audio duration (plus a fixed
+    latency) and returns canned text, one segment per segment_sec of audio.
+    Lets IPC / scheduling overhead be measured without a model download.
+    With stall_rate > 0 that fraction of calls first hangs for stall_sec,
+    like a cloud request stuck in a queue.
+    """
+
+    def __init__(self, rtf: float = 0.0, latency: float = 0.0, text: str = "測試", segment_sec: float = 5.0,
+                 stall_rate: float = 0.0, stall_sec: float = 0.0, seed: Optional[int] = None):
+        self.rtf = rtf
+        self.latency = latency
+        self.text = text
+        self.segment_sec = segment_sec
+        self.stall_rate = stall_rate
+        self.stall_sec = stall_sec
+        self._rng = random.Random(seed)
+
+    def iter_segments(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> Iterator[str]:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        if self.stall_rate and self._rng.random() < self.stall_rate:
+            time.sleep(self.stall_sec)
+        count = max(1, int(audio.duration // self.segment_sec))
+        for _ in range(count):
+            if self.rtf:
+                time.sleep(audio.duration * self.rtf / count)
+            yield self.text
+
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        return "".join(self.iter_segments(audio, language=language))
@@ -0,0 +1,84 @@
+"""
+模型權重檔的預讀 (pre-fault)。
+
+CTranslate2 / MLX 讀權重時是一小塊一小塊的隨機讀取；冷啟動 (剛開機、或檔案已被
+擠出 page cache) 時，第一次載入與第一句辨識大半時間都在等磁碟。這裡先用大塊
+循序讀把整個模型目錄讀進 OS page cache (能用 posix_fadvise 時也一併告知核心)，
+之後的載入就只是記憶體複製。
+"""
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+_CHUNK = 8 * 1024 * 1024
+
+
+def whisper_model_dir(model_size: str) -> Optional[Path]:
+    """faster-whisper 模型的本機目錄；還沒下載過就回傳 None (不會觸發下載)。"""
+    if os.path.isdir(model_size):
+        return Path(model_size)
+    try:
+        from faster_whisper.utils import download_model
+        return Path(download_model(model_size, local_files_only=True))
+    except Exception:
+        return None
+
+
+def mlx_model_dir(repo: str, download: bool = False) -> Optional[Path]:
+    """MLX 模型的 Hugging Face 快取目錄；download=True 時沒有就先下載。"""
+    try:
+        from huggingface_hub import snapshot_download
+        return Path(snapshot_download(repo, local_files_only=not download))
+    except Exception:
+        return None
+
+
+def model_dir(engine: str, model_size: str) -> Optional[Path]:
+    """本機引擎 (local_whisper / mlx_whisper) 某個模型大小的權重目錄，不會觸發下載。"""
+    if engine == "mlx_whisper":
+        from .mlx_whisper import MODEL_REPO_MAP
+        return mlx_model_dir(MODEL_REPO_MAP.get(model_size, MODEL_REPO_MAP["medium"]))
+    return whisper_model_dir(model_size)
+
+
+def weight_files(directory: Path) -> List[Path]:
+    return sorted(p for p in directory.rglob("*") if p.is_file())
+
+
+def prefault(paths: Iterable[Path]) -> Tuple[int, float]:
+    """循序讀過每個檔案，讓它們留在 page cache；回傳 (bytes, 秒)。"""
+    started = time.perf_counter()
+    total = 0
+    buf = bytearray(_CHUNK)
+    view = memoryview(buf)
+    for path in paths:
+        try:
+            with open(path, "rb", buffering=0) as f:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                while True:
+                    n = f.readinto(view)
+                    if not n:
+                        break
+                    total += n
+        except OSError:
+            continue
+    return total, time.perf_counter() - started
+
+
+_prefaulted = set()   # 本行程已預讀過的模型目錄
+
+
+def prefault_dir(directory: Optional[Path], label: str = "", once: bool = False) -> int:
+    """
+    once=True 時同一個目錄在本行程只讀一次 (改設定重建、閒置後重新載入同一個模型時
+    不必再讀整個目錄；閒置期間由 main 的定期預讀維持 page cache)。
+    """
+    if directory is None or (once and directory in _prefaulted):
+        return 0
+    _prefaulted.add(directory)
+    size, elapsed = prefault(weight_files(directory))
+    if size:
+        print(f"[stt] Prefaulted {size / 1e6:.0f} MB of {label or directory.name} weights in {elapsed:.2f}s")
+    return size
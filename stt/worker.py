@@ -0,0 +1,352 @@
+"""
+在獨立子行程執行 STT 引擎 (stt_worker_processes > 0 時使用)。
+
+模型載入與 CTranslate2 的記憶體 / CPU 都留在 worker 行程裡：重新載入模型不會卡住
+選單列 App，worker 當掉也只是重新啟動一個。音訊經由 shared_memory 傳入 (每個
+worker 一塊可重複使用的緩衝區)，辨識結果一段一段經由 Pipe 傳回。
+
+協定 (parent → worker)：
+  ("transcribe", job, shm, frames, rate, channels, regions, language, prompt)
+  ("stream", job, shm, frames, rate, channels, regions, language, None)   # transcribe_stream 的一段
+  ("stream_end",)                                                   # 結束目前的串流上下文
+  ("ping", token) / ("quit",)
+worker → parent：
+  ("ready", load_sec) / ("segment", job, text) / ("done", job, elapsed)
+  ("error", job, message) / ("pong", token)
+"""
+import importlib
+import itertools
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audio.buffer import AudioBuffer
+from .base import BaseSTT, as_audio_buffer
+
+EngineSpec = Tuple[str, str, dict]  # (module, class name, kwargs)
+
+
+def _attach(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class _Feed:
+    """讓 engine.transcribe_stream 一次只拉一段：放入 pending 後呼叫 next(gen)。"""
+
+    def __init__(self):
+        self.pending: Optional[AudioBuffer] = None
+
+    def __iter__(self):
+        while self.pending is not None:
+            segment, self.pending = self.pending, None
+            yield segment
+
+
+def _worker_main(conn, spec: EngineSpec) -> None:
+    module, name, kwargs = spec
+    started = time.perf_counter()
+    try:
+        engine = getattr(importlib.import_module(module), name)(**kwargs)
+        # 暖機也在 worker 裡做完：父行程收到 ready 時，第一句就不會特別慢
+        engine.warmup()
+    except Exception as e:
+        conn.send(("error", None, f"engine load failed: {e}"))
+        return
+    conn.send(("ready", time.perf_counter() - started))
+
+    feed, stream = None, None
+    shm = None  # 父行程每個 worker 重複使用同一塊緩衝區，名稱沒變就不必重新 map
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        kind = msg[0]
+        if kind == "quit":
+            return
+        if kind == "ping":
+            conn.send(("pong", msg[1]))
+            continue
+        if kind == "stream_end":
+            feed, stream = None, None
+            continue
+
+        _, job, shm_name, frames, rate, channels, regions, language, prompt = msg
+        started = time.perf_counter()
+        try:
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    try:
+                        shm.close()
+                    except BufferError:
+                        pass  # 引擎仍留著舊 view；等 GC 回收
+                shm = _attach(shm_name)
+            pcm = np.ndarray((frames, channels), dtype=np.int16, buffer=shm.buf)
+            audio = AudioBuffer(pcm, rate, channels, speech_regions=regions)
+            if kind == "stream":
+                if stream is None:
+                    feed = _Feed()
+                    stream = engine.transcribe_stream(feed, language=language, prompt=prompt)
+                feed.pending = audio
+                conn.send(("segment", job, next(stream, "")))
+            else:
+                for text in engine.iter_segments(audio, language=language, prompt=prompt):
+                    conn.send(("segment", job, text))
+            conn.send(("done", job, time.perf_counter() - started))
+        except Exception as e:
+            conn.send(("error", job, str(e)))
+        finally:
+            pcm = audio = None
+
+
+class _Worker:
+    """Parent-side handle of one worker process and its reusable audio buffer."""
+
+    def __init__(self, ctx, spec: EngineSpec, index: int):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child, spec), name=f"voicetype-stt-{index}", daemon=True)
+        self.proc.start()
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.load_sec: Optional[float] = None
+        self.job: Optional[int] = None  # 已送出、尚未收到 done / error 的工作
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.conn.poll(timeout):
+            return False
+        msg = self.conn.recv()
+        if msg[0] != "ready":
+            print(f"[stt] Worker failed: {msg[2]}")
+            return False
+        self.load_sec = msg[1]
+        return True
+
+    def put_audio(self, audio: AudioBuffer) -> str:
+        """把 PCM 複製進這個 worker 的共享緩衝區 (不夠大才重新配置)，回傳名稱。"""
+        size = max(audio.pcm.nbytes, 1)
+        if self.shm is None or self.shm.size < size:
+            self.release()
+            # 多留一半空間，連續幾段越講越長時不必每次重新配置
+            self.shm = shared_memory.SharedMemory(create=True, size=int(size * 1.5))
+        dst = np.ndarray(audio.pcm.shape, dtype=np.int16, buffer=self.shm.buf)
+        np.copyto(dst, audio.pcm)
+        del dst
+        return self.shm.name
+
+    def release(self) -> None:
+        if self.shm is not None:
+            try:
+                self.shm.close()
+                self.shm.unlink()
+            except Exception:
+                pass
+            self.shm = None
+
+    def stop(self, timeout: float = 2.0) -> None:
+        try:
+            self.conn.send(("quit",))
+        except Exception:
+            pass
+        self.proc.join(timeout)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.release()
+
+
+class ProcessSTT(BaseSTT):
+    """
+    Runs an STT engine (given as (module, class, kwargs)) in a pool of worker
+    processes. Each call checks out one idle worker; iter_segments yields
+    text as the worker decodes it. A monitor thread pings idle workers every
+    health_interval seconds and replaces dead or unresponsive ones, and
+    restart() swaps in a new pool while the old one keeps serving.
+    """
+
+    def __init__(self, spec: EngineSpec, workers: int = 1, health_interval: float = 30.0, load_timeout: float = 600.0):
+        self.spec = spec
+        self.health_interval = health_interval
+        self.load_timeout = load_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs = itertools.count(1)
+        self._cond = threading.Condition()
+        self._all: List[_Worker] = []
+        self._idle: List[_Worker] = []
+        self._closed = False
+        pool = self._spawn(spec, workers)
+        self._all, self._idle = list(pool), list(pool)
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    # ── pool ────────────────────────────────────────────────────
+    def _spawn(self, spec: EngineSpec, count: int) -> List[_Worker]:
+        started = time.perf_counter()
+        pool = [_Worker(self._ctx, spec, i) for i in range(max(count, 1))]
+        ready = [w for w in pool if w.wait_ready(self.load_timeout)]
+        for w in pool:
+            if w not in ready:
+                w.stop(0.5)
+        if not ready:
+            raise RuntimeError(f"no STT worker could load {spec[0]}.{spec[1]}")
+        print(f"[stt] {len(ready)} STT worker(s) ready in {time.perf_counter() - started:.1f}s ({spec[1]})")
+        return ready
+
+    def restart(self, spec: Optional[EngineSpec] = None, workers: Optional[int] = None) -> None:
+        """Warm restart：新的 worker 載入完成後才換掉舊的，期間舊 worker 照常服務。"""
+        spec = spec or self.spec
+        pool = self._spawn(spec, workers or len(self._all))
+        with self._cond:
+            old, idle_old = self._all, self._idle
+            self.spec = spec
+            self._all, self._idle = list(pool), list(pool)
+            self._cond.notify_all()
+        # 閒置的舊 worker 立即結束；工作中的會在 _checkin 時發現已被換掉
+        for w in idle_old:
+            w.stop()
+
+    def _checkout(self) -> _Worker:
+        with self._cond:
+            while not self._idle:
+                if self._closed:
+                    raise RuntimeError("STT worker pool is shut down")
+                self._cond.wait()
+            return self._idle.pop()
+
+    def _checkin(self, w: _Worker, healthy: bool = True) -> None:
+        if healthy and w.job is not None:
+            # 呼叫端中途放棄：等 worker 做完手上的工作，共享緩衝區才能再用
+            threading.Thread(target=self._drain, args=(w,), daemon=True).start()
+            return
+        with self._cond:
+            current = w in self._all
+            if current and healthy:
+                self._idle.append(w)
+            elif current:
+                self._all.remove(w)
+            self._cond.notify_all()
+        if not current:
+            w.stop()
+        elif not healthy:
+            threading.Thread(target=self._replace, args=(w,), daemon=True).start()
+
+    def _drain(self, w: _Worker) -> None:
+        try:
+            for _ in self._receive(w, w.job):
+                pass
+        except RuntimeError:
+            pass
+        self._checkin(w, w.alive)
+
+    def _replace(self, dead: _Worker) -> None:
+        print("[stt] STT worker unhealthy, restarting it")
+        dead.stop(0.5)
+        try:
+            (fresh,) = self._spawn(self.spec, 1)
+        except Exception as e:
+            print(f"[stt] Worker restart failed: {e}")
+            return
+        with self._cond:
+            self._all.append(fresh)
+            self._idle.append(fresh)
+            self._cond.notify_all()
+
+    def ping(self, timeout: float = 5.0) -> int:
+        """對所有閒置 worker 做健康檢查，回傳通過的數量；沒回應的會被換掉。"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        ok = 0
+        for w in idle:
+            token = time.monotonic()
+            healthy = False
+            try:
+                w.conn.send(("ping", token))
+                healthy = bool(w.conn.poll(timeout)) and w.conn.recv() == ("pong", token)
+            except (OSError, EOFError):
+                pass
+            ok += healthy
+            self._checkin(w, healthy)
+        return ok
+
+    def _monitor(self) -> None:
+        while not self._closed:
+            time.sleep(self.health_interval)
+            if not self._closed:
+                self.ping()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            workers, self._all, self._idle = self._all, [], []
+            self._cond.notify_all()
+        for w in workers:
+            w.stop()
+
+    # ── BaseSTT ─────────────────────────────────────────────────
+    def _send(self, w: _Worker, kind: str, audio: AudioBuffer, language: str, prompt: Optional[str] = None) -> int:
+        job = next(self._jobs)
+        name = w.put_audio(audio)
+        w.job = job
+        w.conn.send((kind, job, name, len(audio), audio.samplerate, audio.channels, audio.speech_regions,
+                     language, prompt))
+        return job
+
+    def _receive(self, w: _Worker, job: int) -> Iterator[str]:
+        while True:
+            if not w.conn.poll(1.0):
+                if not w.alive:
+                    raise RuntimeError("STT worker exited during transcription")
+                continue
+            msg = w.conn.recv()
+            if msg[0] not in ("segment", "done", "error") or msg[1] != job:
+                continue
+            if msg[0] == "segment":
+                yield msg[2]
+                continue
+            w.job = None
+            if msg[0] == "error":
+                raise RuntimeError(msg[2])
+            return
+
+    def iter_segments(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> Iterator[str]:
+        audio = as_audio_buffer(audio)
+        if not audio:
+            return
+        w = self._checkout()
+        healthy = True
+        try:
+            yield from self._receive(w, self._send(w, "transcribe", audio, language, prompt))
+        except (RuntimeError, OSError, EOFError) as e:
+            healthy = w.alive
+            print(f"[stt] Worker transcription failed: {e}")
+        finally:
+            self._checkin(w, healthy)
+
+    def transcribe(self, audio: AudioBuffer, language: str = "zh", prompt: Optional[str] = None) -> str:
+        return "".join(self.iter_segments(audio, language=language, prompt=prompt)).strip()
+
+    def transcribe_stream(self, segments: Iterable[AudioBuffer], language: str = "zh",
+                          prompt: Optional[str] = None) -> Iterator[str]:
+        """整個串流固定在同一個 worker，引擎才能延續段落之間的上下文 (initial_prompt)。"""
+        w = self._checkout()
+        healthy = True
+        try:
+            for segment in segments:
+                if not segment:
+                    yield ""
+                    continue
+                yield "".join(self._receive(w, self._send(w, "stream", segment, language, prompt)))
+        except (RuntimeError, OSError, EOFError) as e:
+            healthy = w.alive
+            print(f"[stt] Worker streaming failed: {e}")
+        finally:
+            if w.alive:
+                w.conn.send(("stream_end",))
+            self._checkin(w, healthy)
@@ -0,0 +1,119 @@
+"""
+共用 HTTP 連線層。
+
+每個來源 (scheme://host:port) 一個長駐的 httpx.Client：連線保持
+keep-alive 並放進連線池，同一個供應商的下一句不必再做 DNS、TCP 與 TLS 握手。
+有安裝 h2 時對 HTTPS 啟用 HTTP/2 (多個請求共用一條連線)。回應的 gzip / deflate
+(以及有安裝 brotli / zstandard 時的 br / zstd) 由 httpx 自動解壓縮。
+
+LLM / 雲端 STT 一律經過這裡：httpx 直接呼叫的供應商用 post() / stream()，
+OpenAI / Anthropic / Groq SDK 則以 http_client=client(base_url) 共用同一個池。
+
+prewarm() 在錄音開始時先把連線建好 (DNS + TCP + TLS)，放開快捷鍵後的請求直接
+拿到熱的 socket；花在握手上的時間記下來，由 take_handshakes() 取出給 debug 輸出。
+"""
+import importlib.util
+import threading
+import time
+from typing import Dict, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# 連線 5 秒連不上就放棄；讀取 / 上傳留 30 秒給模型生成與音訊上傳
+TIMEOUT = httpx.Timeout(30.0, connect=5.0, pool=5.0)
+# 閒置連線保留 5 分鐘：講完一句到下一句通常不會更久
+LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8, keepalive_expiry=300.0)
+
+_clients: Dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+_handshakes: Dict[str, float] = {}   # 來源 → 預熱時實際花在建立連線上的秒數
+_warming = set()
+
+# 預熱只是順手，連不上就算了，不能拖住背景執行緒太久
+PREWARM_TIMEOUT = httpx.Timeout(5.0)
+
+
+def origin(url: str) -> str:
+    """https://api.example.com/v1/x → https://api.example.com (連線池的 key)。"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def client(url: str) -> httpx.Client:
+    """這個來源共用的同步 client (第一次呼叫時建立)。"""
+    key = origin(url)
+    with _lock:
+        c = _clients.get(key)
+        if c is None or c.is_closed:
+            c = _clients[key] = httpx.Client(
+                http2=HTTP2 and key.startswith("https"),
+                timeout=TIMEOUT,
+                limits=LIMITS,
+            )
+        return c
+
+
+def post(url: str, **kwargs) -> httpx.Response:
+    return client(url).post(url, **kwargs)
+
+
+def stream(method: str, url: str, **kwargs):
+    """與 httpx.stream 相同的 context manager，但走共用的連線池。"""
+    return client(url).stream(method, url, **kwargs)
+
+
+def prewarm(urls: Iterable[str]) -> None:
+    """在背景對每個來源建立連線，不阻塞呼叫端；上一輪的量測結果清掉重算。"""
+    with _lock:
+        _handshakes.clear()
+        keys = {origin(url) for url in urls if url} - _warming
+        _warming.update(keys)
+    for key in keys:
+        threading.Thread(target=_prewarm_one, args=(key,), name=f"prewarm-{key}", daemon=True).start()
+
+
+def _prewarm_one(key: str) -> None:
+    # httpcore 的 trace 事件：connect_tcp 含 DNS 解析，start_tls 是 TLS 握手；
+    # 池裡已有可用連線時兩者都不會出現 (握手 0 秒，本來就是熱的)
+    marks = {}
+
+    def trace(event: str, info) -> None:
+        if event.startswith(("connection.connect_tcp.", "connection.start_tls.")):
+            marks.setdefault(event, time.perf_counter())
+
+    try:
+        # 任何狀態碼都可以 (根路徑常是 404)，重點是連線留在池裡
+        client(key).head(key + "/", extensions={"trace": trace}, timeout=PREWARM_TIMEOUT)
+    except httpx.HTTPError as e:
+        print(f"[transport] Prewarm {key} failed: {e}")
+        return
+    finally:
+        with _lock:
+            _warming.discard(key)
+    started = marks.get("connection.connect_tcp.started")
+    finished = marks.get("connection.start_tls.complete") or marks.get("connection.connect_tcp.complete")
+    with _lock:
+        _handshakes[key] = finished - started if started and finished else 0.0
+
+
+def take_handshakes() -> Dict[str, float]:
+    """取出 (並清空) 這一輪預熱省下的握手時間：{來源: 秒}。"""
+    with _lock:
+        result = dict(_handshakes)
+        _handshakes.clear()
+    return result
+
+
+def close_all() -> None:
+    """離開程式時關閉所有連線。"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for c in clients:
+        try:
+            c.close()
+        except Exception:
+            pass